@@ -0,0 +1,41 @@
+"""Grant or revoke the admin role. Self-registration always creates members.
+
+    docker compose exec backend python -m app.admin grant someone@example.org
+    docker compose exec backend python -m app.admin revoke someone@example.org
+"""
+import sys
+
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from . import models
+
+
+def set_role(db: Session, email: str, role: str) -> bool:
+    user = db.query(models.User).filter_by(email=email).first()
+    if user is None:
+        return False
+    user.role = role
+    db.commit()
+    return True
+
+
+def run(argv: list[str]) -> int:
+    if len(argv) != 2 or argv[0] not in ("grant", "revoke"):
+        print(__doc__.strip(), file=sys.stderr)
+        return 2
+    action, email = argv
+    db = SessionLocal()
+    try:
+        found = set_role(db, email, "admin" if action == "grant" else "member")
+    finally:
+        db.close()
+    if not found:
+        print(f"no user with email {email}", file=sys.stderr)
+        return 1
+    print(f"{email}: {'admin' if action == 'grant' else 'member'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(sys.argv[1:]))
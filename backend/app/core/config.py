@@ -6,14 +6,95 @@ import os
 class Settings(BaseModel):
     # Default to SQLite for easy local dev if DATABASE_URL not provided
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./impact_dev.db")
+    # Read-only replica for the uncached public GET endpoints; reads use the primary when unset
+    database_replica_url: str | None = os.getenv("DATABASE_REPLICA_URL") or None
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    db_pool_timeout_seconds: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    db_pool_recycle_seconds: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # Postgres statement_timeout; on SQLite the same value is the busy timeout for locked writes. 0 disables
+    db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+    # SQLite connection pragmas (dev/edge deployments); empty values leave SQLite's defaults
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "normal")
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    sqlite_cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", "-20000"))
     secret_key: str = os.getenv("SECRET_KEY", "changeme")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    # Verified access tokens kept in memory until they expire or fall out of the LRU
+    token_cache_max_entries: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+    # Short-lived cache of the authenticated user's row; 0 disables it
+    user_cache_ttl_seconds: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+    # Legacy clients may send a bare user_id without a bearer token; off by default
+    allow_unauthenticated_user_id: bool = os.getenv("ALLOW_UNAUTHENTICATED_USER_ID", "false").lower() in ("1", "true", "yes")
+    # Stored hashes with a different cost are rehashed on the next successful login
+    bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Dedicated password hashing pool; 0 means one worker per CPU / 8 queued per worker
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0"))
+    password_hash_executor: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
     stripe_api_key: str | None = os.getenv("STRIPE_API_KEY")
     stripe_webhook_secret: str | None = os.getenv("STRIPE_WEBHOOK_SECRET")
     openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
+    # Point at a local fake server in tests; None uses the OpenAI default
+    openai_base_url: str | None = os.getenv("OPENAI_BASE_URL") or None
+    openai_timeout_seconds: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+    openai_max_connections: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    openai_max_concurrency: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+    openai_max_attempts: int = int(os.getenv("OPENAI_MAX_ATTEMPTS", "3"))
+    # How many heuristic top candidates are handed to the AI re-ranker
+    ai_rerank_pool: int = int(os.getenv("AI_RERANK_POOL", "25"))
+    # Candidates actually sent to the LLM after merging heuristic and semantic matches
+    ai_rerank_shortlist: int = int(os.getenv("AI_RERANK_SHORTLIST", "10"))
+    # "auto" embeds with OpenAI when it is configured, else with the offline hashing embedder
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "auto")
+    embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "256"))
+    # AI re-rank response cache: "memory", "sqlite" or "none"
+    ai_cache_backend: str = os.getenv("AI_CACHE_BACKEND", "memory")
+    ai_cache_path: str = os.getenv("AI_CACHE_PATH", "./impact_cache.db")
+    ai_cache_ttl_seconds: int = int(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+    ai_cache_max_entries: int = int(os.getenv("AI_CACHE_MAX_ENTRIES", "1024"))
+    # Token buckets for the OpenAI-backed onboarding endpoints: "memory", "sqlite" (shared by the
+    # workers on one host) or "none"; limits are "<requests>/<seconds>", empty or 0 to disable one
+    rate_limit_backend: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    rate_limit_path: str = os.getenv("RATE_LIMIT_PATH", "./impact_ratelimit.db")
+    rate_limit_suggest: str = os.getenv("RATE_LIMIT_SUGGEST", "30/60")
+    rate_limit_ai_chat: str = os.getenv("RATE_LIMIT_AI_CHAT", "20/60")
+    # Key anonymous callers on the first X-Forwarded-For address; only behind a proxy that sets it
+    rate_limit_trust_forwarded: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
     elastic_cloud_id: str | None = os.getenv("ELASTIC_CLOUD_ID")
     elastic_api_key: str | None = os.getenv("ELASTIC_API_KEY")
+    # "auto" uses Elasticsearch when the Elastic settings are present, else the in-process BM25 index
+    search_backend: str = os.getenv("SEARCH_BACKEND", "auto")
+    search_index_prefix: str = os.getenv("SEARCH_INDEX_PREFIX", "impact")
+    # Background jobs (webhook effects, transcript/profile writes, AI re-ranks)
+    job_workers: int = int(os.getenv("JOB_WORKERS", "4"))
+    job_poll_interval_seconds: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+    job_visibility_timeout_seconds: float = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "300"))
+    # "background" answers with heuristic scores on a cache miss and re-ranks in a job; "inline" waits
+    ai_rerank_mode: str = os.getenv("AI_RERANK_MODE", "background")
+    # Full recompute of the stats rollups (reconciles edits and imports); 0 disables it
+    stats_rebuild_interval_seconds: int = int(os.getenv("STATS_REBUILD_INTERVAL_SECONDS", "3600"))
+    # Batch allocation of pro-bono offer hours to cause skill needs; 0 disables the periodic run
+    probono_match_interval_seconds: int = int(os.getenv("PROBONO_MATCH_INTERVAL_SECONDS", "3600"))
+    # Route latency, per-request SQL and outbound-call histograms on /api/metrics; off adds no hooks at all
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    # Per-profile upcoming-event feeds kept in memory and patched as events change
+    event_feed_cache_size: int = int(os.getenv("EVENT_FEED_CACHE_SIZE", "10000"))
+    public_cache_ttl_seconds: int = int(os.getenv("PUBLIC_CACHE_TTL_SECONDS", "300"))
+    public_cache_max_age: int = int(os.getenv("PUBLIC_CACHE_MAX_AGE", "30"))
     backend_cors_origins: str = os.getenv("BACKEND_CORS_ORIGINS", "http://localhost:5173")
+    # How often each process checks change_versions for writes made elsewhere (CLI, other workers); 0 disables
+    change_poll_interval_seconds: float = float(os.getenv("CHANGE_POLL_INTERVAL_SECONDS", "2"))
+    # Full tribe index reload at least this often, for writes that bypass the app (manual SQL); 0 disables
+    tribe_index_max_age_seconds: float = float(os.getenv("TRIBE_INDEX_MAX_AGE_SECONDS", "300"))
+    # Routers to mount: "all", a comma list of feature names, or "all,-bulk" to drop some (see app.features)
+    features: str = os.getenv("FEATURES", "all")
+    # Schema check at boot: "auto" upgrades only when the models changed since the last recorded
+    # upgrade, "always" runs the full upgrade every time, "never" leaves it to `python -m app.migrations`
+    schema_upgrade_on_startup: str = os.getenv("SCHEMA_UPGRADE_ON_STARTUP", "auto")
     @property
     def stripe_enabled(self) -> bool:
         return bool(self.stripe_api_key and self.stripe_webhook_secret)
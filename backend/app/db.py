@@ -1,14 +1,139 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from .core.config import get_settings
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql import Delete, Insert, Update
+from .core.config import Settings, get_settings
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(get_settings().database_url, pool_pre_ping=True, connect_args={"check_same_thread": False} if get_settings().database_url.startswith("sqlite") else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _sqlite_pragmas(settings: Settings) -> Dict[str, Any]:
+    pragmas = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.db_statement_timeout_ms or None,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+    }
+    return {name: value for name, value in pragmas.items() if value not in (None, "")}
+
+
+def _engine_kwargs(url: str, settings: Settings) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping, "pool_recycle": settings.db_pool_recycle_seconds}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+        in_memory = url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+    else:
+        in_memory = False
+        if settings.db_statement_timeout_ms and url.startswith("postgresql"):
+            kwargs["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    if not in_memory:
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout_seconds,
+        )
+    return kwargs
+
+
+def _install_pragmas(engine: Engine, settings: Settings) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = _sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def make_engine(url: str, settings: Optional[Settings] = None) -> Engine:
+    """Engine with the pool, timeout and SQLite pragma settings applied."""
+    settings = settings or get_settings()
+    engine = create_engine(url, **_engine_kwargs(url, settings))
+    _install_pragmas(engine, settings)
+    return engine
+
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+psycopg"}
+
+
+def async_url(url: str) -> str:
+    """The same database behind an asyncio driver (aiosqlite, psycopg 3 async)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in _ASYNC_DRIVERS and parsed.drivername in (backend, f"{backend}+psycopg", f"{backend}+psycopg2", f"{backend}+pysqlite"):
+        parsed = parsed.set(drivername=_ASYNC_DRIVERS[backend])
+    return parsed.render_as_string(hide_password=False)
+
+
+def make_async_engine(url: str, settings: Optional[Settings] = None) -> AsyncEngine:
+    settings = settings or get_settings()
+    kwargs = _engine_kwargs(url, settings)
+    if url.startswith("sqlite"):
+        # aiosqlite runs each connection on its own thread already
+        kwargs.pop("connect_args", None)
+        if "pool_size" in kwargs:
+            # the aiosqlite dialect defaults to NullPool; reuse connections like the sync engine
+            kwargs["poolclass"] = AsyncAdaptedQueuePool
+    engine = create_async_engine(async_url(url), **kwargs)
+    _install_pragmas(engine.sync_engine, settings)
+    return engine
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica engine when `info["use_replica"]` is set.
+
+    Flushes and explicit INSERT/UPDATE/DELETE statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("use_replica")
+            and replica_engine is not engine
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+        ):
+            return replica_engine
+        return engine
+
+
+class AsyncRoutingSession(Session):
+    """Sync half of AsyncSessionLocal sessions; routes like RoutingSession over the async engines."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("use_replica")
+            and async_replica_engine is not async_engine
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+        ):
+            return async_replica_engine.sync_engine
+        return async_engine.sync_engine
+
+
+engine = make_engine(get_settings().database_url)
+# Without DATABASE_REPLICA_URL, reads simply use the primary.
+replica_engine = make_engine(get_settings().database_replica_url) if get_settings().database_replica_url else engine
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# Async path for request handlers: no threadpool slot is held while waiting on the database.
+async_engine = make_async_engine(get_settings().database_url)
+async_replica_engine = (
+    make_async_engine(get_settings().database_replica_url) if get_settings().database_replica_url else async_engine
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False
+)
 
 
 def get_db():
@@ -19,3 +144,23 @@ def get_db():
         db.close()
 
 
+def get_read_db(request: Request):
+    """Like get_db, but GET/HEAD requests read from the replica (which may lag the primary)."""
+    db = SessionLocal()
+    db.info["use_replica"] = request.method in ("GET", "HEAD")
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    """Async get_read_db: GET/HEAD requests read from the replica."""
+    async with AsyncSessionLocal() as db:
+        db.sync_session.info["use_replica"] = request.method in ("GET", "HEAD")
+        yield db
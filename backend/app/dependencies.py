@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+from .core.config import get_settings
+from .db import get_async_db
+from .services import changes
+from .services.cache import LRUCache
+from .services.tokens import get_token_cache
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Detached snapshot of the authenticated user, safe to cache across requests."""
+
+    id: int
+    email: str
+    role: str
+    status_tier: str
+
+
+_bearer = HTTPBearer(auto_error=False)
+user_cache = LRUCache(max_entries=10000, ttl_seconds=get_settings().user_cache_ttl_seconds)
+
+
+def _forget_users(changed) -> None:
+    if changed is None:
+        user_cache.clear()
+        return
+    for user_id in changed:
+        user_cache.delete(str(user_id))
+
+
+# other processes' user writes (python -m app.admin) show up once USER_CACHE_TTL_SECONDS runs out
+changes.subscribe(models.User, _forget_users, remote=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def _load_user(db: Session, user_id: int) -> Optional[CurrentUser]:
+    user = db.get(models.User, user_id)
+    if user is None:
+        return None
+    return CurrentUser(id=user.id, email=user.email, role=user.role, status_tier=user.status_tier)
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+    db: AsyncSession = Depends(get_async_db),
+) -> Optional[CurrentUser]:
+    """The bearer token's user, None without a token; invalid tokens are rejected with 401."""
+    if credentials is None:
+        return None
+    try:
+        claims = get_token_cache().claims(credentials.credentials)
+        user_id = int(claims["sub"])
+    except (jwt.PyJWTError, ValueError):
+        raise _unauthorized("Invalid or expired token")
+
+    cache_enabled = get_settings().user_cache_ttl_seconds > 0
+    user = user_cache.get(str(user_id)) if cache_enabled else None
+    if user is None:
+        user = await db.run_sync(_load_user, user_id)
+        if user is None:
+            raise _unauthorized("Unknown user")
+        if cache_enabled:
+            user_cache.set(str(user_id), user)
+    return user
+
+
+async def get_current_user(user: Optional[CurrentUser] = Depends(get_optional_user)) -> CurrentUser:
+    if user is None:
+        raise _unauthorized("Not authenticated")
+    return user
+
+
+async def require_admin(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
+
+
+def resolve_user_id(claimed_user_id: Optional[int], user: Optional[CurrentUser]) -> Optional[int]:
+    """The user id a request may act as: the token's user, never someone else's."""
+    if user is not None:
+        if claimed_user_id is not None and claimed_user_id != user.id:
+            raise HTTPException(status_code=403, detail="user_id does not match the authenticated user")
+        return user.id
+    if claimed_user_id is not None and not get_settings().allow_unauthenticated_user_id:
+        raise _unauthorized("Authentication required to act as a user")
+    return claimed_user_id
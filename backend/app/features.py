@@ -0,0 +1,90 @@
+"""Which routers this process mounts, chosen by the FEATURES setting.
+
+A feature owns one or more modules under app.routers. Modules of disabled features are never
+imported, so neither are the services and SDKs behind them; /api/health is always mounted.
+The SDKs a feature loads lazily (stripe, openai) are imported on a background thread once the
+app has started, so the first checkout or chat does not pay for the import either.
+"""
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter
+
+from .core.config import Settings, get_settings
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    routers: Tuple[str, ...]
+    # SDK modules the routers import on first use, and when it is worth loading them ahead of that
+    sdks: Tuple[str, ...] = ()
+    sdks_configured: Optional[Callable[[Settings], bool]] = None
+
+
+FEATURES: Tuple[Feature, ...] = (
+    Feature("catalog", ("public",)),
+    Feature("auth", ("auth",)),
+    Feature("donations", ("donations", "stripe_webhook"), ("stripe",), lambda s: s.stripe_enabled),
+    Feature("onboarding", ("onboarding",), ("openai",), lambda s: bool(s.openai_api_key)),
+    Feature("probono", ("probono",)),
+    Feature("tags", ("tags",)),
+    Feature("bulk", ("bulk",)),
+    Feature("events", ("events",)),
+)
+_by_name = {feature.name: feature for feature in FEATURES}
+
+
+def parse_features(spec: str) -> List[Feature]:
+    """"all", "catalog,auth" or "all,-bulk,-probono" -> the enabled features, in mount order."""
+    names = set()
+    for part in (p.strip() for p in (spec or "all").split(",")):
+        if not part:
+            continue
+        name = part[1:] if part.startswith("-") else part
+        if name != "all" and name not in _by_name:
+            raise ValueError(f"Unknown feature {name!r} in FEATURES; expected one of {', '.join(_by_name)}")
+        selected = set(_by_name) if name == "all" else {name}
+        names = names - selected if part.startswith("-") else names | selected
+    return [feature for feature in FEATURES if feature.name in names]
+
+
+def enabled_features() -> List[Feature]:
+    return parse_features(get_settings().features)
+
+
+def routers(features: Sequence[Feature]) -> List[APIRouter]:
+    from .routers import health
+
+    mounted = [health.router]
+    for feature in features:
+        for module in feature.routers:
+            mounted.append(importlib.import_module(f".routers.{module}", __package__).router)
+    return mounted
+
+
+def warm_up(features: Sequence[Feature]) -> Optional[threading.Thread]:
+    """Import the configured SDKs of the enabled features off the event loop; None when there are none."""
+    settings = get_settings()
+    modules = [
+        module
+        for feature in features
+        if feature.sdks_configured is not None and feature.sdks_configured(settings)
+        for module in feature.sdks
+    ]
+    if not modules:
+        return None
+
+    def load() -> None:
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                # the request path imports it again and reports the failure where it matters
+                pass
+
+    thread = threading.Thread(target=load, name="sdk-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -1,9 +1,20 @@
+import asyncio
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import get_settings
 
-from .routers import health, public, donations, stripe_webhook, auth, onboarding, probono
-from .db import Base, engine
+from .features import enabled_features, routers, warm_up
+from .migrations import ensure_schema
+from .services.llm import close_llm_client
+from .services.jobs import job_queue
+from .services import job_handlers  # noqa: F401  registers job handlers
+from .services.embeddings import schedule_sync as schedule_embedding_sync
+from .services.rollups import schedule_rebuild as schedule_rollup_rebuild
+from .services.probono import schedule_next_match as schedule_probono_match
+from .services import changes, metrics
+from .db import async_engine, async_replica_engine, engine, replica_engine
 
 app = FastAPI(title="Impact Forge API", version="0.1.0")
 
@@ -15,20 +26,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Link", "X-Next-Cursor", "Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
-app.include_router(health.router, prefix="/api")
-app.include_router(public.router, prefix="/api")
-app.include_router(donations.router, prefix="/api")
-app.include_router(stripe_webhook.router, prefix="/api")
-app.include_router(auth.router, prefix="/api")
-app.include_router(onboarding.router, prefix="/api")
-app.include_router(probono.router, prefix="/api")
+if settings.metrics_enabled:
+    metrics.install(app, [engine, replica_engine, async_engine.sync_engine, async_replica_engine.sync_engine])
+
+features = enabled_features()
+for router in routers(features):
+    app.include_router(router, prefix="/api")
+
+
+_change_watcher = None
 
 
 @app.on_event("startup")
-def on_startup():
-    # Auto-create tables for dev. In production, use Alembic migrations.
-    Base.metadata.create_all(bind=engine)
+async def on_startup():
+    # Auto-create tables and add new nullable columns for dev. In production, use Alembic migrations.
+    # By default this only reads the recorded model fingerprint; see SCHEMA_UPGRADE_ON_STARTUP
+    ensure_schema(mode=settings.schema_upgrade_on_startup)
+    await job_queue.start(settings.job_workers)
+    # embed tribes added while the app was down (a no-op when every vector is current)
+    schedule_embedding_sync()
+    # reconcile the stats rollups with whatever changed while the app was down; the rebuild
+    # job then keeps rescheduling itself every STATS_REBUILD_INTERVAL_SECONDS
+    schedule_rollup_rebuild()
+    # pro-bono matching runs every PROBONO_MATCH_INTERVAL_SECONDS, or on demand via POST /api/probono/match
+    if any(feature.name == "probono" for feature in features):
+        schedule_probono_match()
+    warm_up(features)
+    # writes made by other processes (CLI imports, other workers) invalidate this one's indexes and caches
+    global _change_watcher
+    if settings.change_poll_interval_seconds > 0:
+        await run_in_threadpool(changes.poll)  # baseline, so only later writes count as remote
+        _change_watcher = asyncio.create_task(changes.watch(settings.change_poll_interval_seconds))
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    if _change_watcher is not None:
+        _change_watcher.cancel()
+    await job_queue.stop()
+    await close_llm_client()
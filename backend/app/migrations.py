@@ -0,0 +1,118 @@
+import hashlib
+from typing import Optional
+
+from sqlalchemy import Column, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from .db import Base, engine, SessionLocal
+from . import models
+from .services.tags import migrate_legacy_profile_tags
+from .services.transcripts import migrate_legacy_transcripts
+
+
+def _add_missing_columns(bind: Engine) -> list[str]:
+    """ALTER TABLE ... ADD COLUMN for nullable model columns the database does not have yet."""
+    inspector = inspect(bind)
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+# Kept out of Base.metadata: it records which version of the models the schema was last upgraded to
+_state = Table(
+    "schema_state", MetaData(),
+    Column("key", String(64), primary_key=True),
+    Column("value", String(128), nullable=False),
+)
+
+
+def schema_fingerprint() -> str:
+    """Hash of the tables, columns and indexes the models declare; changes whenever upgrade_schema has work to do."""
+    digest = hashlib.sha256()
+    for table in sorted(Base.metadata.sorted_tables, key=lambda t: t.name):
+        digest.update(f"T {table.name}\n".encode())
+        for column in table.columns:
+            digest.update(f"C {column.name} {column.type} {column.nullable}\n".encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(f"I {index.name} {[c.name for c in index.columns]} {index.unique}\n".encode())
+    return digest.hexdigest()
+
+
+def _recorded_fingerprint(bind: Engine) -> Optional[str]:
+    try:
+        with bind.connect() as conn:
+            return conn.execute(select(_state.c.value).where(_state.c.key == "fingerprint")).scalar()
+    except SQLAlchemyError:
+        # no schema_state table yet: a fresh database, or one from before the fingerprint existed
+        return None
+
+
+def _record_fingerprint(bind: Engine, fingerprint: str) -> None:
+    _state.create(bind=bind, checkfirst=True)
+    with bind.begin() as conn:
+        conn.execute(_state.delete().where(_state.c.key == "fingerprint"))
+        conn.execute(_state.insert().values(key="fingerprint", value=fingerprint))
+
+
+def _seed_change_versions(bind: Engine) -> None:
+    # writers only ever UPDATE these rows, inside their own transactions
+    versions = models.ChangeVersion.__table__
+    with bind.begin() as conn:
+        existing = set(conn.execute(select(versions.c.name)).scalars())
+        missing = [{"name": t.name, "version": 0} for t in Base.metadata.sorted_tables if t.name not in existing]
+        if missing:
+            conn.execute(versions.insert(), missing)
+
+
+def upgrade_schema(bind: Engine = engine) -> list[str]:
+    Base.metadata.create_all(bind=bind)
+    added = _add_missing_columns(bind)
+    # create_all skips indexes added to tables that already exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+    _seed_change_versions(bind)
+    _record_fingerprint(bind, schema_fingerprint())
+    return added
+
+
+def ensure_schema(bind: Engine = engine, mode: str = "auto") -> Optional[list[str]]:
+    """The boot-time schema check; returns the added columns, or None when the upgrade was skipped.
+
+    "auto" costs one primary-key read when the schema is current, instead of reflecting every
+    table: the full upgrade runs only when the models' fingerprint differs from the recorded one.
+    """
+    if mode == "never":
+        return None
+    if mode != "always" and _recorded_fingerprint(bind) == schema_fingerprint():
+        return None
+    return upgrade_schema(bind)
+
+
+def run():
+    # Bring the schema up to date, then backfill data that moved out of legacy columns.
+    added = upgrade_schema()
+    print(f"schema: added columns {added or 'none'}")
+    db = SessionLocal()
+    try:
+        sessions = migrate_legacy_transcripts(db)
+        print(f"onboarding transcripts: migrated {sessions} sessions")
+        profiles = migrate_legacy_profile_tags(db)
+        print(f"profile tags: migrated {profiles} profiles")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Float
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Float, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from .db import Base
 import datetime as dt
@@ -21,6 +21,8 @@ class Tribe(Base):
     description: Mapped[str] = mapped_column(Text, default="")
     leader_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     location: Mapped[str | None] = mapped_column(String(255))
+    location_lat: Mapped[float | None] = mapped_column(Float, nullable=True)
+    location_lng: Mapped[float | None] = mapped_column(Float, nullable=True)
 
 
 class Cause(Base):
@@ -31,9 +33,11 @@ class Cause(Base):
     funding_goal: Mapped[float] = mapped_column(Float, default=0)
     funds_raised: Mapped[float] = mapped_column(Float, default=0)
     supporters_count: Mapped[int] = mapped_column(Integer, default=0)
-    category: Mapped[str | None] = mapped_column(String(100))
-    urgency: Mapped[str | None] = mapped_column(String(50))
+    category: Mapped[str | None] = mapped_column(String(100), index=True)
+    urgency: Mapped[str | None] = mapped_column(String(50), index=True)
     location: Mapped[str | None] = mapped_column(String(255))
+    location_lat: Mapped[float | None] = mapped_column(Float, nullable=True)
+    location_lng: Mapped[float | None] = mapped_column(Float, nullable=True)
 
 
 class Event(Base):
@@ -42,7 +46,9 @@ class Event(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     type: Mapped[str] = mapped_column(String(50), default="digital")
     location: Mapped[str | None] = mapped_column(String(255))
-    starts_at: Mapped[dt.datetime | None] = mapped_column(DateTime)
+    location_lat: Mapped[float | None] = mapped_column(Float, nullable=True)
+    location_lng: Mapped[float | None] = mapped_column(Float, nullable=True)
+    starts_at: Mapped[dt.datetime | None] = mapped_column(DateTime, index=True)
     tribe_id: Mapped[int | None] = mapped_column(ForeignKey("tribes.id"))
 
 
@@ -51,8 +57,8 @@ class Donation(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     amount: Mapped[float] = mapped_column(Float, nullable=False)
     donor_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"))
-    cause_id: Mapped[int] = mapped_column(ForeignKey("causes.id"))
-    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    cause_id: Mapped[int] = mapped_column(ForeignKey("causes.id"), index=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, index=True)
 
 
 class ProBonoOffer(Base):
@@ -63,6 +69,37 @@ class ProBonoOffer(Base):
     email: Mapped[str] = mapped_column(String(255), nullable=False)
     skills: Mapped[str] = mapped_column(Text, default="")
     hours: Mapped[int] = mapped_column(Integer, default=0)
+    # where the volunteer is; matching falls back to the location of the cause they offered to
+    location: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    location_lat: Mapped[float | None] = mapped_column(Float, nullable=True)
+    location_lng: Mapped[float | None] = mapped_column(Float, nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+
+class CauseSkillNeed(Base):
+    """A skill a cause asks volunteers for and the hours it needs of it."""
+
+    __tablename__ = "cause_skill_needs"
+    __table_args__ = (UniqueConstraint("cause_id", "skill", name="uq_cause_skill_needs_cause_skill"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    cause_id: Mapped[int] = mapped_column(ForeignKey("causes.id"), index=True)
+    # normalized lookup key; label keeps the display form
+    skill: Mapped[str] = mapped_column(String(100), nullable=False)
+    label: Mapped[str] = mapped_column(String(100), nullable=False)
+    hours: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+
+class ProBonoMatch(Base):
+    """Hours of an offer allocated to a skill need by the last matching run (services/probono.py)."""
+
+    __tablename__ = "pro_bono_matches"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    offer_id: Mapped[int] = mapped_column(ForeignKey("pro_bono_offers.id", ondelete="CASCADE"), index=True)
+    need_id: Mapped[int] = mapped_column(ForeignKey("cause_skill_needs.id", ondelete="CASCADE"), index=True)
+    cause_id: Mapped[int] = mapped_column(ForeignKey("causes.id"), index=True)
+    hours: Mapped[int] = mapped_column(Integer, nullable=False)
+    score: Mapped[float] = mapped_column(Float, default=0)
     created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
 
 
@@ -70,6 +107,7 @@ class UserProfile(Base):
     __tablename__ = "user_profiles"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    # legacy JSON lists; tags now live in profile_tags and these are cleared once migrated
     interests_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     skills_json: Mapped[str | None] = mapped_column(Text, nullable=True)
     location_city: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -90,3 +128,102 @@ class OnboardingSession(Base):
     updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
 
 
+
+
+class OnboardingMessage(Base):
+    """One transcript entry; turns append rows instead of rewriting OnboardingSession.messages_json."""
+
+    __tablename__ = "onboarding_messages"
+    __table_args__ = (UniqueConstraint("session_id", "seq", name="uq_onboarding_messages_session_seq"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    session_id: Mapped[int] = mapped_column(ForeignKey("onboarding_sessions.id"), nullable=False)
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    role: Mapped[str] = mapped_column(String(20), nullable=False)
+    content: Mapped[str] = mapped_column(Text, default="")
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+
+class StripeEvent(Base):
+    """Processed Stripe webhook events; the primary key makes redelivered events no-ops."""
+
+    __tablename__ = "stripe_events"
+    id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    type: Mapped[str] = mapped_column(String(100), nullable=False)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+
+
+class ChangeVersion(Base):
+    """Per-table counter bumped in every transaction that writes the table, so other processes can
+    tell their in-memory copies are stale (see services.changes.poll)."""
+    __tablename__ = "change_versions"
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(100), nullable=False)
+    payload_json: Mapped[str] = mapped_column(Text, default="{}")
+    # queued -> running -> succeeded | queued (retry) | dead
+    status: Mapped[str] = mapped_column(String(20), default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5)
+    run_after: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    # unique while the job is pending so the same work is not queued twice
+    dedupe_key: Mapped[str | None] = mapped_column(String(255), unique=True, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    started_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[dt.datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+class TribeEmbedding(Base):
+    """Precomputed tribe vector per embedder; content_hash tells when the tribe text changed."""
+
+    __tablename__ = "tribe_embeddings"
+    tribe_id: Mapped[int] = mapped_column(ForeignKey("tribes.id", ondelete="CASCADE"), primary_key=True)
+    embedder: Mapped[str] = mapped_column(String(100), primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # float32 little-endian, L2-normalized
+    vector: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
+
+
+class Tag(Base):
+    """One row per distinct interest/skill; `name` is the normalized lookup key."""
+
+    __tablename__ = "tags"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
+    # display form, as first written
+    label: Mapped[str] = mapped_column(String(100), nullable=False)
+
+
+class ProfileTag(Base):
+    __tablename__ = "profile_tags"
+    # the primary key serves profile -> tags, the index serves tag -> profiles
+    __table_args__ = (Index("ix_profile_tags_tag_kind", "tag_id", "kind", "profile_id"),)
+    profile_id: Mapped[int] = mapped_column(ForeignKey("user_profiles.id", ondelete="CASCADE"), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20), primary_key=True)  # "interest" | "skill"
+    tag_id: Mapped[int] = mapped_column(ForeignKey("tags.id"), primary_key=True)
+
+
+class StatsRollup(Base):
+    """Precomputed funding aggregates, maintained by services/rollups.py.
+
+    scope "cause" (key = cause id), "category" (key = category, "" when unset) and "total"
+    summarize causes; scope "day" (key = ISO date) summarizes donation rows.
+    """
+
+    __tablename__ = "stats_rollups"
+    __table_args__ = (Index("ix_stats_rollups_scope_amount", "scope", "amount"),)
+    scope: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    label: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    donations: Mapped[int] = mapped_column(Integer, default=0)
+    amount: Mapped[float] = mapped_column(Float, default=0)
+    causes: Mapped[int] = mapped_column(Integer, default=0)
+    funding_goal: Mapped[float] = mapped_column(Float, default=0)
+    updated_at: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow, onupdate=dt.datetime.utcnow)
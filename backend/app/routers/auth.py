@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from ..db import get_db
+from ..dependencies import CurrentUser, get_current_user
 from .. import models
-from ..security import hash_password, verify_password, create_access_token
+from ..security import create_access_token
+from ..services.passwords import PasswordQueueFull, get_password_hasher
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -12,7 +15,6 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 class RegisterPayload(BaseModel):
     email: EmailStr
     password: str
-    role: str = "member"
 
 
 class LoginPayload(BaseModel):
@@ -20,25 +22,55 @@ class LoginPayload(BaseModel):
     password: str
 
 
-@router.post("/register")
-def register(payload: RegisterPayload, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter_by(email=payload.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    user = models.User(email=payload.email, hashed_password=hash_password(payload.password), role=payload.role)
+def _too_busy() -> HTTPException:
+    return HTTPException(status_code=429, detail="Too many concurrent sign-ins, retry shortly", headers={"Retry-After": "1"})
+
+
+def _create_user(db: Session, payload: RegisterPayload, hashed_password: str) -> models.User:
+    # self-registration only ever creates members; admins are granted with `python -m app.admin`
+    user = models.User(email=payload.email, hashed_password=hashed_password, role="member")
     db.add(user)
     db.commit()
     db.refresh(user)
+    return user
+
+
+def _update_hash(db: Session, user: models.User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+
+
+@router.post("/register")
+async def register(payload: RegisterPayload, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(lambda: db.query(models.User).filter_by(email=payload.email).first())
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        hashed_password = await get_password_hasher().hash(payload.password)
+    except PasswordQueueFull:
+        raise _too_busy()
+    user = await run_in_threadpool(_create_user, db, payload, hashed_password)
     token = create_access_token(str(user.id))
     return {"access_token": token, "token_type": "bearer"}
 
 
 @router.post("/login")
-def login(payload: LoginPayload, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter_by(email=payload.email).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+async def login(payload: LoginPayload, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(lambda: db.query(models.User).filter_by(email=payload.email).first())
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        valid, new_hash = await get_password_hasher().verify_and_update(payload.password, user.hashed_password)
+    except PasswordQueueFull:
+        raise _too_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        await run_in_threadpool(_update_hash, db, user, new_hash)
     token = create_access_token(str(user.id))
     return {"access_token": token, "token_type": "bearer"}
 
 
+@router.get("/me")
+def me(user: CurrentUser = Depends(get_current_user)):
+    return {"id": user.id, "email": user.email, "role": user.role, "status_tier": user.status_tier}
@@ -0,0 +1,73 @@
+import io
+import json
+import tempfile
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from ..db import SessionLocal
+from ..dependencies import CurrentUser, require_admin
+from ..services.bulk import DEFAULT_CHUNK_SIZE, MEDIA_TYPES, export_rows, iter_import, read_rows
+
+router = APIRouter(prefix="/bulk", tags=["bulk"])
+
+BulkKindName = Literal["tribes", "causes", "pro_bono_offers"]
+BulkFormat = Literal["csv", "ndjson"]
+
+# Uploads larger than this are spooled to a temporary file instead of memory
+_SPOOL_BYTES = 8 * 1024 * 1024
+
+
+def _format(requested: Optional[str], content_type: str) -> str:
+    if requested:
+        return requested
+    return "ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv"
+
+
+@router.post("/{kind}/import", response_class=StreamingResponse, responses={200: {"content": {"application/x-ndjson": {}}}})
+async def import_rows(
+    kind: BulkKindName,
+    request: Request,
+    format: Optional[BulkFormat] = Query(None, description="defaults from Content-Type, else csv"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10000),
+    _admin: CurrentUser = Depends(require_admin),
+):
+    """Import a raw CSV/NDJSON body; the response streams one progress report per committed chunk.
+
+    The last line has `done: true` and the first row errors.
+    """
+    fmt = _format(format, request.headers.get("content-type", ""))
+    upload = tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES)
+    async for chunk in request.stream():
+        upload.write(chunk)
+    upload.seek(0)
+
+    def progress():
+        db = SessionLocal()
+        try:
+            with io.TextIOWrapper(upload, encoding="utf-8-sig", newline="") as lines:
+                for report in iter_import(db, kind, read_rows(lines, fmt), chunk_size):
+                    yield json.dumps(report.to_dict()) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(progress(), media_type=MEDIA_TYPES["ndjson"])
+
+
+@router.get("/{kind}/export", response_class=StreamingResponse)
+def export(
+    kind: BulkKindName,
+    format: BulkFormat = Query("csv"),
+    _admin: CurrentUser = Depends(require_admin),
+):
+    def replica_session():
+        db = SessionLocal()
+        db.info["use_replica"] = True
+        return db
+
+    return StreamingResponse(
+        export_rows(replica_session, kind, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'},
+    )
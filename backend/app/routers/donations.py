@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-import stripe
 from ..core.config import get_settings
 from ..db import get_db
 from .. import models, schemas
+from ..services.metrics import outbound
 
 router = APIRouter(prefix="/donations", tags=["donations"])
 
@@ -18,23 +18,26 @@ def create_checkout_session(payload: schemas.DonationCreate, db: Session = Depen
     if not cause:
         raise HTTPException(status_code=404, detail="Cause not found")
 
+    import stripe  # loaded on first use; see app.features.warm_up
+
     stripe.api_key = settings.stripe_api_key
-    session = stripe.checkout.Session.create(
-        mode="payment",
-        line_items=[
-            {
-                "price_data": {
-                    "currency": "usd",
-                    "product_data": {"name": f"Donation to {cause.name}"},
-                    "unit_amount": int(payload.amount * 100),
-                },
-                "quantity": 1,
-            }
-        ],
-        success_url="http://localhost:5173/?payment=success",
-        cancel_url="http://localhost:5173/?payment=cancel",
-        metadata={"cause_id": str(cause.id)},
-    )
+    with outbound("stripe", "checkout_session_create"):
+        session = stripe.checkout.Session.create(
+            mode="payment",
+            line_items=[
+                {
+                    "price_data": {
+                        "currency": "usd",
+                        "product_data": {"name": f"Donation to {cause.name}"},
+                        "unit_amount": int(payload.amount * 100),
+                    },
+                    "quantity": 1,
+                }
+            ],
+            success_url="http://localhost:5173/?payment=success",
+            cancel_url="http://localhost:5173/?payment=cancel",
+            metadata={"cause_id": str(cause.id)},
+        )
     return {"id": session.id, "url": session.url}
 
 
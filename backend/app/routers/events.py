@@ -0,0 +1,61 @@
+import datetime as dt
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import get_async_db
+from ..dependencies import CurrentUser, get_current_user
+from .. import models, schemas
+from ..services import tags
+from ..services.events import FeedQuery, event_index, profile_query
+from ..services.geo import tribe_geo
+from ..services.tribe_index import tribe_index
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+def _feed_query(db: Session, user_id: int) -> Optional[tuple[int, FeedQuery]]:
+    profile = db.query(models.UserProfile).filter_by(user_id=user_id).first()
+    if profile is None:
+        return None
+    if profile.interests_json is not None or profile.skills_json is not None:
+        tags.migrate_profile(db, profile)
+        db.commit()
+    # no-ops once loaded; afterwards change notifications keep the indexes current
+    tribe_index.ensure_loaded(db)
+    tribe_geo.ensure_loaded(db)
+    event_index.ensure_loaded(db)
+    return profile.id, profile_query(db, profile)
+
+
+@router.get("/recommended", response_model=List[schemas.RecommendedEventOut])
+async def recommended_events(
+    days: int = Query(30, ge=1, le=365),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(get_current_user),
+):
+    """Upcoming events for the user's saved profile, soonest first: events of their best-matching
+    tribes, events named after their interests and events in or near their location."""
+    found = await db.run_sync(_feed_query, user.id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Profile not found; complete onboarding first")
+    profile_id, query = found
+    until = dt.datetime.utcnow() + dt.timedelta(days=days)
+    return [
+        schemas.RecommendedEventOut(
+            id=event.id,
+            name=event.name,
+            type=event.type,
+            location=event.location,
+            location_lat=event.location_lat,
+            location_lng=event.location_lng,
+            starts_at=event.starts_at,
+            tribe_id=event.tribe_id,
+            score=round(score, 3),
+            reasons=list(reasons),
+        )
+        for event, score, reasons in event_index.feed(profile_id, query, until=until, limit=limit)
+    ]
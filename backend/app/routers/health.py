@@ -1,4 +1,11 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..dependencies import user_cache
+from ..services import metrics, ratelimit, response_cache, singleflight
+from ..services.ai import get_rerank_cache
+from ..services.jobs import job_queue
+from ..services.tokens import get_token_cache
 
 router = APIRouter()
 
@@ -8,3 +15,63 @@ def health_check():
     return {"status": "ok"}
 
 
+
+@router.get("/health/jobs")
+def job_stats():
+    return job_queue.stats()
+
+
+@router.get("/health/ratelimit")
+def ratelimit_stats():
+    return {"limiters": ratelimit.stats(), "coalescing": singleflight.stats()}
+
+
+@router.get("/health/auth")
+def auth_stats():
+    return {"tokens": get_token_cache().stats(), "users": user_cache.stats.as_dict()}
+
+
+def _cache_lines() -> list:
+    caches = {name: cache.stats for name, cache in response_cache.registered().items()}
+    caches["users"] = user_cache.stats
+    if get_rerank_cache.cache_info().currsize:  # don't open the cache just to report on it
+        caches["ai_rerank"] = get_rerank_cache().stats
+    lines = []
+    for counter in ("hits", "misses", "evictions"):
+        lines += metrics.sample_lines(
+            f"cache_{counter}_total", f"Cache {counter}.",
+            [({"cache": name}, getattr(stats, counter)) for name, stats in caches.items()],
+        )
+    tokens = get_token_cache().stats()
+    lines += metrics.sample_lines("token_cache_entries", "Verified access tokens held.", [({}, tokens["entries"])], "gauge")
+    for counter in ("hits", "misses", "rejected"):
+        lines += metrics.sample_lines(f"token_cache_{counter}_total", f"Token cache {counter}.", [({}, tokens[counter])])
+    lines += metrics.sample_lines(
+        "token_verify_seconds_total", "Time spent verifying token signatures.", [({}, tokens["verify_seconds_total"])]
+    )
+    return lines
+
+
+def _job_lines() -> list:
+    stats = job_queue.stats()
+    lines = metrics.sample_lines(
+        "jobs_total", "Job outcomes per kind.",
+        [({"kind": kind, "outcome": outcome}, s[outcome])
+         for kind, s in stats.items() for outcome in ("enqueued", "succeeded", "retried", "dead")],
+    )
+    for name in ("wait_seconds", "run_seconds"):
+        # recent-sample quantiles as kept by the queue, not a full-history summary
+        lines += metrics.sample_lines(
+            f"job_{name}", f"Job {name.replace('_', ' ')} over recent runs.",
+            [({"kind": kind, "quantile": q}, s[name][key])
+             for kind, s in stats.items() if s[name]["count"] for q, key in (("0.5", "p50"), ("0.99", "p99"))],
+            "gauge",
+        )
+    return lines
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition; request/SQL/outbound histograms only with METRICS_ENABLED."""
+    lines = metrics.render() + _cache_lines() + _job_lines() + ratelimit.metric_lines() + singleflight.metric_lines()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import AsyncSessionLocal, get_async_db
+from ..dependencies import CurrentUser, get_optional_user, resolve_user_id
 from .. import models
-from ..services.ai import rerank_tribes_with_ai
+from ..services.ai import is_ai_enabled, rerank_or_schedule, rerank_tribes_with_ai
+from ..services.tribe_index import tribe_index
+from ..services.geo import tribe_geo
+from ..services.embeddings import tribe_embeddings
+from ..services.batch_scoring import batch_scorer
 from .. import models, schemas
+import hashlib
 import json
 from ..core.config import get_settings
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None  # type: ignore
+from ..services.llm import get_llm_client
+from ..services.streaming import JSONStringFieldStreamer, sse_event
+from ..services import ratelimit, tags, transcripts
+from ..services.singleflight import single_flight
+from ..services.jobs import job_queue
 
 router = APIRouter(prefix="/onboarding", tags=["onboarding"])
 
@@ -20,6 +30,14 @@ class OnboardingRequest(BaseModel):
     interests: List[str]
     skills: List[str]
     location: List[str]
+    location_lat: Optional[float] = Field(None, ge=-90, le=90)
+    location_lng: Optional[float] = Field(None, ge=-180, le=180)
+
+    @property
+    def near(self) -> Optional[tuple]:
+        if self.location_lat is None or self.location_lng is None:
+            return None
+        return self.location_lat, self.location_lng
 
 
 class OnboardingSuggestion(BaseModel):
@@ -31,49 +49,88 @@ class OnboardingSuggestion(BaseModel):
     explanation: Optional[str] = None
 
 
+def _load_indexes(db: Session) -> None:
+    # no-ops once loaded; afterwards change notifications keep the indexes current
+    tribe_index.ensure_loaded(db)
+    tribe_geo.ensure_loaded(db)
+    if is_ai_enabled():
+        tribe_embeddings.ensure_loaded(db)
+
+
+def _merge_shortlist(payload: OnboardingRequest, ranked, semantic, size: int):
+    """Heuristic top 5 plus the best of both rankings by reciprocal rank fusion, `size` in total."""
+    fused = {}
+    for ranking in ([t.id for t, _ in ranked], [tribe_id for tribe_id, _ in semantic]):
+        for rank, tribe_id in enumerate(ranking):
+            fused[tribe_id] = fused.get(tribe_id, 0.0) + 1.0 / (60 + rank)
+    keep = [t.id for t, _ in ranked[:5]]
+    for tribe_id in sorted(fused, key=lambda i: (-fused[i], i)):
+        if len(keep) >= size:
+            break
+        if tribe_id not in keep:
+            keep.append(tribe_id)
+    known = {t.id: (t, score) for t, score in ranked}
+    missing = [i for i in keep if i not in known]
+    if missing:
+        scores = tribe_index.scores(payload.interests, payload.skills, payload.location, payload.near)
+        for tribe_id in missing:
+            doc = tribe_index.get(tribe_id)
+            if doc is not None:
+                known[tribe_id] = (doc, scores.get(tribe_id, 0.0))
+    return [known[i] for i in keep if i in known]
+
+
+suggest_flight = single_flight("suggest_tribes")
+
+
+def _suggest_key(payload: OnboardingRequest) -> str:
+    # exact payload: term order feeds the embedding text, so "similar" profiles may rank differently
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
 @router.post("/suggest-tribes", response_model=List[OnboardingSuggestion])
-def suggest_tribes(payload: OnboardingRequest, db: Session = Depends(get_db)):
-    tribes = db.query(models.Tribe).all()
-
-    def normalize(text: str) -> str:
-        return (text or "").lower()
-
-    interests = {i.lower() for i in payload.interests}
-    skills = {s.lower() for s in payload.skills}
-    locations = {l.lower() for l in payload.location}
-
-    suggestions: list[OnboardingSuggestion] = []
-    for t in tribes:
-        name = normalize(t.name)
-        desc = normalize(t.description)
-        loc = normalize(t.location or "")
-        score = 0.0
-
-        # simple matching heuristic
-        for i in interests:
-            if i in name or i in desc:
-                score += 2.0
-        for s in skills:
-            if s in desc or s in name:
-                score += 1.5
-        for l in locations:
-            if l and l in loc:
-                score += 1.0
-
-        suggestions.append(
-            OnboardingSuggestion(
-                id=t.id,
-                name=t.name,
-                description=t.description,
-                location=t.location,
-                score=score,
-                explanation=None,
-            )
-        )
+async def suggest_tribes(
+    payload: OnboardingRequest,
+    request: Request,
+    user: Optional[CurrentUser] = Depends(get_optional_user),
+):
+    await ratelimit.enforce("suggest", request, user.id if user else None)
+    # a reloading client or a burst of identical profiles shares one computation (and one LLM call)
+    return await suggest_flight.do(_suggest_key(payload), lambda: _suggest(payload))
+
+
+async def _suggest(payload: OnboardingRequest) -> List[OnboardingSuggestion]:
+    # only the re-rank pool is materialized; everything else never leaves the index
+    settings = get_settings()
+    pool = settings.ai_rerank_pool if is_ai_enabled() else 5
+    # its own session: the computation may outlive the request that started it
+    async with AsyncSessionLocal() as db:
+        await db.run_sync(_load_indexes)
+    # index lookups take microseconds per term, cheaper than a threadpool hop
+    ranked = tribe_index.top_k(payload.interests, payload.skills, payload.location, k=max(pool, 5), near=payload.near)
+    if is_ai_enabled():
+        # the LLM only sees a short list: heuristic matches fused with embedding neighbours
+        semantic = await tribe_embeddings.shortlist(payload.interests, payload.skills, payload.location, k=pool)
+        ranked = _merge_shortlist(payload, ranked, semantic, max(settings.ai_rerank_shortlist, 5))
+    as_dicts = [
+        OnboardingSuggestion(
+            id=t.id,
+            name=t.name,
+            description=t.description,
+            location=t.location,
+            score=score,
+            explanation=None,
+        ).model_dump()
+        for t, score in ranked
+    ]
 
     # AI re-rank when configured
-    as_dicts = [s.model_dump() for s in suggestions]
-    reranked = rerank_tribes_with_ai(as_dicts, payload.interests, payload.skills, payload.location)
+    if is_ai_enabled() and settings.ai_rerank_mode == "background":
+        reranked = await run_in_threadpool(
+            rerank_or_schedule, as_dicts, payload.interests, payload.skills, payload.location
+        )
+    else:
+        reranked = await rerank_tribes_with_ai(as_dicts, payload.interests, payload.skills, payload.location)
     # sort and return top 5
     reranked.sort(key=lambda x: float(x.get("score", 0.0)), reverse=True)
     top = reranked[:5]
@@ -81,8 +138,43 @@ def suggest_tribes(payload: OnboardingRequest, db: Session = Depends(get_db)):
     return [OnboardingSuggestion(**t) for t in top]
 
 
+class OnboardingBatchRequest(BaseModel):
+    profiles: List[OnboardingRequest] = Field(..., max_length=1000)
+    top_k: int = Field(5, ge=1, le=50)
+
+
+@router.post("/suggest-tribes/batch", response_model=List[List[OnboardingSuggestion]])
+async def suggest_tribes_batch(payload: OnboardingBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    # heuristic scores only; AI re-ranking stays on the single-profile endpoint
+    await db.run_sync(_load_indexes)
+    # a large batch is real CPU work; keep it off the event loop
+    ranked = await run_in_threadpool(
+        batch_scorer.top_k,
+        [(p.interests, p.skills, p.location) for p in payload.profiles],
+        k=payload.top_k,
+        near=[p.near for p in payload.profiles],
+    )
+    return [
+        [
+            OnboardingSuggestion(id=t.id, name=t.name, description=t.description, location=t.location, score=score)
+            for t, score in row
+        ]
+        for row in ranked
+    ]
+
+
 @router.post("/save-profile", response_model=schemas.UserProfileOut)
-def save_profile(payload: schemas.UserProfileIn, db: Session = Depends(get_db)):
+async def save_profile(
+    payload: schemas.UserProfileIn,
+    db: AsyncSession = Depends(get_async_db),
+    user: Optional[CurrentUser] = Depends(get_optional_user),
+):
+    payload.user_id = resolve_user_id(payload.user_id, user)
+    # the tag service is written against the sync Session API; run_sync drives it on the async connection
+    return await db.run_sync(_save_profile, payload)
+
+
+def _save_profile(db: Session, payload: schemas.UserProfileIn) -> schemas.UserProfileOut:
     # simple upsert by user_id when provided; otherwise create anonymous profile
     profile: models.UserProfile | None = None
     if payload.user_id:
@@ -91,20 +183,24 @@ def save_profile(payload: schemas.UserProfileIn, db: Session = Depends(get_db)):
         profile = models.UserProfile(user_id=payload.user_id)
         db.add(profile)
 
-    profile.interests_json = json.dumps(payload.interests or [])
-    profile.skills_json = json.dumps(payload.skills or [])
     profile.location_city = payload.location_city
     profile.location_country = payload.location_country
     profile.location_lat = payload.location_lat
     profile.location_lng = payload.location_lng
+    db.flush()
+    # the request carries the full lists, so legacy JSON lists are superseded rather than merged
+    profile.interests_json = profile.skills_json = None
+    tags.set_profile_tags(db, profile.id, "interest", payload.interests or [])
+    tags.set_profile_tags(db, profile.id, "skill", payload.skills or [])
     db.commit()
     db.refresh(profile)
+    stored = tags.profile_tags(db, [profile.id])[profile.id]
 
     return schemas.UserProfileOut(
         id=profile.id,
         user_id=profile.user_id,
-        interests=json.loads(profile.interests_json or "[]"),
-        skills=json.loads(profile.skills_json or "[]"),
+        interests=stored["interest"],
+        skills=stored["skill"],
         location_city=profile.location_city,
         location_country=profile.location_country,
         location_lat=profile.location_lat,
@@ -126,83 +222,154 @@ class ChatPayload(BaseModel):
 
 
 @router.post("/chat")
-def chat(payload: ChatPayload, db: Session = Depends(get_db)):
+async def chat(
+    payload: ChatPayload,
+    db: AsyncSession = Depends(get_async_db),
+    user: Optional[CurrentUser] = Depends(get_optional_user),
+):
+    payload.user_id = resolve_user_id(payload.user_id, user)
     # persist messages to session for auditability
-    session = db.query(models.OnboardingSession).filter_by(session_id=payload.session_id).first()
-    if not session:
-        session = models.OnboardingSession(session_id=payload.session_id, user_id=payload.user_id)
-        db.add(session)
-    session.messages_json = json.dumps([m.model_dump() for m in payload.messages])
-    db.commit()
+    await db.run_sync(_append_chat, payload)
     return {"ok": True}
 
 
+def _append_chat(db: Session, payload: ChatPayload) -> None:
+    session = transcripts.get_or_create_session(db, payload.session_id, payload.user_id)
+    transcripts.append_messages(db, session, [m.model_dump() for m in payload.messages])
+    db.commit()
+
+
+@router.get("/sessions/{session_id}/messages", response_model=schemas.TranscriptPage)
+async def get_transcript(
+    session_id: str,
+    after_seq: int = Query(-1, ge=-1),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+):
+    rows = await db.run_sync(_read_transcript, session_id, after_seq, limit)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return schemas.TranscriptPage(
+        session_id=session_id,
+        messages=rows,
+        next_after_seq=rows[-1].seq if len(rows) == limit else None,
+    )
+
+
+def _read_transcript(db: Session, session_id: str, after_seq: int, limit: int):
+    session = db.query(models.OnboardingSession).filter_by(session_id=session_id).first()
+    if not session:
+        return None
+    if session.messages_json not in (None, "", "[]"):
+        transcripts.migrate_session(db, session)
+        db.commit()
+    return transcripts.read_messages(db, session, after_seq, limit)
+
+
 class AIChatPayload(BaseModel):
     session_id: str
     user_id: int | None = None
     messages: List[ChatMessage]
 
 
-@router.post("/ai-chat")
-def ai_chat(payload: AIChatPayload, db: Session = Depends(get_db)):
-    settings = get_settings()
-    if not settings.openai_api_key or OpenAI is None:
-        last_user = next((m.content for m in reversed(payload.messages) if m.role == "user"), "")
-        assistant = f"Thanks! Tell me more: {last_user}" if last_user else "Thanks! What causes do you care about?"
-        return {"reply": assistant, "profile_delta": {"interests": [], "skills": []}}
-
-    client = OpenAI(api_key=settings.openai_api_key)
-    system = (
-        "You are a warm, concise onboarding guide. Carry a short, engaging conversation to collect: "
-        "interests (tags), skills (tags), and location (city and country). Always keep replies under 2 sentences. "
-        "Respond with a valid JSON object ONLY, with keys: reply (string), profile_delta (object with keys: interests (array of strings), skills (array of strings), location_city (string|optional), location_country (string|optional)). "
-        "Do not add any extra keys. If you are unsure, leave fields empty or omit them."
+AI_CHAT_SYSTEM_PROMPT = (
+    "You are a warm, concise onboarding guide. Carry a short, engaging conversation to collect: "
+    "interests (tags), skills (tags), and location (city and country). Always keep replies under 2 sentences. "
+    "Respond with a valid JSON object ONLY, with keys: reply (string), profile_delta (object with keys: interests (array of strings), skills (array of strings), location_city (string|optional), location_country (string|optional)). "
+    "Do not add any extra keys. If you are unsure, leave fields empty or omit them."
+)
+
+
+async def _schedule_persist(payload: AIChatPayload, reply: str, profile_delta: dict) -> None:
+    # transcript append and profile merge happen in a background job, off the request path
+    await run_in_threadpool(
+        job_queue.enqueue,
+        "onboarding.persist_turn",
+        {
+            "session_id": payload.session_id,
+            "user_id": payload.user_id,
+            "messages": [m.model_dump() for m in payload.messages],
+            "reply": reply,
+            "profile_delta": profile_delta,
+        },
     )
+
+
+def _canned_reply(payload: AIChatPayload) -> str:
+    last_user = next((m.content for m in reversed(payload.messages) if m.role == "user"), "")
+    return f"Thanks! Tell me more: {last_user}" if last_user else "Thanks! What causes do you care about?"
+
+
+@router.post("/ai-chat")
+async def ai_chat(payload: AIChatPayload, request: Request, user: Optional[CurrentUser] = Depends(get_optional_user)):
+    payload.user_id = resolve_user_id(payload.user_id, user)
+    # keyed on the verified identity: payload.user_id may be client-chosen (ALLOW_UNAUTHENTICATED_USER_ID)
+    await ratelimit.enforce("ai_chat", request, user.id if user else None, payload.session_id)
+    client = get_llm_client()
+    if client is None:
+        return {"reply": _canned_reply(payload), "profile_delta": {"interests": [], "skills": []}}
+
     msgs = [{"role": m.role, "content": m.content} for m in payload.messages]
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": system}, *msgs],
+        content = await client.chat_completion(
+            messages=[{"role": "system", "content": AI_CHAT_SYSTEM_PROMPT}, *msgs],
             temperature=0.3,
             response_format={"type": "json_object"},
         )
-        content = completion.choices[0].message.content or "{}"
-        data = json.loads(content)
+        data = json.loads(content or "{}")
         reply = data.get("reply") or "Thanks!"
         profile_delta = data.get("profile_delta") or {}
     except Exception:
         reply = "Thanks! What causes do you care about?"
         profile_delta = {}
 
-    session = db.query(models.OnboardingSession).filter_by(session_id=payload.session_id).first()
-    if not session:
-        session = models.OnboardingSession(session_id=payload.session_id, user_id=payload.user_id)
-        db.add(session)
-    session.messages_json = json.dumps([
-        {"role": m.role, "content": m.content} for m in payload.messages
-    ] + [{"role": "assistant", "content": reply}])
-    db.commit()
-
-    if payload.user_id:
-        profile = db.query(models.UserProfile).filter_by(user_id=payload.user_id).first()
-        if not profile:
-            profile = models.UserProfile(user_id=payload.user_id)
-            db.add(profile)
-        try:
-            cur_interests = json.loads(profile.interests_json or "[]")
-            cur_skills = json.loads(profile.skills_json or "[]")
-        except Exception:
-            cur_interests, cur_skills = [], []
-        new_interests = sorted(set(cur_interests + list(profile_delta.get("interests", []))))
-        new_skills = sorted(set(cur_skills + list(profile_delta.get("skills", []))))
-        profile.interests_json = json.dumps(new_interests)
-        profile.skills_json = json.dumps(new_skills)
-        if profile_delta.get("location_city"):
-            profile.location_city = profile_delta.get("location_city")
-        if profile_delta.get("location_country"):
-            profile.location_country = profile_delta.get("location_country")
-        db.commit()
-
+    await _schedule_persist(payload, reply, profile_delta)
     return {"reply": reply, "profile_delta": profile_delta}
 
 
+async def _stream_ai_chat(payload: AIChatPayload):
+    client = get_llm_client()
+    if client is None:
+        # offline: stream the canned reply word by word; nothing is persisted, like /ai-chat
+        words = _canned_reply(payload).split(" ")
+        for i, word in enumerate(words):
+            yield sse_event("token", {"text": word if i == 0 else " " + word})
+        yield sse_event("done", {"reply": " ".join(words), "profile_delta": {"interests": [], "skills": []}})
+        return
+
+    msgs = [{"role": m.role, "content": m.content} for m in payload.messages]
+    streamer = JSONStringFieldStreamer("reply")
+    sent = ""
+    try:
+        async for delta in client.stream_chat_completion(
+            messages=[{"role": "system", "content": AI_CHAT_SYSTEM_PROMPT}, *msgs],
+            temperature=0.3,
+            response_format={"type": "json_object"},
+        ):
+            text = streamer.feed(delta)
+            if text:
+                sent += text
+                yield sse_event("token", {"text": text})
+        data = json.loads(streamer.text or "{}")
+        reply = data.get("reply") or "Thanks!"
+        profile_delta = data.get("profile_delta") or {}
+    except Exception:
+        reply = sent or "Thanks! What causes do you care about?"
+        profile_delta = {}
+    if not sent:
+        yield sse_event("token", {"text": reply})
+
+    await _schedule_persist(payload, reply, profile_delta)
+    yield sse_event("done", {"reply": reply, "profile_delta": profile_delta})
+
+
+@router.post("/ai-chat/stream")
+async def ai_chat_stream(payload: AIChatPayload, request: Request, user: Optional[CurrentUser] = Depends(get_optional_user)):
+    """Server-Sent Events variant of /ai-chat: `token` events with reply text, then one `done` event."""
+    payload.user_id = resolve_user_id(payload.user_id, user)
+    await ratelimit.enforce("ai_chat", request, user.id if user else None, payload.session_id)
+    return StreamingResponse(
+        _stream_ai_chat(payload),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,21 @@
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import get_async_db
+from ..dependencies import CurrentUser, require_admin
 from .. import models, schemas
+from ..services import probono
 
 router = APIRouter(prefix="/probono", tags=["probono"])
 
 
 @router.post("/offers", response_model=schemas.ProBonoOfferOut)
-def create_offer(payload: schemas.ProBonoOfferCreate, db: Session = Depends(get_db)):
-    cause = db.query(models.Cause).get(payload.cause_id)
+async def create_offer(payload: schemas.ProBonoOfferCreate, db: AsyncSession = Depends(get_async_db)):
+    cause = await db.get(models.Cause, payload.cause_id)
     if not cause:
         raise HTTPException(status_code=404, detail="Cause not found")
     offer = models.ProBonoOffer(
@@ -17,10 +24,87 @@ def create_offer(payload: schemas.ProBonoOfferCreate, db: Session = Depends(get_
         email=payload.email,
         skills=payload.skills,
         hours=payload.hours,
+        location=payload.location,
+        location_lat=payload.location_lat,
+        location_lng=payload.location_lng,
     )
     db.add(offer)
-    db.commit()
-    db.refresh(offer)
+    await db.commit()
+    await db.refresh(offer)
     return offer
 
 
+async def _needs_out(db: AsyncSession, cause_id: int) -> List[schemas.SkillNeedOut]:
+    n, m = models.CauseSkillNeed, models.ProBonoMatch
+    matched = (
+        select(m.need_id, func.sum(m.hours).label("hours"))
+        .where(m.cause_id == cause_id)
+        .group_by(m.need_id)
+        .subquery()
+    )
+    rows = await db.execute(
+        select(n.id, n.label, n.hours, func.coalesce(matched.c.hours, 0))
+        .outerjoin(matched, matched.c.need_id == n.id)
+        .where(n.cause_id == cause_id)
+        .order_by(n.skill)
+    )
+    return [
+        schemas.SkillNeedOut(id=need_id, skill=label, hours=hours, hours_matched=done)
+        for need_id, label, hours, done in rows.all()
+    ]
+
+
+@router.get("/causes/{cause_id}/needs", response_model=List[schemas.SkillNeedOut])
+async def get_needs(cause_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Skills a cause is looking for, with the hours the last matching run found for each."""
+    if not await db.get(models.Cause, cause_id):
+        raise HTTPException(status_code=404, detail="Cause not found")
+    return await _needs_out(db, cause_id)
+
+
+def _set_needs(db: Session, cause_id: int, needs: List[schemas.SkillNeedIn]) -> None:
+    probono.set_needs(db, cause_id, [(need.skill, need.hours) for need in needs])
+    db.commit()
+
+
+@router.put("/causes/{cause_id}/needs", response_model=List[schemas.SkillNeedOut])
+async def put_needs(
+    cause_id: int,
+    payload: List[schemas.SkillNeedIn],
+    db: AsyncSession = Depends(get_async_db),
+    _admin: CurrentUser = Depends(require_admin),
+):
+    """Replace a cause's skill needs; a matching run is queued to allocate volunteers to them."""
+    if not await db.get(models.Cause, cause_id):
+        raise HTTPException(status_code=404, detail="Cause not found")
+    await db.run_sync(_set_needs, cause_id, payload)
+    await run_in_threadpool(probono.schedule_match)
+    return await _needs_out(db, cause_id)
+
+
+@router.get("/causes/{cause_id}/matches", response_model=List[schemas.ProBonoMatchOut])
+async def get_matches(
+    cause_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    _admin: CurrentUser = Depends(require_admin),
+):
+    """Volunteers allocated to a cause's needs by the last matching run, best match first."""
+    m, n, o = models.ProBonoMatch, models.CauseSkillNeed, models.ProBonoOffer
+    rows = await db.execute(
+        select(m.offer_id, m.need_id, n.label, o.name, o.email, m.hours, m.score)
+        .join(n, n.id == m.need_id)
+        .join(o, o.id == m.offer_id)
+        .where(m.cause_id == cause_id)
+        .order_by(n.skill, m.score.desc(), m.offer_id)
+    )
+    return [
+        schemas.ProBonoMatchOut(offer_id=offer_id, need_id=need_id, skill=label, name=name, email=email, hours=hours, score=score)
+        for offer_id, need_id, label, name, email, hours, score in rows.all()
+    ]
+
+
+@router.post("/match", response_model=schemas.MatchRunOut, status_code=202)
+async def run_match(_admin: CurrentUser = Depends(require_admin)):
+    """Queue a matching run over every offer and need; a run already pending absorbs this one."""
+    job_id = await run_in_threadpool(probono.schedule_match)
+    return schemas.MatchRunOut(queued=job_id is not None, job_id=job_id)
@@ -1,35 +1,222 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import datetime as dt
 
-from ..db import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_async_db, get_async_read_db
 from .. import models, schemas
 from ..core.config import get_settings
+from ..services import changes, rollups
+from ..services.geo import cause_geo, event_geo, tribe_geo
+from ..services.search import SEARCH_FIELDS, search_service
+from ..services.response_cache import ResponseCache, conditional_response
 
 router = APIRouter(prefix="/public", tags=["public"])
 
+# Entries are built from the primary: right after an invalidation a lagging replica would hand back
+# the old rows, which would then be served under a fresh ETag until the TTL ran out.
+catalog_cache = ResponseCache("public_catalog", ttl_seconds=get_settings().public_cache_ttl_seconds)
+changes.subscribe(models.Tribe, lambda _changed: catalog_cache.invalidate("tribes"))
+changes.subscribe(models.Cause, lambda _changed: catalog_cache.invalidate("causes"))
+changes.subscribe(models.StatsRollup, lambda _changed: catalog_cache.invalidate("stats"))
+
+_tribes_adapter = TypeAdapter(list[schemas.TribeOut])
+_causes_adapter = TypeAdapter(list[schemas.CauseOut])
+
+
+async def _page(db: AsyncSession, request: Request, query, model, cursor: int | None, limit: int, adapter: TypeAdapter):
+    """Keyset page ordered by id; the next cursor is exposed via X-Next-Cursor and Link headers."""
+    if cursor is not None:
+        query = query.where(model.id > cursor)
+    rows = (await db.scalars(query.order_by(model.id).limit(limit))).all()
+    headers = {}
+    if len(rows) == limit:
+        next_cursor = str(rows[-1].id)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = '<%s>; rel="next"' % request.url.include_query_params(cursor=next_cursor)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True)), headers
+
 
 @router.get("/tribes", response_model=list[schemas.TribeOut])
-def list_tribes(db: Session = Depends(get_db)):
-    return db.query(models.Tribe).limit(50).all()
+async def list_tribes(
+    request: Request,
+    cursor: int | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    location: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    async def build():
+        query = select(models.Tribe)
+        if location:
+            query = query.where(models.Tribe.location.ilike(f"%{location}%"))
+        return await _page(db, request, query, models.Tribe, cursor, limit, _tribes_adapter)
+
+    entry = await catalog_cache.get_or_build_async("tribes", (cursor, limit, location), build)
+    return conditional_response(request, entry, max_age=get_settings().public_cache_max_age)
 
 
 @router.get("/causes", response_model=list[schemas.CauseOut])
-def list_causes(db: Session = Depends(get_db)):
-    return db.query(models.Cause).limit(50).all()
+async def list_causes(
+    request: Request,
+    cursor: int | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    category: str | None = None,
+    urgency: str | None = None,
+    location: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    async def build():
+        query = select(models.Cause)
+        if category:
+            query = query.where(models.Cause.category == category)
+        if urgency:
+            query = query.where(models.Cause.urgency == urgency)
+        if location:
+            query = query.where(models.Cause.location.ilike(f"%{location}%"))
+        return await _page(db, request, query, models.Cause, cursor, limit, _causes_adapter)
+
+    entry = await catalog_cache.get_or_build_async("causes", (cursor, limit, category, urgency, location), build)
+    return conditional_response(request, entry, max_age=get_settings().public_cache_max_age)
 
 
 @router.get("/causes/{cause_id}", response_model=schemas.CauseOut)
-def get_cause(cause_id: int, db: Session = Depends(get_db)):
-    cause = db.query(models.Cause).get(cause_id)
+async def get_cause(cause_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    cause = await db.get(models.Cause, cause_id)
     if not cause:
         raise HTTPException(status_code=404, detail="Cause not found")
     return cause
 
 
+_GEO_KINDS = {
+    "tribe": (models.Tribe, tribe_geo),
+    "cause": (models.Cause, cause_geo),
+    "event": (models.Event, event_geo),
+}
+
+
+@router.get("/nearby", response_model=list[schemas.NearbyOut])
+async def nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    kind: str = Query("tribe", pattern="^(tribe|cause|event)$"),
+    k: int = Query(10, ge=1, le=100),
+    radius_km: float | None = Query(None, gt=0),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Nearest tribes, causes or events to a point, optionally limited to `radius_km`."""
+    model, index = _GEO_KINDS[kind]
+    await db.run_sync(index.ensure_loaded)
+    hits = index.nearest(lat, lng, k, max_km=radius_km)
+    rows = {row.id: row for row in (await db.scalars(select(model).where(model.id.in_([pk for pk, _ in hits])))).all()}
+    return [
+        schemas.NearbyOut(
+            kind=kind,
+            id=pk,
+            name=rows[pk].name,
+            location=rows[pk].location,
+            location_lat=rows[pk].location_lat,
+            location_lng=rows[pk].location_lng,
+            distance_km=round(km, 3),
+        )
+        for pk, km in hits
+        if pk in rows
+    ]
+
+
+@router.get("/search", response_model=list[schemas.SearchResultOut])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str = Query("all", pattern="^(all|tribe|cause)$"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Ranked full-text search over tribes and causes."""
+    kinds = list(SEARCH_FIELDS) if kind == "all" else [kind]
+    await db.run_sync(search_service.ensure_loaded, kinds)
+    # scoring is CPU-bound (and network-bound for Elasticsearch), so keep it off the event loop
+    hits = await run_in_threadpool(search_service.backend.search, q, kinds, limit)
+    rows = {}
+    for hit_kind in kinds:
+        model = SEARCH_FIELDS[hit_kind][0]
+        ids = [hit.id for hit in hits if hit.kind == hit_kind]
+        if ids:
+            found = await db.scalars(select(model).where(model.id.in_(ids)))
+            rows.update({(hit_kind, row.id): row for row in found.all()})
+    results = []
+    for hit in hits:
+        row = rows.get((hit.kind, hit.id))
+        if row is None:
+            continue  # deleted since it was indexed
+        results.append(
+            schemas.SearchResultOut(
+                kind=hit.kind,
+                id=hit.id,
+                name=row.name,
+                summary=row.description if hit.kind == "tribe" else row.mission,
+                location=row.location,
+                score=round(hit.score, 4),
+            )
+        )
+    return results
+
+
+def _stats(db, top: int, days: int, today: dt.date) -> schemas.StatsOut:
+    total = rollups.summary(db)
+    by_day = {row.key: row for row in rollups.daily(db, days, today)}
+    daily = []
+    for offset in range(days - 1, -1, -1):
+        day = today - dt.timedelta(days=offset)
+        row = by_day.get(day.isoformat())
+        # days without donations have no rollup row
+        daily.append(schemas.DailyStatsOut(date=day, donations=row.donations if row else 0, amount=row.amount if row else 0))
+    return schemas.StatsOut(
+        causes=total.causes if total else 0,
+        funds_raised=total.amount if total else 0,
+        funding_goal=total.funding_goal if total else 0,
+        supporters_count=total.donations if total else 0,
+        top_causes=[
+            schemas.CauseStatsOut(
+                cause_id=int(row.key), name=row.label, funds_raised=row.amount,
+                funding_goal=row.funding_goal, supporters_count=row.donations,
+            )
+            for row in rollups.top_causes(db, top)
+        ],
+        categories=[
+            schemas.CategoryStatsOut(
+                category=row.label, causes=row.causes, funds_raised=row.amount, funding_goal=row.funding_goal,
+                supporters_count=row.donations, progress=round(row.amount / row.funding_goal, 4) if row.funding_goal else 0,
+            )
+            for row in rollups.categories(db)
+        ],
+        daily=daily,
+        updated_at=total.updated_at if total else None,
+    )
+
+
+@router.get("/stats", response_model=schemas.StatsOut)
+async def stats(
+    request: Request,
+    top: int = Query(10, ge=1, le=50),
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Leaderboard, per-category funding progress and donations per day, read from the rollups."""
+    today = dt.datetime.utcnow().date()
+
+    async def build():
+        out = await db.run_sync(_stats, top, days, today)
+        return out.model_dump_json().encode(), {}
+
+    entry = await catalog_cache.get_or_build_async("stats", (top, days, today), build)
+    return conditional_response(request, entry, max_age=get_settings().public_cache_max_age)
+
+
 @router.get("/config")
 def public_config():
     settings = get_settings()
     return {
         "stripe_enabled": settings.stripe_enabled,
     }
-
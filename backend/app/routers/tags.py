@@ -0,0 +1,54 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session
+
+from ..db import get_db
+from ..dependencies import CurrentUser, require_admin
+from .. import schemas
+from ..services import tags
+
+router = APIRouter(prefix="/tags", tags=["tags"])
+
+TagKind = Literal["interest", "skill"]
+
+
+@router.get("/{kind}/popular", response_model=list[schemas.TagCountOut])
+def popular_tags(
+    kind: TagKind,
+    limit: int = Query(20, ge=1, le=100),
+    prefix: Optional[str] = Query(None, max_length=100),
+    db: Session = Depends(get_db),
+):
+    return [
+        schemas.TagCountOut(name=name, label=label, profiles=count)
+        for name, label, count in tags.tag_counts(db, kind, limit=limit, prefix=prefix)
+    ]
+
+
+@router.get("/{kind}/{name}/profiles", response_model=list[schemas.TaggedProfileOut])
+def tagged_profiles(
+    kind: TagKind,
+    name: str,
+    response: Response,
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    _admin: CurrentUser = Depends(require_admin),
+):
+    """Profiles with a given interest or skill, keyset-paginated via X-Next-Cursor.
+
+    Admin only: the rows identify users and where they live.
+    """
+    profiles = tags.profiles_with_tag(db, kind, name, after_id=cursor, limit=limit)
+    if len(profiles) == limit:
+        response.headers["X-Next-Cursor"] = str(profiles[-1].id)
+    return [
+        schemas.TaggedProfileOut(
+            profile_id=p.id,
+            user_id=p.user_id,
+            location_city=p.location_city,
+            location_country=p.location_country,
+        )
+        for p in profiles
+    ]
@@ -8,6 +8,8 @@ class TribeOut(BaseModel):
     name: str
     description: str
     location: Optional[str] = None
+    location_lat: Optional[float] = None
+    location_lng: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -23,11 +25,34 @@ class CauseOut(BaseModel):
     category: Optional[str] = None
     urgency: Optional[str] = None
     location: Optional[str] = None
+    location_lat: Optional[float] = None
+    location_lng: Optional[float] = None
 
     class Config:
         from_attributes = True
 
 
+class TribeImport(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    description: str = ""
+    location: Optional[str] = Field(None, max_length=255)
+    location_lat: Optional[float] = Field(None, ge=-90, le=90)
+    location_lng: Optional[float] = Field(None, ge=-180, le=180)
+
+
+class CauseImport(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    mission: str = ""
+    funding_goal: float = Field(0, ge=0)
+    funds_raised: float = Field(0, ge=0)
+    supporters_count: int = Field(0, ge=0)
+    category: Optional[str] = Field(None, max_length=100)
+    urgency: Optional[str] = Field(None, max_length=50)
+    location: Optional[str] = Field(None, max_length=255)
+    location_lat: Optional[float] = Field(None, ge=-90, le=90)
+    location_lng: Optional[float] = Field(None, ge=-180, le=180)
+
+
 class DonationCreate(BaseModel):
     cause_id: int
     amount: float
@@ -49,6 +74,9 @@ class ProBonoOfferCreate(BaseModel):
     email: str
     skills: str
     hours: int
+    location: Optional[str] = None
+    location_lat: Optional[float] = Field(None, ge=-90, le=90)
+    location_lng: Optional[float] = Field(None, ge=-180, le=180)
 
 class ProBonoOfferOut(BaseModel):
     id: int
@@ -57,6 +85,9 @@ class ProBonoOfferOut(BaseModel):
     email: str
     skills: str
     hours: int
+    location: Optional[str] = None
+    location_lat: Optional[float] = None
+    location_lng: Optional[float] = None
     created_at: dt.datetime
 
     class Config:
@@ -88,3 +119,127 @@ class UserProfileOut(BaseModel):
         from_attributes = True
 
 
+
+
+class OnboardingMessageOut(BaseModel):
+    seq: int
+    role: str
+    content: str
+    created_at: dt.datetime
+
+    class Config:
+        from_attributes = True
+
+
+class TranscriptPage(BaseModel):
+    session_id: str
+    messages: List[OnboardingMessageOut] = []
+    next_after_seq: Optional[int] = None
+
+
+class NearbyOut(BaseModel):
+    kind: str
+    id: int
+    name: str
+    location: Optional[str] = None
+    location_lat: float
+    location_lng: float
+    distance_km: float
+
+
+class SearchResultOut(BaseModel):
+    kind: str
+    id: int
+    name: str
+    summary: str
+    location: Optional[str] = None
+    score: float
+
+
+class TagCountOut(BaseModel):
+    name: str
+    label: str
+    profiles: int
+
+
+class TaggedProfileOut(BaseModel):
+    profile_id: int
+    user_id: Optional[int] = None
+    location_city: Optional[str] = None
+    location_country: Optional[str] = None
+
+
+class CauseStatsOut(BaseModel):
+    cause_id: int
+    name: Optional[str] = None
+    funds_raised: float
+    funding_goal: float
+    supporters_count: int
+
+
+class CategoryStatsOut(BaseModel):
+    category: Optional[str] = None
+    causes: int
+    funds_raised: float
+    funding_goal: float
+    supporters_count: int
+    progress: float
+
+
+class DailyStatsOut(BaseModel):
+    date: dt.date
+    donations: int
+    amount: float
+
+
+class StatsOut(BaseModel):
+    causes: int = 0
+    funds_raised: float = 0
+    funding_goal: float = 0
+    supporters_count: int = 0
+    top_causes: List[CauseStatsOut] = []
+    categories: List[CategoryStatsOut] = []
+    daily: List[DailyStatsOut] = []
+    updated_at: Optional[dt.datetime] = None
+
+
+class RecommendedEventOut(BaseModel):
+    id: int
+    name: str
+    type: str
+    location: Optional[str] = None
+    location_lat: Optional[float] = None
+    location_lng: Optional[float] = None
+    starts_at: dt.datetime
+    tribe_id: Optional[int] = None
+    score: float
+    # which parts of the profile matched: "tribe", "interest", "location", "nearby"
+    reasons: List[str] = []
+
+
+class SkillNeedIn(BaseModel):
+    skill: str = Field(..., min_length=1, max_length=100)
+    hours: int = Field(..., ge=1, le=100_000)
+
+
+class SkillNeedOut(BaseModel):
+    id: int
+    skill: str
+    hours: int
+    # hours allocated to it by the last matching run
+    hours_matched: int = 0
+
+
+class ProBonoMatchOut(BaseModel):
+    offer_id: int
+    need_id: int
+    skill: str
+    name: str
+    email: str
+    hours: int
+    score: float
+
+
+class MatchRunOut(BaseModel):
+    queued: bool
+    job_id: Optional[int] = None
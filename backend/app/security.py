@@ -1,19 +1,35 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 import jwt
-from passlib.context import CryptContext
 from .core.config import get_settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache
+def pwd_context():
+    # passlib (and bcrypt behind it) load on the first password operation, not with every import of
+    # this module: token verification on each request only needs jwt
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=get_settings().bcrypt_rounds)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a fresh hash when the stored one uses an outdated scheme or cost."""
+    return pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify signature and expiry; raises jwt.PyJWTError when the token is not acceptable."""
+    return jwt.decode(token, get_settings().secret_key, algorithms=["HS256"], options={"require": ["exp", "sub"]})
 
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
@@ -1,28 +1,122 @@
-from typing import List, Dict, Any
+import hashlib
+import json
+import math
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 from ..core.config import get_settings
+from .. import models
+from . import changes
+from .cache import Cache, make_cache
+from .jobs import job_queue
+from .llm import get_llm_client
 
 
 def is_ai_enabled() -> bool:
     return bool(get_settings().openai_api_key)
 
 
-def rerank_tribes_with_ai(
+@lru_cache
+def get_rerank_cache() -> Cache:
+    settings = get_settings()
+    cache = make_cache(
+        settings.ai_cache_backend,
+        max_entries=settings.ai_cache_max_entries,
+        ttl_seconds=settings.ai_cache_ttl_seconds,
+        path=settings.ai_cache_path,
+    )
+    # Keys already fingerprint the tribes they were computed for; clearing just drops stale entries early.
+    changes.subscribe(models.Tribe, lambda _changed: cache.clear())
+    return cache
+
+
+def _normalize_terms(values: List[str]) -> List[str]:
+    return sorted({v.strip().lower() for v in values if v and v.strip()})
+
+
+def rerank_cache_key(prompt_tribes: List[Dict[str, Any]], interests: List[str], skills: List[str], locations: List[str]) -> str:
+    """Hash of the normalized profile plus the content of the tribe set being ranked."""
+    material = {
+        "interests": _normalize_terms(interests),
+        "skills": _normalize_terms(skills),
+        "locations": _normalize_terms(locations),
+        "tribes": sorted(prompt_tribes, key=lambda t: t["id"]),
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _as_score(value: Any) -> Optional[float]:
+    """The model's score as a float, or None for "high", "8/10", null and friends."""
+    if isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return score if math.isfinite(score) else None
+
+
+def _apply_ranking(tribes: List[Dict[str, Any]], ranking: List[Any]) -> List[Dict[str, Any]]:
+    score_map = {item.get("id"): item for item in ranking if isinstance(item, dict) and item.get("id") is not None}
+    enriched: List[Dict[str, Any]] = []
+    for t in tribes:
+        item = score_map.get(t.get("id"))
+        if item:
+            score = _as_score(item.get("score"))
+            if score is None:
+                score = _as_score(t.get("score")) or 0.0
+            t = {**t, "score": score, "explanation": item.get("explanation")}
+        enriched.append(t)
+    enriched.sort(key=lambda x: _as_score(x.get("score")) or 0.0, reverse=True)
+    return enriched
+
+
+def _prompt_tribes(tribes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {"id": t.get("id"), "name": t.get("name"), "description": t.get("description", ""), "location": t.get("location")}
+        for t in tribes
+    ]
+
+
+def rerank_or_schedule(
+    tribes: List[Dict[str, Any]], interests: List[str], skills: List[str], locations: List[str]
+) -> List[Dict[str, Any]]:
+    """Apply a cached AI ranking if there is one; otherwise queue the re-rank and keep heuristic order.
+
+    Repeat requests for the same profile pick up the ranking once the job has filled the cache.
+    """
+    key = rerank_cache_key(_prompt_tribes(tribes), interests, skills, locations)
+    cached = get_rerank_cache().get(key)
+    if cached is not None:
+        return _apply_ranking(tribes, cached)
+    job_queue.enqueue(
+        "ai.rerank",
+        {"tribes": tribes, "interests": interests, "skills": skills, "locations": locations},
+        dedupe_key=f"rerank:{key}",
+    )
+    return tribes
+
+
+async def rerank_tribes_with_ai(
     tribes: List[Dict[str, Any]], interests: List[str], skills: List[str], locations: List[str]
 ) -> List[Dict[str, Any]]:
     """Optionally re-rank tribe suggestions using OpenAI if configured.
 
-    Returns tribes with optional 'score' and 'explanation'.
+    Returns tribes with optional 'score' and 'explanation'. Rankings are cached per
+    normalized profile and tribe set.
     """
     if not is_ai_enabled():
         return tribes
 
-    try:
-        from openai import OpenAI
-    except Exception:
-        return tribes
+    prompt_tribes = _prompt_tribes(tribes)
+    cache = get_rerank_cache()
+    key = rerank_cache_key(prompt_tribes, interests, skills, locations)
+    cached = cache.get(key)
+    if cached is not None:
+        return _apply_ranking(tribes, cached)
 
-    settings = get_settings()
-    client = OpenAI(api_key=settings.openai_api_key)
+    client = get_llm_client()
+    if client is None:
+        return tribes
 
     # Prepare compact prompt
     system = (
@@ -33,36 +127,28 @@ def rerank_tribes_with_ai(
         "interests": interests,
         "skills": skills,
         "locations": locations,
-        "tribes": [
-            {"id": t.get("id"), "name": t.get("name"), "description": t.get("description", ""), "location": t.get("location")}
-            for t in tribes
-        ],
+        "tribes": prompt_tribes,
     }
 
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
+        content = await client.chat_completion(
             messages=[
                 {"role": "system", "content": system},
-                {"role": "user", "content": str(user)},
+                {"role": "user", "content": json.dumps(user)},
             ],
             temperature=0.2,
         )
-        content = completion.choices[0].message.content or "[]"
-        import json
-
-        ranking = json.loads(content)
-        score_map = {item.get("id"): item for item in ranking if isinstance(item, dict) and item.get("id") is not None}
-        enriched: List[Dict[str, Any]] = []
-        for t in tribes:
-            item = score_map.get(t.get("id"))
-            if item:
-                t = {**t, "score": float(item.get("score", t.get("score", 0.0))), "explanation": item.get("explanation")}
-            enriched.append(t)
-        enriched.sort(key=lambda x: float(x.get("score", 0.0)), reverse=True)
-        return enriched
+        ranking = json.loads(content or "[]")
+        # scores are normalized before caching; entries without a usable score keep heuristic order
+        ranking = [
+            {"id": item["id"], "score": score, "explanation": item.get("explanation")}
+            for item in ranking
+            if isinstance(item, dict)
+            and item.get("id") is not None
+            and (score := _as_score(item.get("score"))) is not None
+        ]
     except Exception:
         # Fallback to original order
         return tribes
-
-
+    cache.set(key, ranking)
+    return _apply_ranking(tribes, ranking)
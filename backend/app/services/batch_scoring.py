@@ -0,0 +1,138 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .text import normalize
+from .tribe_index import (
+    INTEREST_WEIGHT,
+    LOCATION_WEIGHT,
+    SKILL_WEIGHT,
+    TribeDoc,
+    TribeIndex,
+    distance_boosts,
+    tribe_index,
+)
+
+# Upper bound on the dense (profiles x tribes) score block kept in memory at once.
+_MAX_BLOCK_CELLS = 2_000_000
+
+
+class BatchScorer:
+    """Scores many onboarding profiles at once with NumPy.
+
+    Tribes are encoded once per index version as a sparse term -> tribe-column incidence;
+    a batch becomes a (profiles x terms) weight matrix that is multiplied into it, so the
+    per-profile Python loop of the single endpoint disappears.
+    """
+
+    def __init__(self, index: TribeIndex) -> None:
+        self._index = index
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._docs: List[TribeDoc] = []
+        self._ids = np.empty(0, dtype=np.int64)
+        self._columns: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def _encode(self, keys: List[Tuple[str, str]]) -> Tuple[List[TribeDoc], np.ndarray, List[np.ndarray]]:
+        with self._lock:
+            version, docs, matches = self._index.snapshot(keys, known_version=self._version)
+            if docs is not None:
+                self._version = version
+                self._docs = docs
+                self._ids = np.fromiter((d.id for d in docs), dtype=np.int64, count=len(docs))
+                self._columns = {}
+            columns = []
+            for key in keys:
+                cols = self._columns.get(key)
+                if cols is None:
+                    hits = np.fromiter(matches[key], dtype=np.int64, count=len(matches[key]))
+                    cols = np.searchsorted(self._ids, np.sort(hits))
+                    self._columns[key] = cols
+                columns.append(cols)
+            return self._docs, self._ids, columns
+
+    def top_k(
+        self,
+        profiles: Sequence[Tuple[Sequence[str], Sequence[str], Sequence[str]]],
+        k: int,
+        near: Optional[Sequence[Optional[Tuple[float, float]]]] = None,
+    ) -> List[List[Tuple[TribeDoc, float]]]:
+        """Per-profile best `k` tribes for (interests, skills, locations) tuples.
+
+        `near` optionally gives each profile's (lat, lng) for the distance term.
+        """
+        term_pos: Dict[Tuple[str, str], int] = {}
+        entries: List[Tuple[int, int, float]] = []
+        for row, (interests, skills, locations) in enumerate(profiles):
+            groups = (
+                ({normalize(i) for i in interests}, "text", INTEREST_WEIGHT),
+                ({normalize(s) for s in skills}, "text", SKILL_WEIGHT),
+                ({normalize(l) for l in locations}, "location", LOCATION_WEIGHT),
+            )
+            for terms, field, weight in groups:
+                for term in terms:
+                    if field == "location" and not term:
+                        continue
+                    col = term_pos.setdefault((field, term), len(term_pos))
+                    entries.append((row, col, weight))
+
+        keys = list(term_pos)
+        docs, ids, columns = self._encode(keys)
+        n_tribes = len(docs)
+        if n_tribes == 0:
+            return [[] for _ in profiles]
+
+        weights = np.zeros((len(profiles), len(keys)), dtype=np.float64)
+        for row, col, weight in entries:
+            weights[row, col] += weight
+        boosts = _distance_columns(ids, near) if near is not None else {}
+
+        k = min(k, n_tribes)
+        block = max(1, _MAX_BLOCK_CELLS // n_tribes)
+        results: List[List[Tuple[TribeDoc, float]]] = []
+        for start in range(0, len(profiles), block):
+            w = weights[start : start + block]
+            scores = np.zeros((w.shape[0], n_tribes), dtype=np.float64)
+            # scores = w @ incidence, one sparse term column at a time
+            for col, tribe_cols in enumerate(columns):
+                if tribe_cols.size and w[:, col].any():
+                    scores[:, tribe_cols] += w[:, col : col + 1]
+            for offset in range(w.shape[0]):
+                boost = boosts.get(start + offset)
+                if boost is not None:
+                    scores[offset, boost[0]] += boost[1]
+            for row_scores in scores:
+                order = _top_positions(row_scores, k)
+                results.append([(docs[p], float(row_scores[p])) for p in order])
+        return results
+
+
+def _distance_columns(
+    tribe_ids: np.ndarray, near: Sequence[Optional[Tuple[float, float]]]
+) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """Per profile row, the tribe columns within range and their distance boosts."""
+    out = {}
+    for row, point in enumerate(near):
+        if point is None:
+            continue
+        boosts = distance_boosts(*point)
+        ids = np.fromiter(boosts, dtype=np.int64, count=len(boosts))
+        values = np.fromiter(boosts.values(), dtype=np.float64, count=len(boosts))
+        cols = np.searchsorted(tribe_ids, ids)
+        # the geo index may briefly know tribes the encoded snapshot does not
+        known = (cols < tribe_ids.size) & (tribe_ids[np.minimum(cols, tribe_ids.size - 1)] == ids)
+        out[row] = (cols[known], values[known])
+    return out
+
+
+def _top_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the `k` highest scores, ties broken by position (i.e. tribe id)."""
+    if k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    candidates = np.flatnonzero(scores >= threshold)
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+
+
+batch_scorer = BatchScorer(tribe_index)
@@ -0,0 +1,286 @@
+"""Chunked CSV/NDJSON import and streaming export for partner data.
+
+Rows are validated with the `schemas` import models a chunk at a time and written with one
+executemany `insert()` per chunk (`COPY` on PostgreSQL with psycopg), committing per chunk so
+a bad row or a crash only costs that chunk. Bulk writes bypass the ORM unit of work, so
+subscribers get a single full-reload notification when an import finishes.
+"""
+import csv
+import datetime as dt
+import io
+import json
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from . import changes
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+DEFAULT_CHUNK_SIZE = 1000
+# Row errors kept in the report; the failed count keeps going past this
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass(frozen=True)
+class BulkKind:
+    model: Type[Any]
+    create: Type[BaseModel]
+    out: Type[BaseModel]
+
+
+BULK_KINDS: Dict[str, BulkKind] = {
+    "tribes": BulkKind(models.Tribe, schemas.TribeImport, schemas.TribeOut),
+    "causes": BulkKind(models.Cause, schemas.CauseImport, schemas.CauseOut),
+    "pro_bono_offers": BulkKind(models.ProBonoOffer, schemas.ProBonoOfferCreate, schemas.ProBonoOfferOut),
+}
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    rows: int = 0
+    inserted: int = 0
+    failed: int = 0
+    done: bool = False
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    def fail(self, row: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row, error))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "done": self.done,
+            "errors": [{"row": row, "error": error} for row, error in sorted(self.errors)],
+        }
+
+
+def read_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """(row number, data, parse error) for each record; empty CSV cells are left to schema defaults."""
+    if fmt == "csv":
+        for number, record in enumerate(csv.DictReader(lines), start=1):
+            yield number, {k: v for k, v in record.items() if k and v not in ("", None)}, None
+    elif fmt == "ndjson":
+        number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                data = json.loads(line)
+            except ValueError as exc:
+                yield number, None, f"invalid JSON: {exc}"
+                continue
+            if isinstance(data, dict):
+                yield number, data, None
+            else:
+                yield number, None, "expected a JSON object"
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors())
+
+
+def _with_defaults(model: Type[Any], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill Python-side column defaults, which COPY (unlike insert()) does not apply."""
+    defaults = {}
+    for column in model.__table__.columns:
+        if column.default is not None and column.default.is_scalar:
+            defaults[column.name] = column.default.arg
+        elif column.default is not None and column.default.is_callable:
+            defaults[column.name] = column.default.arg(None)
+    return [{**defaults, **row} for row in rows]
+
+
+def _copy(db: Session, model: Type[Any], rows: List[Dict[str, Any]]) -> None:
+    rows = _with_defaults(model, rows)
+    columns = [c.name for c in model.__table__.columns if c.name in rows[0]]
+    preparer = db.get_bind().dialect.identifier_preparer
+    statement = "COPY %s (%s) FROM STDIN" % (
+        preparer.format_table(model.__table__),
+        ", ".join(preparer.quote(c) for c in columns),
+    )
+    raw = db.connection().connection.driver_connection
+    with raw.cursor() as cursor, cursor.copy(statement) as copy:
+        for row in rows:
+            copy.write_row(tuple(row.get(c) for c in columns))
+
+
+def _write(db: Session, model: Type[Any], rows: List[Dict[str, Any]]) -> None:
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "psycopg":
+        _copy(db, model, rows)
+    else:
+        db.execute(insert(model), rows)
+
+
+def _drop_unknown_causes(db: Session, batch: List[Tuple[int, Dict[str, Any]]], report: ImportReport):
+    cause_ids = {row["cause_id"] for _, row in batch}
+    known = set(db.execute(select(models.Cause.id).where(models.Cause.id.in_(cause_ids))).scalars())
+    kept = []
+    for number, row in batch:
+        if row["cause_id"] in known:
+            kept.append((number, row))
+        else:
+            report.fail(number, f"cause_id: cause {row['cause_id']} does not exist")
+    return kept
+
+
+def iter_import(
+    db: Session,
+    kind: str,
+    records: Iterable[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[ImportReport]:
+    """Validate and insert `read_rows` output chunk by chunk, yielding the running report after each commit."""
+    spec = BULK_KINDS[kind]
+    report = ImportReport(kind=kind)
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+
+    def flush() -> None:
+        rows = _drop_unknown_causes(db, batch, report) if "cause_id" in spec.create.model_fields else batch
+        if rows:
+            _write(db, spec.model, [row for _, row in rows])
+            db.commit()
+            report.inserted += len(rows)
+        batch.clear()
+
+    try:
+        for number, data, error in records:
+            report.rows += 1
+            if error is not None:
+                report.fail(number, error)
+                continue
+            try:
+                batch.append((number, spec.create.model_validate(data).model_dump()))
+            except ValidationError as exc:
+                report.fail(number, _describe(exc))
+                continue
+            if len(batch) >= chunk_size:
+                flush()
+                yield report
+        flush()
+    finally:
+        if report.inserted:
+            changes.notify(spec.model, None)
+    report.done = True
+    logger.info("bulk import %s: %d rows, %d inserted, %d failed", kind, report.rows, report.inserted, report.failed)
+    yield report
+
+
+def import_file(db: Session, kind: str, lines: Iterable[str], fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                on_progress: Optional[Callable[[ImportReport], None]] = None) -> ImportReport:
+    report = ImportReport(kind=kind)
+    for report in iter_import(db, kind, read_rows(lines, fmt), chunk_size):
+        if on_progress is not None:
+            on_progress(report)
+    return report
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (dt.datetime, dt.date)) else value
+
+
+def export_rows(session_factory: Callable[[], Session], kind: str, fmt: str, batch_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Stream a table as CSV or NDJSON text, one keyset batch per short-lived session.
+
+    Only a batch is ever held in memory, and no connection or transaction stays open while a
+    slow client drains the response.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}")
+    spec = BULK_KINDS[kind]
+    table = spec.model.__table__
+    fields = list(spec.out.model_fields)
+    query = select(*(table.c[name] for name in fields)).order_by(table.c.id).limit(batch_size)
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(fields)
+        yield buffer.getvalue()
+
+    last_id = None
+    while True:
+        db = session_factory()
+        try:
+            page = query if last_id is None else query.where(table.c.id > last_id)
+            rows = db.execute(page).all()
+        finally:
+            db.close()
+        if not rows:
+            return
+        buffer = io.StringIO()
+        if fmt == "csv":
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerows([_json_value(v) for v in row] for row in rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps({name: _json_value(v) for name, v in zip(fields, row)}))
+                buffer.write("\n")
+        yield buffer.getvalue()
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            return
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    from ..db import SessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.bulk", description="Bulk import/export partner data.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for command in ("import", "export"):
+        p = sub.add_parser(command)
+        p.add_argument("kind", choices=list(BULK_KINDS))
+        p.add_argument("path", nargs="?", default="-", help="file to read/write, - for stdin/stdout")
+        p.add_argument("--format", choices=FORMATS, help="defaults to the file extension, else csv")
+        p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+
+    if args.command == "export":
+        out = sys.stdout if args.path == "-" else open(args.path, "w", encoding="utf-8", newline="")
+        try:
+            for chunk in export_rows(SessionLocal, args.kind, fmt, args.chunk_size):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 0
+
+    def progress(report: ImportReport) -> None:
+        print(f"{args.kind}: {report.rows} rows read, {report.inserted} inserted, {report.failed} failed", file=sys.stderr)
+
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+    db = SessionLocal()
+    try:
+        report = import_file(db, args.kind, source, fmt, args.chunk_size, on_progress=progress)
+    finally:
+        db.close()
+        if source is not sys.stdin:
+            source.close()
+    for row, error in sorted(report.errors):
+        print(f"row {row}: {error}", file=sys.stderr)
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
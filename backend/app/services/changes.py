@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..db import engine
+
+logger = logging.getLogger(__name__)
+
+# Callbacks receive {primary_key: column snapshot, or None when deleted}.
+# A None payload means "unknown changes" (bulk writes) and asks for a full reload.
+ChangeCallback = Callable[[Optional[Dict[Any, Optional[Dict[str, Any]]]]], None]
+
+# model -> [(callback, remote)]; remote callbacks also hear about writes made by other processes
+_subscribers: Dict[type, List[Tuple[ChangeCallback, bool]]] = defaultdict(list)
+_PENDING_KEY = "_pending_model_changes"
+_VERSIONS_KEY = "_pending_change_versions"
+
+# Tables other processes keep in memory (indexes, response caches). Every process must agree on
+# this list, including CLIs that load none of the subscribers, so it is fixed here.
+PUBLISHED = frozenset({models.Tribe, models.Cause, models.Event, models.TribeEmbedding, models.StatsRollup})
+
+_versions = models.ChangeVersion.__table__
+_seen_lock = threading.Lock()
+# table -> last version this process has accounted for (its own commits, or a poll)
+_seen: Dict[str, int] = {}
+
+
+def subscribe(model: Type, callback: ChangeCallback, remote: bool = True) -> None:
+    """Call `callback` after every committed transaction touching `model` rows.
+
+    Writes from other processes (CLI imports, other workers) arrive as a None payload on the
+    next `poll`. Pass remote=False for callbacks that queue shared jobs rather than refresh
+    process memory: the writing process has queued those already.
+    """
+    _subscribers[model].append((callback, remote))
+
+
+def _remote(model: type) -> bool:
+    return model in PUBLISHED and any(remote for _, remote in _subscribers.get(model, ()))
+
+
+def _deliver(model: Type, changes: Optional[Dict[Any, Optional[Dict[str, Any]]]], remote_only: bool = False) -> None:
+    for callback, remote in list(_subscribers.get(model, ())):
+        if remote or not remote_only:
+            callback(changes)
+
+
+def _bump(conn, name: str) -> Optional[int]:
+    return conn.execute(
+        update(_versions).where(_versions.c.name == name).values(version=_versions.c.version + 1).returning(_versions.c.version)
+    ).scalar()
+
+
+def _account(bumped: Dict[str, Tuple[int, int]]) -> None:
+    # our own writes are already applied here; only skip them at the next poll when nobody
+    # else's landed in between
+    with _seen_lock:
+        for name, (first, last) in bumped.items():
+            if _seen.get(name) == first - 1:
+                _seen[name] = last
+
+
+def notify(model: Type, changes: Optional[Dict[Any, Optional[Dict[str, Any]]]] = None, publish: bool = True) -> None:
+    """Dispatch changes manually, e.g. after bulk writes that bypass the ORM unit of work.
+
+    publish=False keeps the change to this process: for counter updates (donation totals) that
+    no index stores, where a version bump would make every other process reload everything.
+    Their response caches catch up when the entries expire.
+    """
+    if publish and model in PUBLISHED:
+        with engine.begin() as conn:
+            version = _bump(conn, model.__tablename__)
+        if version is not None:
+            _account({model.__tablename__: (version, version)})
+    _deliver(model, changes)
+
+
+def notify_rows(db: Session, model: Type, ids: List[Any], publish: bool = True) -> None:
+    """Reload `ids` and dispatch them, for writes made with core UPDATE/INSERT statements."""
+    notify(model, {pk: (_snapshot(obj) if (obj := db.get(model, pk)) is not None else None) for pk in ids}, publish)
+
+
+def poll() -> List[type]:
+    """Full-reload every subscribed model another process wrote since the last poll; returns them."""
+    watched = {model.__tablename__: model for model in list(_subscribers) if _remote(model)}
+    if not watched:
+        return []
+    with engine.connect() as conn:
+        rows = conn.execute(select(_versions.c.name, _versions.c.version).where(_versions.c.name.in_(watched))).all()
+    stale = []
+    with _seen_lock:
+        for name, version in rows:
+            previous = _seen.get(name)
+            _seen[name] = version
+            if previous is not None and version != previous:
+                stale.append(watched[name])
+    for model in stale:
+        _deliver(model, None, remote_only=True)
+    return stale
+
+
+async def watch(interval: float) -> None:
+    """Poll for other processes' writes every `interval` seconds until cancelled."""
+    from fastapi.concurrency import run_in_threadpool
+
+    while True:
+        try:
+            await run_in_threadpool(poll)
+        except Exception:
+            logger.exception("change poll failed")
+        await asyncio.sleep(interval)
+
+
+def _snapshot(obj: Any) -> Dict[str, Any]:
+    mapper = inspect(obj).mapper
+    return {attr.key: getattr(obj, attr.key) for attr in mapper.column_attrs}
+
+
+def _primary_key(obj: Any) -> Any:
+    key = inspect(obj).mapper.primary_key_from_instance(obj)
+    return key[0] if len(key) == 1 else tuple(key)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, defaultdict(dict))
+    touched = set()
+    for obj in list(session.new) + list(session.dirty):
+        touched.add(type(obj))
+        if type(obj) in _subscribers:
+            pending[type(obj)][_primary_key(obj)] = _snapshot(obj)
+    for obj in session.deleted:
+        touched.add(type(obj))
+        if type(obj) in _subscribers:
+            pending[type(obj)][_primary_key(obj)] = None
+    published = touched & PUBLISHED
+    if not published:
+        return
+    # the version bump commits (or rolls back) with the writes it announces
+    versions = session.info.setdefault(_VERSIONS_KEY, {})
+    conn = session.connection()
+    for model in published:
+        name = model.__tablename__
+        version = _bump(conn, name)
+        if version is not None:
+            versions[name] = (versions[name][0] if name in versions else version, version)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch(session: Session) -> None:
+    versions = session.info.pop(_VERSIONS_KEY, None)
+    if versions:
+        _account(versions)
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for model, changes in pending.items():
+        _deliver(model, changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_VERSIONS_KEY, None)
@@ -0,0 +1,79 @@
+import datetime as dt
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from . import changes, rollups
+
+logger = logging.getLogger(__name__)
+
+
+def _metadata_id(metadata: Dict[str, Any], field: str) -> Optional[int]:
+    """An integer id from the checkout metadata, None when absent; ValueError when malformed."""
+    value = metadata.get(field)
+    return int(value) if value else None
+
+
+def record_stripe_event(db: Session, event: Dict[str, Any]) -> bool:
+    """Apply a verified Stripe event exactly once; returns False for redeliveries.
+
+    The event id is inserted in the same transaction as its effects, so a retried delivery
+    either sees the committed id and stops, or the whole first attempt rolled back.
+    """
+    try:
+        db.add(models.StripeEvent(id=event["id"], type=event["type"]))
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return False
+
+    cause_id = None
+    if event["type"] == "checkout.session.completed":
+        session = event["data"]["object"]
+        metadata = session.get("metadata") or {}
+        try:
+            cause_id = _metadata_id(metadata, "cause_id")
+            donor_id = _metadata_id(metadata, "user_id")
+        except (TypeError, ValueError):
+            # record the event as processed without effects: retrying would never fix it
+            logger.warning("stripe event %s: ignoring checkout with malformed metadata %r", event["id"], metadata)
+            cause_id = donor_id = None
+        amount_total = (session.get("amount_total") or 0) / 100.0
+        if cause_id:
+            # Increment in SQL so concurrent deliveries for one cause never lose updates.
+            result = db.execute(
+                update(models.Cause)
+                .where(models.Cause.id == cause_id)
+                .values(
+                    funds_raised=models.Cause.funds_raised + amount_total,
+                    supporters_count=models.Cause.supporters_count + 1,
+                )
+            )
+            if result.rowcount:
+                created_at = dt.datetime.utcnow()
+                db.execute(
+                    insert(models.Donation).values(
+                        amount=amount_total,
+                        cause_id=cause_id,
+                        donor_id=donor_id,
+                        created_at=created_at,
+                    )
+                )
+                rollups.record_donation(db, cause_id, amount_total, created_at)
+            else:
+                cause_id = None
+    try:
+        db.commit()
+    except IntegrityError:
+        # another worker committed the same event id first
+        db.rollback()
+        return False
+    if cause_id:
+        # only counters moved: refresh this process, but don't make every worker reload its indexes
+        changes.notify_rows(db, models.Cause, [cause_id], publish=False)
+        changes.notify(models.StatsRollup, None, publish=False)
+    return True
@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import get_settings
+from ..db import SessionLocal
+from . import changes
+from .jobs import job_queue
+from .llm import get_llm_client
+from .text import normalize, tokenize
+
+logger = logging.getLogger(__name__)
+
+_EMBED_BATCH = 64
+
+
+class Embedder(Protocol):
+    # Stored with each vector, so switching models or dimensions never mixes vector spaces.
+    name: str
+    dim: int
+
+    async def embed(self, texts: List[str]) -> np.ndarray: ...
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return (matrix / np.where(norms == 0, 1.0, norms)).astype(np.float32)
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-tokens embedder (signed feature hashing); no network, no model files."""
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tokens = tokenize(normalize(text))
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vec[bucket] += 1.0 if digest[4] & 1 else -1.0
+        return vec
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return _normalize_rows(np.stack([self._vector(t) for t in texts]))
+
+
+class OpenAIEmbedder:
+    def __init__(self, model: str, dim: int) -> None:
+        self.model = model
+        self.dim = dim
+        self.name = f"openai-{model}-{dim}"
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        client = get_llm_client()
+        if client is None:
+            raise RuntimeError("OpenAI is not configured")
+        vectors = await client.embeddings(texts, model=self.model, dimensions=self.dim)
+        return _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+class VectorIndex:
+    """Cosine-similarity index over L2-normalized float32 vectors, keyed by id.
+
+    Upserts and deletes touch a dict; the dense matrix used for search is rebuilt lazily
+    on the next query after a change.
+    """
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors: Dict[int, np.ndarray] = {}
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def replace(self, items: Iterable[Tuple[int, np.ndarray]]) -> None:
+        with self._lock:
+            self._vectors = {pk: vec for pk, vec in items}
+            self._dirty = True
+
+    def upsert(self, pk: int, vector: np.ndarray) -> None:
+        with self._lock:
+            self._vectors[pk] = vector
+            self._dirty = True
+
+    def remove(self, pk: int) -> None:
+        with self._lock:
+            if self._vectors.pop(pk, None) is not None:
+                self._dirty = True
+
+    def _snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if self._dirty:
+                ids = sorted(self._vectors)
+                self._ids = np.asarray(ids, dtype=np.int64)
+                self._matrix = (
+                    np.stack([self._vectors[pk] for pk in ids]) if ids else np.empty((0, self.dim), dtype=np.float32)
+                )
+                self._dirty = False
+            return self._ids, self._matrix
+
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Top `k` (id, cosine) pairs, ties broken by id."""
+        ids, matrix = self._snapshot()
+        if not ids.size or k <= 0:
+            return []
+        sims = matrix @ query.astype(np.float32)
+        if k < sims.size:
+            top = np.argpartition(-sims, k - 1)[:k]
+        else:
+            top = np.arange(sims.size)
+        top = top[np.lexsort((ids[top], -sims[top]))]
+        return [(int(ids[i]), float(sims[i])) for i in top]
+
+
+def tribe_text(name: Optional[str], description: Optional[str], location: Optional[str]) -> str:
+    return ". ".join(part for part in (name, description, location) if part)
+
+
+def profile_text(interests: Sequence[str], skills: Sequence[str], locations: Sequence[str]) -> str:
+    return (
+        f"Interests: {', '.join(interests)}. Skills: {', '.join(skills)}. Location: {', '.join(locations)}."
+    )
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class TribeEmbeddings:
+    """Stored tribe embeddings for one embedder plus the in-memory index over them.
+
+    `sync` embeds only tribes whose text changed since their vector was stored and runs in
+    a background job; the index follows the tribe_embeddings table through change
+    notifications, so a shortlist is always served from memory.
+    """
+
+    def __init__(self, embedder: Embedder) -> None:
+        self.embedder = embedder
+        self.index = VectorIndex(embedder.dim)
+        self._loaded = False
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self._loaded:
+            return
+        rows = (
+            db.query(models.TribeEmbedding.tribe_id, models.TribeEmbedding.vector)
+            .filter(models.TribeEmbedding.embedder == self.embedder.name)
+            .all()
+        )
+        self.index.replace((pk, np.frombuffer(vector, dtype="<f4")) for pk, vector in rows)
+        self._loaded = True
+
+    def apply_changes(self, changed: Optional[Dict[Any, Optional[Dict[str, Any]]]]) -> None:
+        if changed is None:
+            self._loaded = False
+            return
+        if not self._loaded:
+            return
+        for (tribe_id, embedder), row in changed.items():
+            if embedder != self.embedder.name:
+                continue
+            if row is None:
+                self.index.remove(tribe_id)
+            else:
+                self.index.upsert(tribe_id, np.frombuffer(row["vector"], dtype="<f4"))
+
+    async def sync(self) -> int:
+        """Embed new and changed tribes, drop vectors of deleted ones. Returns the number embedded."""
+        pending = await run_in_threadpool(self._pending)
+        for start in range(0, len(pending), _EMBED_BATCH):
+            batch = pending[start : start + _EMBED_BATCH]
+            vectors = await self.embedder.embed([text for _, text in batch])
+            await run_in_threadpool(self._store, batch, vectors)
+        await run_in_threadpool(self._prune)
+        return len(pending)
+
+    def _pending(self) -> List[Tuple[int, str]]:
+        db = SessionLocal()
+        try:
+            stored = dict(
+                db.query(models.TribeEmbedding.tribe_id, models.TribeEmbedding.content_hash)
+                .filter(models.TribeEmbedding.embedder == self.embedder.name)
+                .all()
+            )
+            pending = []
+            for pk, name, description, location in db.query(
+                models.Tribe.id, models.Tribe.name, models.Tribe.description, models.Tribe.location
+            ).order_by(models.Tribe.id):
+                text = tribe_text(name, description, location)
+                if stored.get(pk) != _content_hash(text):
+                    pending.append((pk, text))
+            return pending
+        finally:
+            db.close()
+
+    def _store(self, batch: List[Tuple[int, str]], vectors: np.ndarray) -> None:
+        db = SessionLocal()
+        try:
+            for (pk, text), vector in zip(batch, vectors):
+                db.merge(
+                    models.TribeEmbedding(
+                        tribe_id=pk,
+                        embedder=self.embedder.name,
+                        content_hash=_content_hash(text),
+                        vector=vector.astype("<f4").tobytes(),
+                    )
+                )
+            db.commit()
+        finally:
+            db.close()
+
+    def _prune(self) -> None:
+        db = SessionLocal()
+        try:
+            orphans = (
+                db.query(models.TribeEmbedding)
+                .outerjoin(models.Tribe, models.Tribe.id == models.TribeEmbedding.tribe_id)
+                .filter(models.Tribe.id.is_(None))
+                .all()
+            )
+            for row in orphans:
+                db.delete(row)
+            db.commit()
+        finally:
+            db.close()
+
+    async def shortlist(
+        self, interests: Sequence[str], skills: Sequence[str], locations: Sequence[str], k: int
+    ) -> List[Tuple[int, float]]:
+        """Top `k` (tribe_id, cosine) for a profile; empty until tribes have been embedded.
+
+        Call `ensure_loaded` first.
+        """
+        if not len(self.index):
+            return []
+        try:
+            query = await self.embedder.embed([profile_text(interests, skills, locations)])
+        except Exception:
+            logger.exception("profile embedding failed; continuing without semantic candidates")
+            return []
+        return self.index.search(query[0], k)
+
+
+def schedule_sync(_changed: Any = None) -> None:
+    # one pending sync covers any number of tribe writes
+    job_queue.enqueue("embeddings.sync", {}, dedupe_key="embeddings.sync")
+
+
+def make_embedder() -> Embedder:
+    settings = get_settings()
+    backend = settings.embedding_backend
+    if backend == "openai" or (backend == "auto" and settings.openai_api_key):
+        return OpenAIEmbedder(settings.embedding_model, settings.embedding_dim)
+    return HashingEmbedder(settings.embedding_dim)
+
+
+tribe_embeddings = TribeEmbeddings(make_embedder())
+changes.subscribe(models.TribeEmbedding, tribe_embeddings.apply_changes)
+changes.subscribe(models.Tribe, schedule_sync, remote=False)
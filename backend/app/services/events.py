@@ -0,0 +1,365 @@
+"""Upcoming-event recommendations from an in-process, time-ordered event index.
+
+`EventIndex` files every future event under a handful of keys (its tribe, the tokens of its
+location and name, its lat/lng grid cell) in lists sorted by `starts_at`, and drops it from
+all of them once it starts. A profile's feed is the union of the lists under the keys it
+follows (matched tribes, city and country, nearby cells, interests); built feeds are kept
+per profile and patched in place when an event they follow changes, so a request only
+reads a slice of an already sorted list instead of scanning the events table.
+"""
+import bisect
+import datetime as dt
+import heapq
+import math
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import get_settings
+from . import changes
+from .geo import EARTH_RADIUS_KM, haversine_km
+from .tags import profile_tags
+from .text import tokenize
+from .tribe_index import DISTANCE_RADIUS_KM, DISTANCE_WEIGHT, INTEREST_WEIGHT, LOCATION_WEIGHT, tribe_index
+
+# Weights on top of the onboarding heuristic's: an event of a matched tribe outranks a keyword hit.
+TRIBE_WEIGHT = 3.0
+# How many of the profile's best tribes (by the onboarding score) its feed follows.
+MATCHED_TRIBES = 5
+CELL_DEGREES = 1.0
+_KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+
+Key = Tuple[Any, ...]
+Slot = Tuple[dt.datetime, int]
+
+
+def _index(degrees: float) -> int:
+    return int(math.floor(degrees / CELL_DEGREES))
+
+
+def _cell(lat: float, lng: float) -> Key:
+    return ("cell", _index(lat), _index(lng))
+
+
+def _nearby_cells(lat: float, lng: float, radius_km: float) -> List[Key]:
+    """Grid cells touching the bounding box of the circle around (lat, lng)."""
+    dlat = radius_km / _KM_PER_DEGREE
+    lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    widest = min(89.0, max(abs(lat_lo), abs(lat_hi)))
+    dlng = min(180.0, dlat / math.cos(math.radians(widest)))
+    half = _index(180.0)
+    # columns past the antimeridian wrap around to the other side
+    columns = {(col + half) % (2 * half) - half for col in range(_index(lng - dlng), _index(lng + dlng) + 1)}
+    return [("cell", row, col) for row in range(_index(lat_lo), _index(lat_hi) + 1) for col in sorted(columns)]
+
+
+@dataclass(frozen=True)
+class EventDoc:
+    id: int
+    name: str
+    type: str
+    location: Optional[str]
+    location_lat: Optional[float]
+    location_lng: Optional[float]
+    starts_at: dt.datetime
+    tribe_id: Optional[int]
+    location_tokens: FrozenSet[str]
+    name_tokens: FrozenSet[str]
+
+    @property
+    def slot(self) -> Slot:
+        return self.starts_at, self.id
+
+    @property
+    def keys(self) -> Set[Key]:
+        keys: Set[Key] = {("place", tok) for tok in self.location_tokens}
+        keys.update(("term", tok) for tok in self.name_tokens)
+        if self.tribe_id is not None:
+            keys.add(("tribe", self.tribe_id))
+        if self.location_lat is not None and self.location_lng is not None:
+            keys.add(_cell(self.location_lat, self.location_lng))
+        return keys
+
+
+def _doc_from_row(row: Dict[str, Any]) -> Optional[EventDoc]:
+    if row.get("starts_at") is None:
+        return None
+    return EventDoc(
+        id=row["id"],
+        name=row["name"],
+        type=row.get("type") or "digital",
+        location=row.get("location"),
+        location_lat=row.get("location_lat"),
+        location_lng=row.get("location_lng"),
+        starts_at=row["starts_at"],
+        tribe_id=row.get("tribe_id"),
+        location_tokens=frozenset(tokenize(row.get("location"))),
+        name_tokens=frozenset(tokenize(row["name"])),
+    )
+
+
+@dataclass(frozen=True)
+class FeedQuery:
+    """What a profile's feed follows; phrases are token tuples and match when all their tokens do."""
+
+    tribes: FrozenSet[int] = frozenset()
+    places: FrozenSet[Tuple[str, ...]] = frozenset()
+    interests: FrozenSet[Tuple[str, ...]] = frozenset()
+    near: Optional[Tuple[float, float]] = None
+
+    @property
+    def keys(self) -> Set[Key]:
+        keys: Set[Key] = {("tribe", tribe_id) for tribe_id in self.tribes}
+        keys.update(("place", tok) for phrase in self.places for tok in phrase)
+        keys.update(("term", tok) for phrase in self.interests for tok in phrase)
+        if self.near is not None:
+            keys.update(_nearby_cells(*self.near, DISTANCE_RADIUS_KM))
+        return keys
+
+    def score(self, doc: EventDoc) -> Tuple[float, Tuple[str, ...]]:
+        """Relevance of `doc` and the reasons behind it; 0 means the event is not in the feed."""
+        score, reasons = 0.0, []
+        if doc.tribe_id in self.tribes:
+            score += TRIBE_WEIGHT
+            reasons.append("tribe")
+        hits = sum(1 for phrase in self.interests if doc.name_tokens.issuperset(phrase))
+        if hits:
+            score += INTEREST_WEIGHT * hits
+            reasons.append("interest")
+        if any(doc.location_tokens.issuperset(phrase) for phrase in self.places):
+            score += LOCATION_WEIGHT
+            reasons.append("location")
+        if self.near is not None and doc.location_lat is not None and doc.location_lng is not None:
+            km = float(haversine_km(*self.near, [doc.location_lat], [doc.location_lng])[0])
+            if km <= DISTANCE_RADIUS_KM:
+                score += DISTANCE_WEIGHT * (1.0 - km / DISTANCE_RADIUS_KM)
+                reasons.append("nearby")
+        return score, tuple(reasons)
+
+
+@dataclass
+class _Feed:
+    query: FeedQuery
+    keys: Set[Key]
+    slots: List[Slot] = field(default_factory=list)
+    scores: Dict[int, Tuple[float, Tuple[str, ...]]] = field(default_factory=dict)
+
+    def offer(self, doc: EventDoc) -> None:
+        score, reasons = self.query.score(doc)
+        if score > 0:
+            self.scores[doc.id] = (score, reasons)
+            bisect.insort(self.slots, doc.slot)
+
+    def discard(self, doc: EventDoc) -> None:
+        if self.scores.pop(doc.id, None) is not None:
+            _remove_slot(self.slots, doc.slot)
+
+
+def _remove_slot(slots: List[Slot], slot: Slot) -> None:
+    pos = bisect.bisect_left(slots, slot)
+    if pos < len(slots) and slots[pos] == slot:
+        del slots[pos]
+
+
+class EventIndex:
+    """Future events in per-key lists ordered by `starts_at`, plus the feeds built on them.
+
+    A min-heap of start times drives eviction: every read and every change first drops the
+    events that have started, from the key lists and from the feeds holding them. Feeds are
+    an LRU keyed by profile id; followers per key tell which feeds an event change touches.
+    """
+
+    def __init__(self, max_feeds: int = 10000) -> None:
+        self.max_feeds = max_feeds
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._docs: Dict[int, EventDoc] = {}
+        self._lists: Dict[Key, List[Slot]] = defaultdict(list)
+        self._timeline: List[Slot] = []
+        self._feeds: "OrderedDict[int, _Feed]" = OrderedDict()
+        self._followers: Dict[Key, Set[int]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @property
+    def feed_count(self) -> int:
+        return len(self._feeds)
+
+    # -- maintenance -------------------------------------------------------
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.rebuild(db)
+
+    def rebuild(self, db: Session) -> None:
+        now = dt.datetime.utcnow()
+        e = models.Event
+        # read before locking: under run_sync the query runs on the event loop thread
+        rows = (
+            db.query(e.id, e.name, e.type, e.location, e.location_lat, e.location_lng, e.starts_at, e.tribe_id)
+            .filter(e.starts_at > now)
+            .all()
+        )
+        with self._lock:
+            self._clear()
+            for row in rows:
+                doc = _doc_from_row(row._asdict())
+                if doc is not None:
+                    self._add(doc, now)
+            self._loaded = True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._clear()
+
+    def apply_changes(self, changed: Optional[Dict[Any, Optional[Dict[str, Any]]]]) -> None:
+        if changed is None:
+            self.invalidate()
+            return
+        now = dt.datetime.utcnow()
+        with self._lock:
+            if not self._loaded:
+                return
+            self._evict(now)
+            for event_id, row in changed.items():
+                self._remove(event_id)
+                doc = _doc_from_row(row) if row is not None else None
+                if doc is not None:
+                    self._add(doc, now)
+
+    def _clear(self) -> None:
+        self._docs.clear()
+        self._lists.clear()
+        self._timeline.clear()
+        self._feeds.clear()
+        self._followers.clear()
+
+    def _add(self, doc: EventDoc, now: dt.datetime) -> None:
+        if doc.starts_at <= now:
+            return
+        self._docs[doc.id] = doc
+        keys = doc.keys
+        for key in keys:
+            bisect.insort(self._lists[key], doc.slot)
+        heapq.heappush(self._timeline, doc.slot)
+        for profile_id in self._following(keys):
+            self._feeds[profile_id].offer(doc)
+
+    def _remove(self, event_id: int) -> None:
+        doc = self._docs.pop(event_id, None)
+        if doc is None:
+            return
+        keys = doc.keys
+        for key in keys:
+            slots = self._lists.get(key)
+            if slots is not None:
+                _remove_slot(slots, doc.slot)
+                if not slots:
+                    del self._lists[key]
+        for profile_id in self._following(keys):
+            self._feeds[profile_id].discard(doc)
+        # the timeline entry is skipped when it surfaces
+
+    def _following(self, keys: Iterable[Key]) -> Set[int]:
+        profiles: Set[int] = set()
+        for key in keys:
+            profiles |= self._followers.get(key, set())
+        return profiles
+
+    def _evict(self, now: dt.datetime) -> None:
+        while self._timeline and self._timeline[0][0] <= now:
+            starts_at, event_id = heapq.heappop(self._timeline)
+            doc = self._docs.get(event_id)
+            if doc is not None and doc.starts_at == starts_at:
+                self._remove(event_id)
+
+    # -- feeds -------------------------------------------------------------
+    def _build(self, query: FeedQuery) -> _Feed:
+        feed = _Feed(query=query, keys=query.keys)
+        candidates: Set[int] = set()
+        for key in feed.keys:
+            candidates.update(event_id for _, event_id in self._lists.get(key, ()))
+        for event_id in candidates:
+            doc = self._docs[event_id]
+            score, reasons = query.score(doc)
+            if score > 0:
+                feed.scores[event_id] = (score, reasons)
+                feed.slots.append(doc.slot)
+        feed.slots.sort()
+        return feed
+
+    def _forget(self, profile_id: int) -> None:
+        feed = self._feeds.pop(profile_id, None)
+        if feed is None:
+            return
+        for key in feed.keys:
+            followers = self._followers.get(key)
+            if followers is not None:
+                followers.discard(profile_id)
+                if not followers:
+                    del self._followers[key]
+
+    def drop_feed(self, profile_id: int) -> None:
+        with self._lock:
+            self._forget(profile_id)
+
+    def feed(
+        self,
+        profile_id: int,
+        query: FeedQuery,
+        until: Optional[dt.datetime] = None,
+        limit: int = 20,
+        now: Optional[dt.datetime] = None,
+    ) -> List[Tuple[EventDoc, float, Tuple[str, ...]]]:
+        """The profile's next `limit` events starting before `until`, soonest first.
+
+        The stored feed is reused while `query` is unchanged and rebuilt from the key lists
+        when it differs (new tags, location or tribe matches).
+        """
+        now = now or dt.datetime.utcnow()
+        with self._lock:
+            self._evict(now)
+            feed = self._feeds.get(profile_id)
+            if feed is None or feed.query != query:
+                self._forget(profile_id)
+                feed = self._feeds[profile_id] = self._build(query)
+                for key in feed.keys:
+                    self._followers[key].add(profile_id)
+                while len(self._feeds) > self.max_feeds:
+                    self._forget(next(iter(self._feeds)))
+            self._feeds.move_to_end(profile_id)
+            out = []
+            for starts_at, event_id in feed.slots:
+                if len(out) >= limit or (until is not None and starts_at >= until):
+                    break
+                score, reasons = feed.scores[event_id]
+                out.append((self._docs[event_id], score, reasons))
+            return out
+
+
+def profile_query(db: Session, profile: models.UserProfile) -> FeedQuery:
+    """The feed a saved profile follows: its best-matching tribes, interests and location.
+
+    Expects `tribe_index` and `tribe_geo` to be loaded.
+    """
+    stored = profile_tags(db, [profile.id])[profile.id]
+    places = [p for p in (profile.location_city, profile.location_country) if p]
+    near = None
+    if profile.location_lat is not None and profile.location_lng is not None:
+        near = (profile.location_lat, profile.location_lng)
+    matched = tribe_index.top_k(stored["interest"], stored["skill"], places, k=MATCHED_TRIBES, near=near)
+    return FeedQuery(
+        tribes=frozenset(tribe.id for tribe, score in matched if score > 0),
+        places=frozenset(tuple(tokenize(p)) for p in places if tokenize(p)),
+        interests=frozenset(tuple(tokenize(i)) for i in stored["interest"] if tokenize(i)),
+        near=near,
+    )
+
+
+event_index = EventIndex(max_feeds=get_settings().event_feed_cache_size)
+changes.subscribe(models.Event, event_index.apply_changes)
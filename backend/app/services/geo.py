@@ -0,0 +1,173 @@
+import math
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .. import models
+from . import changes
+
+EARTH_RADIUS_KM = 6371.0088
+# Farthest two points on the sphere can be; a radius this large covers everything.
+_MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+_KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to arrays of points, in km."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeoIndex:
+    """In-process grid index over the `location_lat`/`location_lng` of one model.
+
+    Points are bucketed into fixed lat/lng cells, so inserts, moves and deletes from change
+    notifications are O(1). Radius queries only read the cells overlapping the search
+    circle's bounding box; k-nearest queries grow that radius until k points fall inside it.
+    """
+
+    def __init__(self, model: Type, cell_degrees: float = 1.0) -> None:
+        self.model = model
+        self.cell_degrees = cell_degrees
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._points: Dict[Any, Tuple[float, float]] = {}
+        self._cells: Dict[Tuple[int, int], Set[Any]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    # -- maintenance -------------------------------------------------------
+    def ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.rebuild(db)
+
+    def rebuild(self, db: Session) -> None:
+        rows = (
+            db.query(self.model.id, self.model.location_lat, self.model.location_lng)
+            .filter(self.model.location_lat.isnot(None), self.model.location_lng.isnot(None))
+            .all()
+        )
+        self.load(rows)
+
+    def load(self, points: Iterable[Tuple[Any, float, float]]) -> None:
+        """Replace the index contents with (id, lat, lng) triples."""
+        with self._lock:
+            self._points.clear()
+            self._cells.clear()
+            for pk, lat, lng in points:
+                self._add(pk, lat, lng)
+            self._loaded = True
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def apply_changes(self, changed: Optional[Dict[Any, Optional[Dict[str, Any]]]]) -> None:
+        if changed is None:
+            self.invalidate()
+            return
+        with self._lock:
+            if not self._loaded:
+                return
+            for pk, row in changed.items():
+                self._remove(pk)
+                if row is not None and row.get("location_lat") is not None and row.get("location_lng") is not None:
+                    self._add(pk, row["location_lat"], row["location_lng"])
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def _add(self, pk: Any, lat: float, lng: float) -> None:
+        self._points[pk] = (lat, lng)
+        self._cells[self._cell(lat, lng)].add(pk)
+
+    def _remove(self, pk: Any) -> None:
+        point = self._points.pop(pk, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(pk)
+            if not members:
+                del self._cells[cell]
+
+    # -- querying ----------------------------------------------------------
+    def _candidates(self, lat: float, lng: float, radius_km: float) -> List[Any]:
+        """Ids in every cell touching the bounding box of the search circle."""
+        dlat = radius_km / _KM_PER_DEGREE
+        lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        widest = max(abs(lat_lo), abs(lat_hi))
+        if widest >= 89.9 or radius_km >= _MAX_DISTANCE_KM / 2:
+            lng_span = 360.0
+        else:
+            lng_span = min(360.0, 2 * radius_km / (_KM_PER_DEGREE * math.cos(math.radians(widest))))
+        rows = range(self._cell(lat_lo, 0)[0], self._cell(lat_hi, 0)[0] + 1)
+        if lng_span >= 360.0:
+            columns = None
+        else:
+            start = self._cell(0, lng - lng_span / 2)[1]
+            end = self._cell(0, lng + lng_span / 2)[1]
+            columns = {self._wrap_column(c) for c in range(start, end + 1)}
+        if columns is None or len(rows) * len(columns) > len(self._cells):
+            # cheaper to walk the occupied cells than the box
+            lo, hi = rows.start, rows.stop
+            return [
+                pk
+                for (row, col), members in self._cells.items()
+                if lo <= row < hi and (columns is None or col in columns)
+                for pk in members
+            ]
+        found: List[Any] = []
+        for row in rows:
+            for col in columns:
+                members = self._cells.get((row, col))
+                if members:
+                    found.extend(members)
+        return found
+
+    def _wrap_column(self, col: int) -> int:
+        # map cell columns past the antimeridian back into [-180, 180)
+        return self._cell(0, ((col * self.cell_degrees + 180.0) % 360.0) - 180.0)[1]
+
+    def _distances(self, lat: float, lng: float, ids: List[Any]) -> np.ndarray:
+        coords = np.array([self._points[pk] for pk in ids], dtype=np.float64).reshape(-1, 2)
+        return haversine_km(lat, lng, coords[:, 0], coords[:, 1])
+
+    def within(self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None) -> List[Tuple[Any, float]]:
+        """(id, km) pairs within `radius_km`, nearest first, ties broken by id."""
+        with self._lock:
+            ids = self._candidates(lat, lng, radius_km)
+            if not ids:
+                return []
+            dist = self._distances(lat, lng, ids)
+        keep = np.flatnonzero(dist <= radius_km)
+        hits = sorted(((float(dist[i]), ids[i]) for i in keep))
+        if limit is not None:
+            hits = hits[:limit]
+        return [(pk, d) for d, pk in hits]
+
+    def nearest(self, lat: float, lng: float, k: int, max_km: Optional[float] = None) -> List[Tuple[Any, float]]:
+        """The `k` closest (id, km) pairs, optionally no farther than `max_km`."""
+        limit = min(max_km if max_km is not None else _MAX_DISTANCE_KM, _MAX_DISTANCE_KM)
+        radius = min(self.cell_degrees * _KM_PER_DEGREE, limit)
+        while True:
+            hits = self.within(lat, lng, radius, limit=k)
+            # every point inside the radius was considered, so k hits inside it are the k nearest
+            if len(hits) >= k or radius >= limit:
+                return hits
+            radius = min(radius * 4, limit)
+
+
+tribe_geo = GeoIndex(models.Tribe)
+cause_geo = GeoIndex(models.Cause)
+event_geo = GeoIndex(models.Event)
+changes.subscribe(models.Tribe, tribe_geo.apply_changes)
+changes.subscribe(models.Cause, cause_geo.apply_changes)
+changes.subscribe(models.Event, event_geo.apply_changes)
@@ -0,0 +1,74 @@
+from typing import Any, Dict
+
+from ..db import SessionLocal
+from .ai import rerank_tribes_with_ai
+from .donations import record_stripe_event
+from .embeddings import tribe_embeddings
+from .jobs import job_queue
+from .probono import run_matching, schedule_next_match
+from .rollups import rebuild as rebuild_rollups, schedule_next_rebuild
+from .search import search_service
+from .transcripts import persist_ai_turn
+
+
+@job_queue.handler("stripe.event", max_attempts=8)
+def handle_stripe_event(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        record_stripe_event(db, payload)
+    finally:
+        db.close()
+
+
+@job_queue.handler("onboarding.persist_turn")
+def handle_persist_turn(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        persist_ai_turn(db, **payload)
+    finally:
+        db.close()
+
+
+@job_queue.handler("ai.rerank", max_attempts=3)
+async def handle_rerank(payload: Dict[str, Any]) -> None:
+    # fills the re-rank cache; the next identical suggest-tribes request is served from it
+    await rerank_tribes_with_ai(payload["tribes"], payload["interests"], payload["skills"], payload["locations"])
+
+
+@job_queue.handler("search.index")
+def handle_search_index(payload: Dict[str, Any]) -> None:
+    # ids None means a bulk write touched unknown rows: rebuild the whole kind
+    db = SessionLocal()
+    try:
+        if payload["ids"] is None:
+            search_service.reindex(db, [payload["kind"]])
+        else:
+            search_service.refresh(db, payload["kind"], payload["ids"])
+    finally:
+        db.close()
+
+
+@job_queue.handler("embeddings.sync", max_attempts=3)
+async def handle_embeddings_sync(payload: Dict[str, Any]) -> None:
+    await tribe_embeddings.sync()
+
+
+@job_queue.handler("stats.rebuild", max_attempts=3)
+def handle_stats_rebuild(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db)
+    finally:
+        db.close()
+        # even when this run fails for good: a dead-lettered run must not end the schedule
+        schedule_next_rebuild()
+
+
+@job_queue.handler("probono.match", max_attempts=3)
+def handle_probono_match(payload: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        run_matching(db)
+    finally:
+        db.close()
+        schedule_next_match()
@@ -0,0 +1,288 @@
+import asyncio
+import datetime as dt
+import inspect
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from .. import models
+from ..core.config import get_settings
+from ..db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+_LATENCY_SAMPLES = 1024
+
+
+@dataclass
+class _Registration:
+    handler: Handler
+    max_attempts: int
+
+
+@dataclass
+class JobStats:
+    enqueued: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    dead: int = 0
+    wait_seconds: List[float] = field(default_factory=list)
+    run_seconds: List[float] = field(default_factory=list)
+
+    @staticmethod
+    def observe(samples: List[float], value: float) -> None:
+        samples.append(value)
+        if len(samples) > _LATENCY_SAMPLES:
+            del samples[: len(samples) - _LATENCY_SAMPLES]
+
+    def as_dict(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead": self.dead,
+            "wait_seconds": _summary(self.wait_seconds),
+            "run_seconds": _summary(self.run_seconds),
+        }
+
+
+def _summary(samples: List[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        "max": ordered[-1],
+    }
+
+
+class JobQueue:
+    """Durable in-process job queue backed by the `jobs` table.
+
+    Jobs are rows, so they survive restarts and can be claimed by any worker process;
+    claiming is an optimistic conditional UPDATE. Worker coroutines run on the app's event
+    loop: async handlers are awaited there, sync handlers go to the threadpool. Failed
+    jobs are retried with exponential backoff and dead-lettered after `max_attempts`.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, visibility_timeout: float = 300.0) -> None:
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self._handlers: Dict[str, _Registration] = {}
+        self._stats: Dict[str, JobStats] = {}
+        self._stats_lock = threading.Lock()
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def handler(self, kind: str, max_attempts: int = 5) -> Callable[[Handler], Handler]:
+        def register(fn: Handler) -> Handler:
+            self._handlers[kind] = _Registration(fn, max_attempts)
+            return fn
+
+        return register
+
+    def _kind_stats(self, kind: str) -> JobStats:
+        with self._stats_lock:
+            return self._stats.setdefault(kind, JobStats())
+
+    def _incr(self, kind: str, counter: str) -> None:
+        with self._stats_lock:
+            stats = self._stats.setdefault(kind, JobStats())
+            setattr(stats, counter, getattr(stats, counter) + 1)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._stats_lock:
+            return {kind: s.as_dict() for kind, s in self._stats.items()}
+
+    # -- producing ---------------------------------------------------------
+    def enqueue(
+        self, kind: str, payload: Dict[str, Any], delay: float = 0, dedupe_key: Optional[str] = None
+    ) -> Optional[int]:
+        """Persist a job and wake the workers. Returns None when `dedupe_key` is already pending.
+
+        The handler may be registered in another process; unknown kinds use the default retry budget.
+        """
+        registration = self._handlers.get(kind)
+        now = dt.datetime.utcnow()
+        db = SessionLocal()
+        try:
+            job = models.Job(
+                kind=kind,
+                payload_json=json.dumps(payload),
+                max_attempts=registration.max_attempts if registration else 5,
+                run_after=now + dt.timedelta(seconds=delay),
+                dedupe_key=dedupe_key,
+                created_at=now,
+            )
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return None
+            job_id = job.id
+        finally:
+            db.close()
+        self._incr(kind, "enqueued")
+        self._wake()
+        return job_id
+
+    def _wake(self) -> None:
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            if asyncio.get_running_loop() is self._loop:
+                self._wakeup.set()
+                return
+        except RuntimeError:
+            pass
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # -- consuming ---------------------------------------------------------
+    async def start(self, concurrency: int) -> None:
+        if self._workers:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = self._wakeup = None
+
+    async def drain(self, timeout: float = 60.0) -> bool:
+        """Wait until no job is due or running (benchmarks and tests); jobs scheduled for later don't count."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not await run_in_threadpool(self._has_pending):
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    def _has_pending(self) -> bool:
+        db = SessionLocal()
+        try:
+            due = and_(models.Job.status == "queued", models.Job.run_after <= dt.datetime.utcnow())
+            return db.execute(
+                select(models.Job.id).where(or_(models.Job.status == "running", due)).limit(1)
+            ).first() is not None
+        finally:
+            db.close()
+
+    async def _worker(self) -> None:
+        while True:
+            # clear before claiming so an enqueue racing with an empty claim still wakes us
+            self._wakeup.clear()
+            try:
+                job = await run_in_threadpool(self._claim)
+            except Exception:
+                logger.exception("job claim failed")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    def _claim(self) -> Optional[models.Job]:
+        now = dt.datetime.utcnow()
+        stale = now - dt.timedelta(seconds=self.visibility_timeout)
+        claimable = or_(
+            and_(models.Job.status == "queued", models.Job.run_after <= now),
+            # a worker died mid-job; hand it to someone else
+            and_(models.Job.status == "running", models.Job.started_at < stale),
+        )
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            candidates = db.execute(
+                select(models.Job.id).where(claimable).order_by(models.Job.run_after, models.Job.id).limit(8)
+            ).scalars().all()
+            for job_id in candidates:
+                claimed = db.execute(
+                    update(models.Job)
+                    .where(models.Job.id == job_id, claimable)
+                    .values(status="running", started_at=now, attempts=models.Job.attempts + 1)
+                )
+                db.commit()
+                if claimed.rowcount == 1:
+                    return db.get(models.Job, job_id)
+            return None
+        finally:
+            db.close()
+
+    async def _run(self, job: models.Job) -> None:
+        stats = self._kind_stats(job.kind)
+        stats.observe(stats.wait_seconds, max(0.0, (job.started_at - job.run_after).total_seconds()))
+        registration = self._handlers.get(job.kind)
+        started = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            if registration is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            payload = json.loads(job.payload_json)
+            if inspect.iscoroutinefunction(registration.handler):
+                await registration.handler(payload)
+            else:
+                await run_in_threadpool(registration.handler, payload)
+        except Exception as exc:
+            logger.exception("job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+            error = f"{type(exc).__name__}: {exc}"
+        stats.observe(stats.run_seconds, time.perf_counter() - started)
+        await run_in_threadpool(self._finish, job, error)
+
+    def _finish(self, job: models.Job, error: Optional[str]) -> None:
+        now = dt.datetime.utcnow()
+        if error is None:
+            values = dict(status="succeeded", finished_at=now, last_error=None, dedupe_key=None)
+            outcome = "succeeded"
+        elif job.attempts >= job.max_attempts:
+            values = dict(status="dead", finished_at=now, last_error=error, dedupe_key=None)
+            outcome = "dead"
+        else:
+            backoff = min(300.0, 2.0 ** job.attempts)
+            values = dict(status="queued", run_after=now + dt.timedelta(seconds=backoff), last_error=error)
+            outcome = "retried"
+        db = SessionLocal()
+        try:
+            db.execute(update(models.Job).where(models.Job.id == job.id).values(**values))
+            db.commit()
+        finally:
+            db.close()
+        self._incr(job.kind, outcome)
+
+    def requeue_dead(self, kind: Optional[str] = None) -> int:
+        """Move dead-lettered jobs back to the queue with a fresh attempt budget."""
+        db = SessionLocal()
+        try:
+            query = update(models.Job).where(models.Job.status == "dead")
+            if kind:
+                query = query.where(models.Job.kind == kind)
+            result = db.execute(query.values(status="queued", attempts=0, run_after=dt.datetime.utcnow()))
+            db.commit()
+        finally:
+            db.close()
+        self._wake()
+        return result.rowcount
+
+
+job_queue = JobQueue(
+    poll_interval=get_settings().job_poll_interval_seconds,
+    visibility_timeout=get_settings().job_visibility_timeout_seconds,
+)
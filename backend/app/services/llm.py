@@ -0,0 +1,147 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+from ..core.config import get_settings
+from .metrics import outbound
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    import openai
+
+    if isinstance(exc, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(exc, openai.APIStatusError) and exc.status_code in (408, 409)
+
+
+class LLMClient:
+    """Shared async OpenAI client: pooled connections, bounded concurrency, retries with backoff."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        max_concurrency: int = 16,
+        max_attempts: int = 3,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ) -> None:
+        # the SDK and its HTTP stack load with the first client, not with every worker
+        import httpx
+        from openai import AsyncOpenAI
+
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+            transport=transport,
+        )
+        # Retries are handled here so they also respect the concurrency limit.
+        self._openai = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=self._http, max_retries=0)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _retrying(self) -> AsyncRetrying:
+        return AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_exponential_jitter(initial=0.5, max=8),
+            retry=retry_if_exception(_is_retryable),
+            reraise=True,
+        )
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = DEFAULT_MODEL,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> str:
+        """Run a chat completion and return the first choice's content ("" when empty)."""
+        async with self._semaphore:
+            async for attempt in self._retrying():
+                with attempt, outbound("openai", "chat"):
+                    completion = await self._openai.chat.completions.create(
+                        model=model, messages=messages, timeout=timeout or self.timeout, **kwargs
+                    )
+        return completion.choices[0].message.content or ""
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = DEFAULT_MODEL,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas as they arrive. Only opening the stream is retried."""
+        async with self._semaphore:
+            async for attempt in self._retrying():
+                with attempt, outbound("openai", "chat_stream_open"):
+                    stream = await self._openai.chat.completions.create(
+                        model=model, messages=messages, timeout=timeout or self.timeout, stream=True, **kwargs
+                    )
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+
+    async def embeddings(
+        self, texts: List[str], model: str, dimensions: Optional[int] = None, timeout: Optional[float] = None
+    ) -> List[List[float]]:
+        """Embedding vectors for `texts`, in input order."""
+        extra = {"dimensions": dimensions} if dimensions else {}
+        async with self._semaphore:
+            async for attempt in self._retrying():
+                with attempt, outbound("openai", "embeddings"):
+                    response = await self._openai.embeddings.create(
+                        model=model, input=texts, timeout=timeout or self.timeout, **extra
+                    )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> Optional[LLMClient]:
+    """The process-wide client, or None when OpenAI is not configured or installed."""
+    global _client
+    settings = get_settings()
+    if not settings.openai_api_key:
+        return None
+    if _client is None:
+        try:
+            _client = LLMClient(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                timeout=settings.openai_timeout_seconds,
+                max_connections=settings.openai_max_connections,
+                max_concurrency=settings.openai_max_concurrency,
+                max_attempts=settings.openai_max_attempts,
+            )
+        except ImportError:
+            return None
+    return _client
+
+
+def configure_llm_client(client: Optional[LLMClient]) -> None:
+    """Swap the process-wide client, e.g. for one on a stub transport (benchmarks, tests)."""
+    global _client
+    _client = client
+
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,208 @@
+"""Request, SQL and outbound-call instrumentation rendered in Prometheus text format.
+
+Nothing is hooked in unless METRICS_ENABLED is set: `install` adds the ASGI middleware and
+the SQLAlchemy cursor listeners, and `outbound` is a bare `yield` while disabled. The
+existing cache, token and job counters are always collected and are exported either way.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects it."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[LabelValues, List] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, n) for labels, (counts, total, n) in self._series.items()}
+        for label_values, (counts, total, n) in sorted(series.items()):
+            base = list(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(base + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(base)} {total}")
+            lines.append(f"{self.name}_count{_labels(base)} {n}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _sample(name: str, value: float, /, **labels: str) -> str:
+    return f"{name}{_labels(sorted(labels.items()))} {value}"
+
+
+http_latency = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body.", ("method", "route", "status"), LATENCY_BUCKETS
+)
+http_db_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed while serving a request.", ("route",), QUERY_COUNT_BUCKETS
+)
+http_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements while serving a request.", ("route",), LATENCY_BUCKETS
+)
+db_query_seconds = Histogram(
+    "db_query_duration_seconds", "Every SQL statement, in or out of a request.", ("engine",), LATENCY_BUCKETS
+)
+outbound_seconds = Histogram(
+    "outbound_request_duration_seconds", "Calls to external services.", ("service", "operation", "outcome"), LATENCY_BUCKETS
+)
+HISTOGRAMS = (http_latency, http_db_queries, http_db_seconds, db_query_seconds, outbound_seconds)
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+# Set by the middleware; run_in_threadpool and AsyncSession greenlets inherit it.
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_metrics", default=None)
+_enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def outbound(service: str, operation: str) -> Iterator[None]:
+    """Time a call to OpenAI, Stripe, ...; the outcome label is "error" when it raises."""
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        outbound_seconds.observe(time.perf_counter() - started, service, operation, outcome)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    db_query_seconds.observe(elapsed, conn.engine.url.get_backend_name())
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_started"):
+        conn.info["metrics_started"].pop()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses are timed to their last byte."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = "500"
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            # templated path keeps the label set bounded; unmatched URLs share one series
+            path = getattr(route, "path", None) or "unmatched"
+            http_latency.observe(time.perf_counter() - started, scope["method"], path, status)
+            http_db_queries.observe(stats.queries, path)
+            http_db_seconds.observe(stats.db_seconds, path)
+
+
+def install(app, engines: Sequence[Engine]) -> None:
+    """Turn instrumentation on: wrap `app` and listen to cursor executions on `engines`."""
+    global _enabled
+    if _enabled:
+        return
+    app.add_middleware(MetricsMiddleware)
+    for engine in dict.fromkeys(engines):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+    _enabled = True
+
+
+def sample_lines(name: str, help: str, samples: Sequence[Tuple[Dict[str, str], float]], kind: str = "counter") -> List[str]:
+    """Exposition lines for already-aggregated values, e.g. the cache and job stats."""
+    if not samples:
+        return []
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}"] + [_sample(name, value, **labels) for labels, value in samples]
+
+
+def render() -> List[str]:
+    """The on/off gauge plus, while instrumentation is on, every histogram."""
+    lines = ["# TYPE app_metrics_enabled gauge", _sample("app_metrics_enabled", int(_enabled))]
+    if _enabled:
+        for histogram in HISTOGRAMS:
+            lines.extend(histogram.render())
+    return lines
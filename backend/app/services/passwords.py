@@ -0,0 +1,83 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from .. import security
+from ..core.config import get_settings
+
+T = TypeVar("T")
+
+
+class PasswordQueueFull(Exception):
+    """Raised when too many password operations are already waiting for a worker."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, size-limited pool instead of the shared request threadpool.
+
+    bcrypt releases the GIL, so threads scale across cores; a process pool is available for
+    interpreters where that does not hold. At most `max_pending` operations may be queued or
+    running; beyond that callers get PasswordQueueFull and should shed load.
+    """
+
+    def __init__(self, workers: int, max_pending: int, executor: str = "thread") -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor = (
+            ProcessPoolExecutor(max_workers=workers)
+            if executor == "process"
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordQueueFull()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash uses an outdated cost."""
+        return await self._run(security.verify_and_update_password, password, hashed)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        settings = get_settings()
+        workers = settings.password_hash_workers or os.cpu_count() or 1
+        _hasher = PasswordHasher(
+            workers=workers,
+            max_pending=settings.password_hash_max_pending or workers * 8,
+            executor=settings.password_hash_executor,
+        )
+    return _hasher
+
+
+def configure_password_hasher(hasher: PasswordHasher) -> None:
+    """Swap the process-wide hasher (benchmarks, tests)."""
+    global _hasher
+    if _hasher is not None and _hasher is not hasher:
+        _hasher.shutdown()
+    _hasher = hasher
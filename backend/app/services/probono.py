@@ -0,0 +1,318 @@
+"""Matching pro-bono offers to the skills causes ask for.
+
+Offers carry free-text skills ("Python, UX design; bookkeeping") and an hour budget; causes
+declare needs as one skill and an hour count each. A run splits and normalizes every offer's
+skills into a token index, shortlists the best offers per need by skill overlap, available
+hours and location, then hands out hours greedily, best-scoring pair first, until offers or
+needs run dry. The allocation replaces `pro_bono_matches` in one transaction.
+"""
+import datetime as dt
+import logging
+import re
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import get_settings
+from .geo import EARTH_RADIUS_KM, haversine_km
+from .jobs import job_queue
+from .tags import normalize_tag
+from .text import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Weights of the offer/need score. Skill overlap dominates; the rest orders similar offers.
+SKILL_WEIGHT = 3.0
+HOURS_WEIGHT = 1.0
+LOCATION_WEIGHT = 1.0
+# The volunteer offered their time to this very cause.
+SAME_CAUSE_WEIGHT = 0.5
+# Offers within LOCATION_RADIUS_KM get up to LOCATION_WEIGHT, decaying linearly to zero at the edge.
+LOCATION_RADIUS_KM = 100.0
+# Share of a need's skill tokens one of the offer's skills must cover.
+MIN_COVERAGE = 0.5
+# Offers kept per need before allocation; bounds the pairs the greedy pass sorts.
+CANDIDATES_PER_NEED = 50
+_MAX_PHRASES = 64
+_KM_PER_DEGREE = 2 * np.pi * EARTH_RADIUS_KM / 360
+
+_SPLIT_RE = re.compile(r"[,;/|+&\n]+|\band\b", re.IGNORECASE)
+
+
+def parse_skills(text: Optional[str]) -> List[str]:
+    """Normalized skill phrases of a free-text skills field, in order, without duplicates."""
+    seen: Dict[str, None] = {}
+    for part in _SPLIT_RE.split(text or ""):
+        skill = normalize_tag(part)
+        if skill and tokenize(skill):
+            seen.setdefault(skill, None)
+    return list(seen)
+
+
+@dataclass(frozen=True)
+class Offer:
+    id: int
+    cause_id: int
+    skills: str
+    hours: int
+    location: Optional[str] = None
+    location_lat: Optional[float] = None
+    location_lng: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Need:
+    id: int
+    cause_id: int
+    skill: str
+    hours: int
+    location: Optional[str] = None
+    location_lat: Optional[float] = None
+    location_lng: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Allocation:
+    offer_id: int
+    need_id: int
+    cause_id: int
+    hours: int
+    score: float
+
+
+class SkillIndex:
+    """Offer columns as arrays plus postings from skill token to (offer row, phrase) keys.
+
+    Built once per run; `shortlist` scores every offer sharing a token with a need in
+    vectorized form, so a need costs one pass over its postings, not over all offers.
+    """
+
+    def __init__(self, offers: Sequence[Offer]) -> None:
+        self.offers = list(offers)
+        self.hours = np.array([o.hours for o in self.offers], dtype=np.float64)
+        self.cause_ids = np.array([o.cause_id for o in self.offers], dtype=np.int64)
+        self.lats = np.array([np.nan if o.location_lat is None else o.location_lat for o in self.offers], dtype=np.float64)
+        self.lngs = np.array([np.nan if o.location_lng is None else o.location_lng for o in self.offers], dtype=np.float64)
+        self._places: Dict[str, int] = {}
+        self.place_ids = np.array([self.place_id(o.location) for o in self.offers], dtype=np.int64)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for row, offer in enumerate(self.offers):
+            for phrase_no, skill in enumerate(parse_skills(offer.skills)[:_MAX_PHRASES]):
+                for tok in set(tokenize(skill)):
+                    postings[tok].append(row * _MAX_PHRASES + phrase_no)
+        self._postings = {tok: np.array(keys, dtype=np.int64) for tok, keys in postings.items()}
+        self._coverage: Dict[FrozenSet[str], Tuple[np.ndarray, np.ndarray]] = {}
+        self._candidate_cache: Dict[FrozenSet[str], Tuple[np.ndarray, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.offers)
+
+    def place_id(self, location: Optional[str], add: bool = True) -> int:
+        place = normalize_tag(location or "")
+        if not place:
+            return -1
+        if add:
+            return self._places.setdefault(place, len(self._places))
+        return self._places.get(place, -1)
+
+    def coverage(self, tokens: FrozenSet[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(offer rows, best share of `tokens` one of their skills covers), rows ascending."""
+        cached = self._coverage.get(tokens)
+        if cached is not None:
+            return cached
+        hits = [self._postings[tok] for tok in tokens if tok in self._postings]
+        if not hits or not tokens:
+            result = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+        else:
+            keys, counts = np.unique(np.concatenate(hits), return_counts=True)
+            rows = keys // _MAX_PHRASES
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            result = (rows[starts], np.maximum.reduceat(counts, starts) / len(tokens))
+        self._coverage[tokens] = result
+        return result
+
+    def _candidates(self, skill: str) -> Tuple[np.ndarray, ...]:
+        """Offers covering enough of `skill`, with their columns gathered once per distinct skill."""
+        tokens = frozenset(tokenize(skill))
+        cached = self._candidate_cache.get(tokens)
+        if cached is None:
+            rows, share = self.coverage(tokens)
+            keep = share >= MIN_COVERAGE
+            rows = rows[keep]
+            cached = self._candidate_cache[tokens] = (
+                rows, share[keep], self.hours[rows], self.cause_ids[rows], self.lats[rows], self.lngs[rows], self.place_ids[rows]
+            )
+        return cached
+
+    def shortlist(self, need: Need, k: int = CANDIDATES_PER_NEED) -> List[Tuple[int, float]]:
+        """Up to `k` (offer row, score) pairs for `need`, best first."""
+        rows, share, hours, cause_ids, lats, lngs, place_ids = self._candidates(need.skill)
+        if not len(rows):
+            return []
+        score = SKILL_WEIGHT * share
+        score += HOURS_WEIGHT * np.minimum(1.0, hours / max(need.hours, 1))
+        score += SAME_CAUSE_WEIGHT * (cause_ids == need.cause_id)
+        near = np.zeros(len(rows))
+        if need.location_lat is not None and need.location_lng is not None:
+            # an offer farther north or south than the radius is out of reach whatever its longitude;
+            # the band check is cheap and leaves haversine only the few offers in the region (NaN drops out)
+            band = np.flatnonzero(np.abs(lats - need.location_lat) <= LOCATION_RADIUS_KM / _KM_PER_DEGREE)
+            if len(band):
+                km = haversine_km(need.location_lat, need.location_lng, lats[band], lngs[band])
+                near[band] = np.clip(1.0 - km / LOCATION_RADIUS_KM, 0.0, None)
+        place = self.place_id(need.location, add=False)
+        if place >= 0:
+            near = np.maximum(near, place_ids == place)
+        score += LOCATION_WEIGHT * near
+        top = np.arange(len(rows))
+        if len(rows) > k:
+            top = np.argpartition(-score, k - 1)[:k]
+        top = top[np.lexsort((rows[top], -score[top]))]
+        return [(int(rows[i]), float(score[i])) for i in top]
+
+
+def allocate(offers: Sequence[Offer], needs: Sequence[Need], candidates_per_need: int = CANDIDATES_PER_NEED) -> List[Allocation]:
+    """Greedy allocation: walk all shortlisted pairs best first, giving each need as many of
+    the offer's remaining hours as it still lacks. An offer may be split across needs."""
+    index = SkillIndex([o for o in offers if o.hours > 0])
+    live = [need for need in needs if need.hours > 0]
+    scores, need_nos, rows = [], [], []
+    for need_no, need in enumerate(live):
+        for row, score in index.shortlist(need, candidates_per_need):
+            scores.append(score)
+            need_nos.append(need_no)
+            rows.append(row)
+    # best score first; ties go to the earlier need, then the earlier offer
+    order = np.lexsort((rows, need_nos, -np.array(scores)))
+    offer_left = index.hours.astype(np.int64)
+    need_left = [need.hours for need in live]
+    out = []
+    for i in order:
+        row, need_no = rows[i], need_nos[i]
+        hours = min(int(offer_left[row]), need_left[need_no])
+        if hours <= 0:
+            continue
+        offer_left[row] -= hours
+        need_left[need_no] -= hours
+        need = live[need_no]
+        out.append(Allocation(index.offers[row].id, need.id, need.cause_id, hours, round(scores[i], 4)))
+    return out
+
+
+@dataclass
+class MatchReport:
+    offers: int = 0
+    needs: int = 0
+    matches: int = 0
+    hours_offered: int = 0
+    hours_needed: int = 0
+    hours_matched: int = 0
+    seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def load(db: Session) -> Tuple[List[Offer], List[Need]]:
+    """Offers with hours and every declared need, with cause locations filled in."""
+    c = models.Cause
+    places = {
+        row.id: (row.location, row.location_lat, row.location_lng)
+        for row in db.execute(select(c.id, c.location, c.location_lat, c.location_lng))
+    }
+    o = models.ProBonoOffer
+    offers = []
+    for row in db.execute(
+        select(o.id, o.cause_id, o.skills, o.hours, o.location, o.location_lat, o.location_lng).where(o.hours > 0)
+    ):
+        location, lat, lng = row.location, row.location_lat, row.location_lng
+        if location is None and lat is None:
+            location, lat, lng = places.get(row.cause_id, (None, None, None))
+        offers.append(Offer(row.id, row.cause_id, row.skills or "", row.hours, location, lat, lng))
+    n = models.CauseSkillNeed
+    needs = [
+        Need(row.id, row.cause_id, row.skill, row.hours, *places.get(row.cause_id, (None, None, None)))
+        for row in db.execute(select(n.id, n.cause_id, n.skill, n.hours).order_by(n.id))
+    ]
+    return offers, needs
+
+
+def run_matching(db: Session) -> MatchReport:
+    """Recompute every allocation and replace the stored matches; commits."""
+    started = time.perf_counter()
+    offers, needs = load(db)
+    allocations = allocate(offers, needs)
+    now = dt.datetime.utcnow()
+    db.execute(delete(models.ProBonoMatch))
+    if allocations:
+        db.execute(insert(models.ProBonoMatch), [{**asdict(a), "created_at": now} for a in allocations])
+    db.commit()
+    report = MatchReport(
+        offers=len(offers),
+        needs=len(needs),
+        matches=len(allocations),
+        hours_offered=sum(o.hours for o in offers),
+        hours_needed=sum(need.hours for need in needs),
+        hours_matched=sum(a.hours for a in allocations),
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    logger.info("pro-bono matching: %s", report.to_dict())
+    return report
+
+
+def set_needs(db: Session, cause_id: int, needs: Iterable[Tuple[str, int]]) -> List[models.CauseSkillNeed]:
+    """Replace a cause's skill needs with (label, hours) pairs; the caller commits.
+
+    Labels normalizing to the same skill are merged, their hours added up.
+    """
+    merged: Dict[str, List] = {}
+    for label, hours in needs:
+        label = " ".join(label.split())[:100]
+        skill = normalize_tag(label)
+        if not skill:
+            continue
+        entry = merged.setdefault(skill, [label, 0])
+        entry[1] += hours
+    n = models.CauseSkillNeed
+    # the old rows' matches are stale anyway; the next run allocates against the new ones
+    stale = select(n.id).where(n.cause_id == cause_id)
+    db.execute(delete(models.ProBonoMatch).where(models.ProBonoMatch.need_id.in_(stale)))
+    db.execute(delete(n).where(n.cause_id == cause_id))
+    rows = [n(cause_id=cause_id, skill=skill, label=label, hours=hours) for skill, (label, hours) in merged.items()]
+    db.add_all(rows)
+    db.flush()
+    return rows
+
+
+def schedule_match() -> Optional[int]:
+    """Queue an immediate run; requests made while one is pending collapse into it."""
+    return job_queue.enqueue("probono.match", {}, dedupe_key="probono.match:now")
+
+
+def schedule_next_match() -> Optional[int]:
+    """Queue the periodic run for the start of the next interval; a no-op when disabled."""
+    interval = get_settings().probono_match_interval_seconds
+    if interval <= 0:
+        return None
+    slot = int(time.time() // interval) + 1
+    return job_queue.enqueue(
+        "probono.match", {}, delay=slot * interval - time.time(), dedupe_key=f"probono.match:{slot}"
+    )
+
+
+if __name__ == "__main__":
+    import json
+
+    from ..db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(run_matching(db).to_dict()))
+    finally:
+        db.close()
@@ -0,0 +1,263 @@
+"""Token-bucket rate limits for the endpoints that spend OpenAI money.
+
+A limiter refills `capacity` tokens every `per_seconds` and a request takes one token from
+each of its buckets (caller, and the onboarding session when there is one), all or
+nothing. Buckets live in process memory by default; the SQLite backend shares them between
+the workers on one host. Decisions are counted per limiter for /api/metrics.
+"""
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Protocol, Sequence, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+from ..core.config import get_settings
+from . import metrics
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    # seconds until the request would pass; 0 when allowed
+    retry_after: float = 0.0
+    # key of the first bucket that ran dry
+    limited_by: Optional[str] = None
+
+
+class Buckets(Protocol):
+    blocking: bool
+
+    def take(self, keys: Sequence[str], capacity: float, rate: float, now: float) -> Tuple[bool, Dict[str, float]]:
+        """Take one token from every bucket if each has one; returns (taken, levels before taking)."""
+        ...
+
+
+class MemoryBuckets:
+    """Per-process buckets; the least recently used ones are dropped past `max_keys` (a dropped
+    bucket comes back full, which only ever errs on the lenient side)."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+
+    def take(self, keys: Sequence[str], capacity: float, rate: float, now: float) -> Tuple[bool, Dict[str, float]]:
+        with self._lock:
+            levels = {}
+            for key in keys:
+                tokens, updated = self._data.get(key, (capacity, now))
+                levels[key] = min(capacity, tokens + (now - updated) * rate)
+            taken = all(level >= 1 for level in levels.values())
+            if taken:
+                for key, level in levels.items():
+                    self._data[key] = (level - 1, now)
+                    self._data.move_to_end(key)
+                while len(self._data) > self.max_keys:
+                    self._data.popitem(last=False)
+            return taken, levels
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBuckets:
+    """Buckets in a SQLite file, so every worker on the host draws from the same ones.
+
+    Each decision is one IMMEDIATE transaction: read the buckets, write them back if taken.
+    Rows that have been full for a while are pruned every `prune_every` decisions.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, prune_every: int = 1000) -> None:
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def take(self, keys: Sequence[str], capacity: float, rate: float, now: float) -> Tuple[bool, Dict[str, float]]:
+        marks = ",".join("?" * len(keys))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = {
+                    key: (tokens, updated)
+                    for key, tokens, updated in self._conn.execute(
+                        f"SELECT key, tokens, updated_at FROM rate_buckets WHERE key IN ({marks})", list(keys)
+                    )
+                }
+                levels = {}
+                for key in keys:
+                    tokens, updated = stored.get(key, (capacity, now))
+                    levels[key] = min(capacity, tokens + (now - updated) * rate)
+                taken = all(level >= 1 for level in levels.values())
+                if taken:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                        [(key, level - 1, now) for key, level in levels.items()],
+                    )
+                self._calls += 1
+                if self._calls % self.prune_every == 0:
+                    # a bucket untouched for a full refill period is full: same as no row
+                    self._conn.execute("DELETE FROM rate_buckets WHERE updated_at < ?", (now - capacity / rate,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return taken, levels
+
+
+def make_buckets(backend: str, path: Optional[str] = None) -> Optional[Buckets]:
+    if backend == "sqlite":
+        return SQLiteBuckets(path or "./impact_ratelimit.db")
+    if backend == "memory":
+        return MemoryBuckets()
+    return None
+
+
+def parse_rate(spec: str) -> Optional[Tuple[int, float]]:
+    """"20/60" -> (20 requests, per 60 seconds); empty or "0" disables the limit."""
+    spec = (spec or "").strip()
+    if not spec or spec == "0":
+        return None
+    count, _, seconds = spec.partition("/")
+    capacity, per_seconds = int(count), float(seconds or 1)
+    if capacity <= 0 or per_seconds <= 0:
+        return None
+    return capacity, per_seconds
+
+
+class RateLimiter:
+    def __init__(self, name: str, capacity: int, per_seconds: float, buckets: Buckets) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.per_seconds = per_seconds
+        self.rate = capacity / per_seconds
+        self.buckets = buckets
+
+    def check(self, keys: Sequence[str]) -> Decision:
+        taken, levels = self.buckets.take([f"{self.name}:{key}" for key in keys], self.capacity, self.rate, time.time())
+        if taken:
+            remaining = int(min(levels.values()) - 1) if levels else self.capacity
+            decision = Decision(True, self.capacity, remaining)
+        else:
+            short = {key: levels[f"{self.name}:{key}"] for key in keys if levels[f"{self.name}:{key}"] < 1}
+            limited_by = next(iter(short))
+            decision = Decision(
+                False, self.capacity, 0,
+                retry_after=max((1 - level) / self.rate for level in short.values()),
+                limited_by=limited_by,
+            )
+        _record(self.name, decision)
+        return decision
+
+
+_stats_lock = threading.Lock()
+# (limiter, outcome) -> count; (limiter, key kind) -> requests denied by that kind of bucket
+_decisions: Dict[Tuple[str, str], int] = defaultdict(int)
+_limited_by: Dict[Tuple[str, str], int] = defaultdict(int)
+
+
+def _record(name: str, decision: Decision) -> None:
+    with _stats_lock:
+        _decisions[(name, "allowed" if decision.allowed else "limited")] += 1
+        if decision.limited_by is not None:
+            _limited_by[(name, decision.limited_by.split(":", 1)[0])] += 1
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    with _stats_lock:
+        out: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for (name, outcome), count in _decisions.items():
+            out[name][outcome] = count
+        for (name, kind), count in _limited_by.items():
+            out[name][f"limited_by_{kind}"] = count
+        return dict(out)
+
+
+def metric_lines() -> List[str]:
+    with _stats_lock:
+        decisions, limited_by = dict(_decisions), dict(_limited_by)
+    lines = metrics.sample_lines(
+        "ratelimit_decisions_total", "Rate limiter decisions.",
+        [({"limiter": name, "outcome": outcome}, count) for (name, outcome), count in sorted(decisions.items())],
+    )
+    lines += metrics.sample_lines(
+        "ratelimit_limited_total", "Denied requests by the kind of bucket that ran dry (ip, user, session).",
+        [({"limiter": name, "key": kind}, count) for (name, kind), count in sorted(limited_by.items())],
+    )
+    return lines
+
+
+@lru_cache
+def _buckets() -> Optional[Buckets]:
+    settings = get_settings()
+    return make_buckets(settings.rate_limit_backend, settings.rate_limit_path)
+
+
+@lru_cache
+def get_limiter(name: str) -> Optional[RateLimiter]:
+    """The limiter configured as RATE_LIMIT_<NAME>, or None when it or the backend is off."""
+    rate = parse_rate(getattr(get_settings(), f"rate_limit_{name}"))
+    buckets = _buckets() if rate is not None else None
+    if buckets is None:
+        return None
+    return RateLimiter(name, rate[0], rate[1], buckets)
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address; behind the trusted proxy (RATE_LIMIT_TRUST_FORWARDED) the one it reports.
+
+    nginx overwrites X-Real-IP with the peer it saw; X-Forwarded-For only gets that peer appended,
+    so its leftmost entries are whatever the client sent and only the last one can be trusted.
+    """
+    if get_settings().rate_limit_trust_forwarded:
+        real_ip = request.headers.get("x-real-ip", "").strip()
+        if real_ip:
+            return real_ip
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce(name: str, request: Request, user_id: Optional[int] = None, session_id: Optional[str] = None) -> None:
+    """Raise 429 unless the caller's buckets have a token left.
+
+    Signed-in callers are keyed on their user id rather than their IP, so a shared office or
+    carrier NAT does not throttle everyone behind it; the onboarding session adds a bucket.
+    """
+    limiter = get_limiter(name)
+    if limiter is None:
+        return
+    keys = [f"user:{user_id}" if user_id is not None else f"ip:{client_ip(request)}"]
+    if session_id:
+        keys.append(f"session:{session_id}")
+    if limiter.buckets.blocking:
+        decision = await run_in_threadpool(limiter.check, keys)
+    else:
+        decision = limiter.check(keys)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={
+                "Retry-After": str(max(1, math.ceil(decision.retry_after))),
+                "X-RateLimit-Limit": str(decision.limit),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
@@ -0,0 +1,118 @@
+import datetime as dt
+import hashlib
+from dataclasses import dataclass
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Tuple
+
+from fastapi import Request, Response
+
+from .cache import LRUCache
+
+
+# name -> cache, so /api/metrics can report on the caches of whichever routers are mounted
+_registry: Dict[str, "ResponseCache"] = {}
+
+
+def registered() -> Dict[str, "ResponseCache"]:
+    return dict(_registry)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: dt.datetime
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+
+class ResponseCache:
+    """Serialized JSON responses per (resource, query), dropped whenever the resource changes.
+
+    Entries carry a strong ETag and the resource's Last-Modified time so repeat requests
+    can be answered with 304 without touching the database or the serializer.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, ttl_seconds: float = 300) -> None:
+        self.name = name
+        _registry[name] = self
+        self._entries = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._generation: Dict[str, int] = {}
+        self._modified: Dict[str, dt.datetime] = {}
+
+    @property
+    def stats(self):
+        return self._entries.stats
+
+    def invalidate(self, resource: str) -> None:
+        self._generation[resource] = self._generation.get(resource, 0) + 1
+        self._modified[resource] = _now()
+
+    def last_modified(self, resource: str) -> dt.datetime:
+        return self._modified.setdefault(resource, _now())
+
+    def _key(self, resource: str, key: Tuple) -> str:
+        return repr((resource, self._generation.get(resource, 0), key))
+
+    def _store(self, resource: str, full_key: str, body: bytes, headers: Dict[str, str]) -> CachedResponse:
+        entry = CachedResponse(
+            body=body,
+            etag='"%s"' % hashlib.sha256(body).hexdigest()[:32],
+            last_modified=self.last_modified(resource),
+            headers=tuple(headers.items()),
+        )
+        self._entries.set(full_key, entry)
+        return entry
+
+    def get_or_build(
+        self,
+        resource: str,
+        key: Tuple,
+        build: Callable[[], Tuple[bytes, Dict[str, str]]],
+    ) -> CachedResponse:
+        full_key = self._key(resource, key)
+        entry = self._entries.get(full_key)
+        if entry is None:
+            entry = self._store(resource, full_key, *build())
+        return entry
+
+    async def get_or_build_async(
+        self,
+        resource: str,
+        key: Tuple,
+        build: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]],
+    ) -> CachedResponse:
+        full_key = self._key(resource, key)
+        entry = self._entries.get(full_key)
+        if entry is None:
+            entry = self._store(resource, full_key, *(await build()))
+        return entry
+
+
+def _now() -> dt.datetime:
+    return dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+
+
+def _not_modified(request: Request, entry: CachedResponse) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or entry.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional_response(request: Request, entry: CachedResponse, max_age: int = 0) -> Response:
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+        **dict(entry.headers),
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,169 @@
+"""Incrementally maintained funding aggregates behind /api/public/stats.
+
+Each recorded donation bumps its cause, category, total and day rows in the same
+transaction as the donation itself; a periodic rebuild recomputes every row from `causes`
+and `donations` to reconcile edits, bulk imports and anything written around the webhook.
+Readers only ever touch `stats_rollups`, so their cost does not grow with the donation count.
+"""
+import datetime as dt
+import logging
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import get_settings
+from . import changes
+from .jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+Rollup = models.StatsRollup
+
+
+def _cause_totals(db: Session, category: Optional[str] = None) -> dict:
+    """causes/funding_goal of a new category (or, without one, the total) row, as a rebuild would set them."""
+    c = models.Cause
+    query = select(func.count(c.id), func.coalesce(func.sum(c.funding_goal), 0))
+    if category is not None:
+        query = query.where(func.coalesce(c.category, "") == category)
+    count, goal = db.execute(query).one()
+    return dict(causes=count, funding_goal=goal)
+
+
+def _bump(db: Session, scope: str, key: str, donations: int, amount: float,
+          initial: Optional[Callable[[], dict]] = None, **absolute) -> None:
+    """Add to a rollup row, creating it when missing; `absolute` columns are overwritten and
+    `initial()` fills the other columns of a row being created."""
+    now = dt.datetime.utcnow()
+    where = (Rollup.scope == scope, Rollup.key == key)
+    values = dict(donations=Rollup.donations + donations, amount=Rollup.amount + amount, updated_at=now, **absolute)
+    if db.execute(update(Rollup).where(*where).values(**values)).rowcount:
+        return
+    created = {**(initial() if initial else {}), **absolute}
+    try:
+        with db.begin_nested():
+            db.execute(insert(Rollup).values(scope=scope, key=key, donations=donations, amount=amount, updated_at=now, **created))
+    except IntegrityError:
+        # inserted concurrently by another donation
+        db.execute(update(Rollup).where(*where).values(**values))
+
+
+def record_donation(db: Session, cause_id: int, amount: float, at: Optional[dt.datetime] = None) -> None:
+    """Fold one donation into the rollups; call after the cause's counters were updated, the caller commits."""
+    cause = db.execute(
+        select(models.Cause.name, models.Cause.category, models.Cause.funding_goal,
+               models.Cause.funds_raised, models.Cause.supporters_count).where(models.Cause.id == cause_id)
+    ).one()
+    # the cause row already holds the new totals, so copy them instead of adding
+    now = dt.datetime.utcnow()
+    cause_values = dict(label=cause.name, donations=cause.supporters_count, amount=cause.funds_raised,
+                        causes=1, funding_goal=cause.funding_goal, updated_at=now)
+    where = (Rollup.scope == "cause", Rollup.key == str(cause_id))
+    if not db.execute(update(Rollup).where(*where).values(**cause_values)).rowcount:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Rollup).values(scope="cause", key=str(cause_id), **cause_values))
+        except IntegrityError:
+            db.execute(update(Rollup).where(*where).values(**cause_values))
+    category = cause.category or ""
+    _bump(db, "category", category, 1, amount, initial=lambda: _cause_totals(db, category), label=cause.category)
+    _bump(db, "total", "", 1, amount, initial=lambda: _cause_totals(db))
+    _bump(db, "day", (at or now).date().isoformat(), 1, amount)
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every rollup row from the source tables in one transaction; returns rows written."""
+    started = time.perf_counter()
+    c = models.Cause
+    causes = select(c.id, c.name, c.category, c.funding_goal, c.funds_raised, c.supporters_count)
+    rows = [
+        dict(scope="cause", key=str(r.id), label=r.name, donations=r.supporters_count or 0,
+             amount=r.funds_raised or 0, causes=1, funding_goal=r.funding_goal or 0)
+        for r in db.execute(causes)
+    ]
+    sums = (
+        func.count(c.id), func.coalesce(func.sum(c.funding_goal), 0),
+        func.coalesce(func.sum(c.funds_raised), 0), func.coalesce(func.sum(c.supporters_count), 0),
+    )
+    category = func.coalesce(c.category, "")
+    for key, count, goal, raised, supporters in db.execute(select(category, *sums).group_by(category)):
+        rows.append(dict(scope="category", key=key, label=key or None, donations=supporters,
+                         amount=raised, causes=count, funding_goal=goal))
+    count, goal, raised, supporters = db.execute(select(*sums)).one()
+    rows.append(dict(scope="total", key="", label=None, donations=supporters, amount=raised, causes=count, funding_goal=goal))
+    d = models.Donation
+    day = func.date(d.created_at)
+    for key, donations, amount in db.execute(select(day, func.count(d.id), func.sum(d.amount)).group_by(day)):
+        rows.append(dict(scope="day", key=str(key), label=None, donations=donations, amount=amount or 0, causes=0, funding_goal=0))
+
+    now = dt.datetime.utcnow()
+    db.execute(delete(Rollup))
+    db.execute(insert(Rollup), [{**row, "updated_at": now} for row in rows])
+    db.commit()
+    changes.notify(Rollup, None)
+    logger.info("stats rollups rebuilt: %d rows in %.2fs", len(rows), time.perf_counter() - started)
+    return len(rows)
+
+
+def summary(db: Session) -> Optional[models.StatsRollup]:
+    return db.get(Rollup, ("total", ""))
+
+
+def top_causes(db: Session, limit: int = 10) -> List[models.StatsRollup]:
+    return list(db.scalars(
+        select(Rollup).where(Rollup.scope == "cause").order_by(Rollup.amount.desc(), Rollup.key).limit(limit)
+    ))
+
+
+def categories(db: Session) -> List[models.StatsRollup]:
+    return list(db.scalars(select(Rollup).where(Rollup.scope == "category").order_by(Rollup.amount.desc(), Rollup.key)))
+
+
+def daily(db: Session, days: int = 30, today: Optional[dt.date] = None) -> List[models.StatsRollup]:
+    since = ((today or dt.datetime.utcnow().date()) - dt.timedelta(days=days - 1)).isoformat()
+    return list(db.scalars(
+        select(Rollup).where(Rollup.scope == "day", Rollup.key >= since).order_by(Rollup.key)
+    ))
+
+
+def schedule_rebuild() -> Optional[int]:
+    """Queue an immediate rebuild; requests made while one is pending collapse into it."""
+    return job_queue.enqueue("stats.rebuild", {}, dedupe_key="stats.rebuild:now")
+
+
+def schedule_next_rebuild() -> Optional[int]:
+    """Queue the periodic rebuild for the start of the next interval; a no-op when disabled.
+
+    The dedupe key names the interval, so every process (and every rebuild) asking for the
+    same one shares a single job.
+    """
+    interval = get_settings().stats_rebuild_interval_seconds
+    if interval <= 0:
+        return None
+    slot = int(time.time() // interval) + 1
+    return job_queue.enqueue(
+        "stats.rebuild", {}, delay=slot * interval - time.time(), dedupe_key=f"stats.rebuild:{slot}"
+    )
+
+
+def _on_cause_change(changed) -> None:
+    # bulk writes (imports) moved unknown causes: fold them in now rather than at the next interval
+    if changed is None:
+        schedule_rebuild()
+
+
+changes.subscribe(models.Cause, _on_cause_change, remote=False)
+
+
+if __name__ == "__main__":
+    from ..db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"stats: rebuilt {rebuild(db)} rollup rows")
+    finally:
+        db.close()
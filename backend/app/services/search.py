@@ -0,0 +1,281 @@
+import logging
+import math
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import get_settings
+from . import changes
+from .jobs import job_queue
+from .text import normalize, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Searchable models and the fields indexed for each, with their BM25 field boosts.
+SEARCH_FIELDS: Dict[str, Tuple[type, Dict[str, int]]] = {
+    "tribe": (models.Tribe, {"name": 2, "description": 1, "location": 1}),
+    "cause": (models.Cause, {"name": 2, "mission": 1, "category": 1, "location": 1}),
+}
+
+_BULK_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    kind: str
+    id: int
+    score: float
+
+
+def _document(kind: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    fields = SEARCH_FIELDS[kind][1]
+    return {"id": row["id"], **{name: row.get(name) for name in fields}}
+
+
+class SearchBackend(Protocol):
+    def replace(self, kind: str, docs: Iterable[Dict[str, Any]]) -> None: ...
+
+    def upsert(self, kind: str, docs: Sequence[Dict[str, Any]]) -> None: ...
+
+    def delete(self, kind: str, ids: Sequence[int]) -> None: ...
+
+    def search(self, query: str, kinds: Sequence[str], limit: int) -> List[SearchHit]: ...
+
+
+class LocalSearchBackend:
+    """Pure-Python BM25 over in-memory postings; field boosts repeat a field's terms."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[Tuple[str, int], int]] = defaultdict(dict)
+        self._terms: Dict[Tuple[str, int], Counter] = {}
+        self._lengths: Dict[Tuple[str, int], int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @staticmethod
+    def _analyze(kind: str, doc: Dict[str, Any]) -> Counter:
+        terms: Counter = Counter()
+        for name, boost in SEARCH_FIELDS[kind][1].items():
+            for tok in tokenize(normalize(doc.get(name))):
+                terms[tok] += boost
+        return terms
+
+    def _add(self, kind: str, doc: Dict[str, Any]) -> None:
+        key = (kind, doc["id"])
+        terms = self._analyze(kind, doc)
+        self._terms[key] = terms
+        self._lengths[key] = sum(terms.values())
+        self._total_length += self._lengths[key]
+        for tok, tf in terms.items():
+            self._postings[tok][key] = tf
+
+    def _remove(self, key: Tuple[str, int]) -> None:
+        terms = self._terms.pop(key, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(key)
+        for tok in terms:
+            postings = self._postings.get(tok)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[tok]
+
+    def replace(self, kind: str, docs: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for key in [k for k in self._terms if k[0] == kind]:
+                self._remove(key)
+            for doc in docs:
+                self._add(kind, doc)
+
+    def upsert(self, kind: str, docs: Sequence[Dict[str, Any]]) -> None:
+        with self._lock:
+            for doc in docs:
+                self._remove((kind, doc["id"]))
+                self._add(kind, doc)
+
+    def delete(self, kind: str, ids: Sequence[int]) -> None:
+        with self._lock:
+            for pk in ids:
+                self._remove((kind, pk))
+
+    def search(self, query: str, kinds: Sequence[str], limit: int) -> List[SearchHit]:
+        wanted = set(kinds)
+        with self._lock:
+            n_docs = len(self._terms)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[Tuple[str, int], float] = defaultdict(float)
+            for tok in set(tokenize(normalize(query))):
+                postings = self._postings.get(tok)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    if key[0] not in wanted:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_length)
+                    scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [SearchHit(kind=kind, id=pk, score=score) for (kind, pk), score in best]
+
+
+class ElasticsearchBackend:
+    """One Elasticsearch index per kind, named `<prefix>-<kind>`."""
+
+    def __init__(self, cloud_id: str, api_key: str, prefix: str = "impact") -> None:
+        from elasticsearch import Elasticsearch
+
+        self.prefix = prefix
+        self._client = Elasticsearch(cloud_id=cloud_id, api_key=api_key)
+
+    def _index(self, kind: str) -> str:
+        return f"{self.prefix}-{kind}"
+
+    def _bulk(self, actions: Iterable[Dict[str, Any]]) -> None:
+        from elasticsearch import helpers
+
+        helpers.bulk(self._client, actions, chunk_size=_BULK_CHUNK, raise_on_error=False)
+
+    def replace(self, kind: str, docs: Iterable[Dict[str, Any]]) -> None:
+        index = self._index(kind)
+        self._client.options(ignore_status=404).indices.delete(index=index)
+        self._client.indices.create(index=index)
+        self._bulk({"_index": index, "_id": doc["id"], "_source": doc} for doc in docs)
+        self._client.indices.refresh(index=index)
+
+    def upsert(self, kind: str, docs: Sequence[Dict[str, Any]]) -> None:
+        self._bulk({"_index": self._index(kind), "_id": doc["id"], "_source": doc} for doc in docs)
+
+    def delete(self, kind: str, ids: Sequence[int]) -> None:
+        self._bulk({"_op_type": "delete", "_index": self._index(kind), "_id": pk} for pk in ids)
+
+    def search(self, query: str, kinds: Sequence[str], limit: int) -> List[SearchHit]:
+        fields = sorted({
+            f"{name}^{boost}" if boost != 1 else name
+            for kind in kinds
+            for name, boost in SEARCH_FIELDS[kind][1].items()
+        })
+        response = self._client.search(
+            index=[self._index(kind) for kind in kinds],
+            query={"multi_match": {"query": query, "fields": fields}},
+            size=limit,
+            ignore_unavailable=True,
+        )
+        kind_of = {self._index(kind): kind for kind in kinds}
+        return [
+            SearchHit(kind=kind_of[hit["_index"]], id=int(hit["_id"]), score=float(hit["_score"]))
+            for hit in response["hits"]["hits"]
+        ]
+
+
+class SearchService:
+    """Keeps a search backend in step with the tribes and causes tables.
+
+    The local backend lives in process memory, so it is bulk-loaded on first use and
+    updated inline from change notifications. Elasticsearch outlives the process: it is
+    bulk-loaded with `reindex` and kept current by background jobs, so commits never wait
+    on the network.
+    """
+
+    def __init__(self, backend: SearchBackend) -> None:
+        self.backend = backend
+        self.is_local = isinstance(backend, LocalSearchBackend)
+        self._loaded: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def ensure_loaded(self, db: Session, kinds: Sequence[str]) -> None:
+        if not self.is_local:
+            return
+        for kind in kinds:
+            if kind not in self._loaded:
+                # query before taking the lock: under AsyncSession.run_sync this runs on the event
+                # loop thread, where waiting on a lock held by a load suspended mid-query deadlocks
+                rows = list(self._rows(db, kind))
+                with self._lock:
+                    if kind not in self._loaded:
+                        self.backend.replace(kind, rows)
+                        self._loaded.add(kind)
+
+    def reindex(self, db: Session, kinds: Optional[Sequence[str]] = None) -> None:
+        for kind in kinds or SEARCH_FIELDS:
+            self.backend.replace(kind, self._rows(db, kind))
+            self._loaded.add(kind)
+
+    def refresh(self, db: Session, kind: str, ids: Sequence[int]) -> None:
+        """Re-read `ids` from the database and push them to the backend."""
+        docs = list(self._rows(db, kind, ids))
+        self.backend.upsert(kind, docs)
+        self.backend.delete(kind, sorted(set(ids) - {doc["id"] for doc in docs}))
+
+    @staticmethod
+    def _rows(db: Session, kind: str, ids: Optional[Sequence[int]] = None) -> Iterable[Dict[str, Any]]:
+        model, fields = SEARCH_FIELDS[kind]
+        query = db.query(model.id, *(getattr(model, name) for name in fields)).order_by(model.id)
+        if ids is not None:
+            query = query.filter(model.id.in_(list(ids)))
+        for row in query.yield_per(_BULK_CHUNK):
+            yield _document(kind, row._asdict())
+
+    def search(self, db: Session, query: str, kinds: Sequence[str], limit: int = 20) -> List[SearchHit]:
+        self.ensure_loaded(db, kinds)
+        return self.backend.search(query, kinds, limit)
+
+    def on_change(self, kind: str):
+        def apply(changed: Optional[Dict[Any, Optional[Dict[str, Any]]]]) -> None:
+            if not self.is_local:
+                job_queue.enqueue(
+                    "search.index", {"kind": kind, "ids": None if changed is None else list(changed)}
+                )
+                return
+            if changed is None:
+                self._loaded.discard(kind)
+                return
+            if kind not in self._loaded:
+                return
+            self.backend.upsert(kind, [_document(kind, row) for row in changed.values() if row is not None])
+            self.backend.delete(kind, [pk for pk, row in changed.items() if row is None])
+
+        return apply
+
+
+def _make_backend() -> SearchBackend:
+    settings = get_settings()
+    wants_elastic = settings.search_backend == "elasticsearch" or (
+        settings.search_backend == "auto" and settings.elastic_cloud_id and settings.elastic_api_key
+    )
+    if wants_elastic:
+        try:
+            return ElasticsearchBackend(
+                settings.elastic_cloud_id, settings.elastic_api_key, prefix=settings.search_index_prefix
+            )
+        except ImportError:
+            logger.warning("elasticsearch is not installed; using the local search backend")
+    return LocalSearchBackend()
+
+
+search_service = SearchService(_make_backend())
+for _kind, (_model, _fields) in SEARCH_FIELDS.items():
+    # Elasticsearch is shared: only the writing process queues the reindex
+    changes.subscribe(_model, search_service.on_change(_kind), remote=search_service.is_local)
+
+
+if __name__ == "__main__":
+    from ..db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        search_service.reindex(db)
+        print(f"search: reindexed {', '.join(SEARCH_FIELDS)}")
+    finally:
+        db.close()
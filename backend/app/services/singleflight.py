@@ -0,0 +1,62 @@
+"""Coalescing of concurrent identical calls into one in-flight computation."""
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from . import metrics
+
+
+class SingleFlight:
+    """While a call for `key` is running, later callers with the same key await its result
+    instead of starting their own. Nothing is kept once it finishes; that is the caches' job.
+
+    The shared call runs as its own task: a caller that disconnects stops waiting, but the
+    others still get the result. Results are shared objects, so callers must not mutate them.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = defaultdict(int)  # "leader" | "follower" -> count
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            task = self._inflight.get(key)
+            role = "follower" if task is not None else "leader"
+            if task is None:
+                task = self._inflight[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _done: self._forget(key, task))
+            self.calls[role] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+_registry: List[SingleFlight] = []
+
+
+def single_flight(name: str) -> SingleFlight:
+    group = SingleFlight(name)
+    _registry.append(group)
+    return group
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {group.name: {"inflight": len(group), **group.calls} for group in _registry}
+
+
+def metric_lines() -> List[str]:
+    samples: List[Tuple[Dict[str, str], float]] = [
+        ({"name": group.name, "role": role}, count) for group in _registry for role, count in sorted(group.calls.items())
+    ]
+    return metrics.sample_lines(
+        "singleflight_calls_total", "Coalesced calls: leaders computed, followers shared a leader's result.", samples
+    )
@@ -0,0 +1,74 @@
+import json
+import re
+from typing import Any
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JSONStringFieldStreamer:
+    """Incrementally decode one string field out of a JSON object that arrives in pieces.
+
+    The model answers with `{"reply": "...", "profile_delta": {...}}`; feeding the raw deltas
+    here yields the reply text as soon as its characters arrive, while `text` keeps the whole
+    document for a regular `json.loads` once the stream ends.
+    """
+
+    def __init__(self, field: str) -> None:
+        self._key_re = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._pos = -1  # offset of the next undecoded value char; -1 until the key is seen
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self.done:
+            return ""
+        if self._pos < 0:
+            match = self._key_re.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+        out = []
+        buf, i = self._buffer, self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            if i + 1 >= len(buf):
+                break  # wait for the rest of the escape
+            esc = buf[i + 1]
+            if esc == "u":
+                if i + 6 > len(buf):
+                    break
+                code = int(buf[i + 2 : i + 6], 16)
+                if 0xD800 <= code < 0xDC00:
+                    # a high surrogate: characters outside the BMP arrive as a \uXXXX\uXXXX pair
+                    low = buf[i + 6 : i + 12]
+                    if len(low) < 6 and "\\u".startswith(low[:2]):
+                        break  # wait for the low half
+                    if low[:2] == "\\u" and 0xDC00 <= int(low[2:], 16) < 0xE000:
+                        code = 0x10000 + ((code - 0xD800) << 10) + (int(low[2:], 16) - 0xDC00)
+                        i += 6
+                out.append(chr(code))
+                i += 6
+            else:
+                out.append(_ESCAPES.get(esc, esc))
+                i += 2
+        self._pos = i
+        return "".join(out)
@@ -0,0 +1,159 @@
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+
+KINDS = ("interest", "skill")
+
+
+def normalize_tag(label: str) -> str:
+    return " ".join(label.split()).lower()
+
+
+def _labels(values: Iterable[str]) -> Dict[str, str]:
+    """Normalized name -> first display label, dropping blanks and duplicates."""
+    out: Dict[str, str] = {}
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        label = " ".join(value.split())[:100]
+        if label:
+            out.setdefault(normalize_tag(label), label)
+    return out
+
+
+def get_or_create_tags(db: Session, labels: Dict[str, str]) -> Dict[str, int]:
+    """Tag ids for normalized names, inserting the missing ones."""
+    if not labels:
+        return {}
+    ids = dict(db.execute(select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(list(labels)))).all())
+    for name in sorted(set(labels) - set(ids)):
+        try:
+            with db.begin_nested():
+                ids[name] = db.execute(
+                    insert(models.Tag).values(name=name, label=labels[name]).returning(models.Tag.id)
+                ).scalar_one()
+        except IntegrityError:
+            # created concurrently by another writer
+            ids[name] = db.execute(select(models.Tag.id).where(models.Tag.name == name)).scalar_one()
+    return ids
+
+
+def _current(db: Session, profile_id: int, kind: str) -> set:
+    return set(
+        db.execute(
+            select(models.ProfileTag.tag_id).where(
+                models.ProfileTag.profile_id == profile_id, models.ProfileTag.kind == kind
+            )
+        ).scalars()
+    )
+
+
+def set_profile_tags(db: Session, profile_id: int, kind: str, values: Iterable[str], replace: bool = True) -> None:
+    """Write only the difference between the stored and the wanted tags; the caller commits.
+
+    With `replace=False` tags are only added, never removed.
+    """
+    wanted = set(get_or_create_tags(db, _labels(values)).values())
+    current = _current(db, profile_id, kind)
+    stale = current - wanted if replace else set()
+    if stale:
+        db.execute(
+            delete(models.ProfileTag).where(
+                models.ProfileTag.profile_id == profile_id,
+                models.ProfileTag.kind == kind,
+                models.ProfileTag.tag_id.in_(stale),
+            )
+        )
+    new = wanted - current
+    if new:
+        db.execute(
+            insert(models.ProfileTag),
+            [{"profile_id": profile_id, "kind": kind, "tag_id": tag_id} for tag_id in sorted(new)],
+        )
+
+
+def profile_tags(db: Session, profile_ids: Sequence[int]) -> Dict[int, Dict[str, List[str]]]:
+    """{profile_id: {"interest": [labels], "skill": [labels]}}, labels sorted by name."""
+    out: Dict[int, Dict[str, List[str]]] = {pk: {kind: [] for kind in KINDS} for pk in profile_ids}
+    if not profile_ids:
+        return out
+    rows = db.execute(
+        select(models.ProfileTag.profile_id, models.ProfileTag.kind, models.Tag.label)
+        .join(models.Tag, models.Tag.id == models.ProfileTag.tag_id)
+        .where(models.ProfileTag.profile_id.in_(list(profile_ids)))
+        .order_by(models.Tag.name)
+    ).all()
+    for profile_id, kind, label in rows:
+        out[profile_id].setdefault(kind, []).append(label)
+    return out
+
+
+def profiles_with_tag(
+    db: Session, kind: str, name: str, after_id: Optional[int] = None, limit: int = 50
+) -> List[models.UserProfile]:
+    """Profiles carrying a tag, keyset-paginated by profile id."""
+    query = (
+        select(models.UserProfile)
+        .join(models.ProfileTag, models.ProfileTag.profile_id == models.UserProfile.id)
+        .join(models.Tag, models.Tag.id == models.ProfileTag.tag_id)
+        .where(models.Tag.name == normalize_tag(name), models.ProfileTag.kind == kind)
+        .order_by(models.UserProfile.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        query = query.where(models.UserProfile.id > after_id)
+    return list(db.execute(query).scalars())
+
+
+def tag_counts(db: Session, kind: str, limit: int = 20, prefix: Optional[str] = None) -> List[Tuple[str, str, int]]:
+    """Most used tags of a kind as (name, label, profiles)."""
+    count = func.count(models.ProfileTag.profile_id)
+    query = (
+        select(models.Tag.name, models.Tag.label, count)
+        .join(models.ProfileTag, models.ProfileTag.tag_id == models.Tag.id)
+        .where(models.ProfileTag.kind == kind)
+        .group_by(models.Tag.id)
+        .order_by(count.desc(), models.Tag.name)
+        .limit(limit)
+    )
+    if prefix:
+        query = query.where(models.Tag.name.startswith(normalize_tag(prefix), autoescape=True))
+    return [tuple(row) for row in db.execute(query).all()]
+
+
+def migrate_profile(db: Session, profile: models.UserProfile) -> None:
+    """Move legacy interests_json/skills_json lists into profile_tags; the caller commits."""
+    for kind, column in (("interest", "interests_json"), ("skill", "skills_json")):
+        raw = getattr(profile, column)
+        if raw is None:
+            continue
+        try:
+            values = json.loads(raw or "[]")
+        except ValueError:
+            values = []
+        set_profile_tags(db, profile.id, kind, values if isinstance(values, list) else [], replace=False)
+        setattr(profile, column, None)
+
+
+def migrate_legacy_profile_tags(db: Session, batch_size: int = 500) -> int:
+    """Backfill every profile still holding JSON tag lists; returns profiles migrated."""
+    migrated = 0
+    while True:
+        profiles = (
+            db.query(models.UserProfile)
+            .filter(or_(models.UserProfile.interests_json.isnot(None), models.UserProfile.skills_json.isnot(None)))
+            .order_by(models.UserProfile.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not profiles:
+            return migrated
+        for profile in profiles:
+            migrate_profile(db, profile)
+        db.commit()
+        migrated += len(profiles)
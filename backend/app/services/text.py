@@ -0,0 +1,13 @@
+import re
+from typing import List
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text: str | None) -> str:
+    return (text or "").lower()
+
+
+def tokenize(text: str | None) -> List[str]:
+    return _TOKEN_RE.findall(normalize(text))
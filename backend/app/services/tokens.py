@@ -0,0 +1,94 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import jwt
+
+from ..core.config import get_settings
+from ..security import decode_access_token
+
+
+class TokenCache:
+    """Bounded LRU of verified access token -> claims.
+
+    Entries never outlive the token's own `exp`; when the cache is full, expired tokens are
+    evicted before live ones. Verification time is measured on misses so the savings from
+    hits can be reported.
+    """
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.verify_seconds = 0.0
+
+    def claims(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid token; raises jwt.PyJWTError otherwise."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[token]
+        started = time.perf_counter()
+        try:
+            claims = decode_access_token(token)
+        except jwt.PyJWTError:
+            with self._lock:
+                self.rejected += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+        with self._lock:
+            self.misses += 1
+            self.verify_seconds += elapsed
+            expires_at = float(claims["exp"])
+            self._entries[token] = (expires_at, claims)
+            heapq.heappush(self._expiry, (expires_at, token))
+            if len(self._entries) > self.max_entries:
+                self._evict(now)
+        return claims
+
+    def _evict(self, now: float) -> None:
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, token = heapq.heappop(self._expiry)
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] == expires_at:
+                del self._entries[token]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if len(self._expiry) > 2 * self.max_entries:
+            self._expiry = [(exp, tok) for tok, (exp, _) in self._entries.items()]
+            heapq.heapify(self._expiry)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            avg = self.verify_seconds / self.misses if self.misses else 0.0
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+                "verify_seconds_total": self.verify_seconds,
+                "avg_verify_seconds": avg,
+                "verify_seconds_saved": avg * self.hits,
+            }
+
+
+_token_cache: Optional[TokenCache] = None
+
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = TokenCache(get_settings().token_cache_max_entries)
+    return _token_cache
@@ -0,0 +1,120 @@
+import datetime as dt
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from .tags import migrate_profile, set_profile_tags
+
+
+def get_or_create_session(db: Session, session_id: str, user_id: Optional[int]) -> models.OnboardingSession:
+    session = db.query(models.OnboardingSession).filter_by(session_id=session_id).first()
+    if not session:
+        session = models.OnboardingSession(session_id=session_id, user_id=user_id)
+        db.add(session)
+        db.flush()
+    elif session.messages_json not in (None, "", "[]"):
+        migrate_session(db, session)
+    return session
+
+
+def append_messages(db: Session, session: models.OnboardingSession, messages: List[Dict[str, str]]) -> int:
+    """Store only the messages not yet persisted for `session`.
+
+    Clients resend the whole conversation every turn, so everything past the last stored
+    sequence number is new. Returns the number of rows written; the caller commits.
+    """
+    last_seq = db.execute(
+        select(func.max(models.OnboardingMessage.seq)).where(models.OnboardingMessage.session_id == session.id)
+    ).scalar()
+    start = 0 if last_seq is None else last_seq + 1
+    new = messages[start:]
+    if new:
+        now = dt.datetime.utcnow()
+        db.execute(
+            insert(models.OnboardingMessage),
+            [
+                {"session_id": session.id, "seq": start + i, "role": m["role"], "content": m["content"], "created_at": now}
+                for i, m in enumerate(new)
+            ],
+        )
+        session.updated_at = now
+    return len(new)
+
+
+def read_messages(db: Session, session: models.OnboardingSession, after_seq: int, limit: int) -> List[models.OnboardingMessage]:
+    return (
+        db.query(models.OnboardingMessage)
+        .filter(models.OnboardingMessage.session_id == session.id, models.OnboardingMessage.seq > after_seq)
+        .order_by(models.OnboardingMessage.seq)
+        .limit(limit)
+        .all()
+    )
+
+
+def migrate_session(db: Session, session: models.OnboardingSession) -> int:
+    """Move a legacy messages_json blob into onboarding_messages rows."""
+    try:
+        legacy = json.loads(session.messages_json or "[]")
+    except ValueError:
+        legacy = []
+    messages = [
+        {"role": str(m.get("role", "")), "content": str(m.get("content", ""))} for m in legacy if isinstance(m, dict)
+    ]
+    written = append_messages(db, session, messages)
+    session.messages_json = "[]"
+    return written
+
+
+def migrate_legacy_transcripts(db: Session, batch_size: int = 500) -> int:
+    """Backfill every session still holding a messages_json blob; returns sessions migrated."""
+    migrated = 0
+    while True:
+        sessions = (
+            db.query(models.OnboardingSession)
+            .filter(models.OnboardingSession.messages_json.notin_(["", "[]"]))
+            .order_by(models.OnboardingSession.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not sessions:
+            return migrated
+        for session in sessions:
+            migrate_session(db, session)
+        db.commit()
+        migrated += len(sessions)
+
+
+def persist_ai_turn(
+    db: Session,
+    session_id: str,
+    user_id: Optional[int],
+    messages: List[Dict[str, str]],
+    reply: str,
+    profile_delta: Dict[str, Any],
+) -> None:
+    """Append an AI chat turn to the transcript and merge the extracted profile delta."""
+    session = get_or_create_session(db, session_id, user_id)
+    append_messages(db, session, [
+        {"role": m["role"], "content": m["content"]} for m in messages
+    ] + [{"role": "assistant", "content": reply}])
+    db.commit()
+
+    if user_id:
+        profile = db.query(models.UserProfile).filter_by(user_id=user_id).first()
+        if not profile:
+            profile = models.UserProfile(user_id=user_id)
+            db.add(profile)
+            db.flush()
+        else:
+            migrate_profile(db, profile)
+        # the model only reports what it learned this turn, so tags are added, never removed
+        set_profile_tags(db, profile.id, "interest", profile_delta.get("interests") or [], replace=False)
+        set_profile_tags(db, profile.id, "skill", profile_delta.get("skills") or [], replace=False)
+        if profile_delta.get("location_city"):
+            profile.location_city = profile_delta.get("location_city")
+        if profile_delta.get("location_country"):
+            profile.location_country = profile_delta.get("location_country")
+        db.commit()
@@ -0,0 +1,260 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import get_settings
+from . import changes
+from .geo import tribe_geo
+from .text import normalize, tokenize
+
+
+# Weights of the onboarding matching heuristic.
+INTEREST_WEIGHT = 2.0
+SKILL_WEIGHT = 1.5
+LOCATION_WEIGHT = 1.0
+# Tribes within DISTANCE_RADIUS_KM of the profile's coordinates get up to DISTANCE_WEIGHT,
+# decaying linearly to zero at the edge of the radius.
+DISTANCE_WEIGHT = 1.0
+DISTANCE_RADIUS_KM = 100.0
+
+_TERM_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class TribeDoc:
+    id: int
+    name: str
+    description: str
+    location: Optional[str]
+    name_norm: str
+    description_norm: str
+    location_norm: str
+
+
+def _doc_from_row(row: Dict[str, Any]) -> TribeDoc:
+    return TribeDoc(
+        id=row["id"],
+        name=row["name"],
+        description=row["description"],
+        location=row["location"],
+        name_norm=normalize(row["name"]),
+        description_norm=normalize(row["description"]),
+        location_norm=normalize(row["location"]),
+    )
+
+
+class TribeIndex:
+    """In-process inverted index over tribe name/description/location.
+
+    Token postings narrow each query term down to candidate tribes; candidates are then
+    verified with the same substring test the original heuristic used, so scores match
+    a full scan exactly.
+
+    Writes through the app reach it via the change feed (other processes' via `changes.poll`);
+    `max_age_seconds` bounds how long writes that bypass the app, like manual SQL, go unseen.
+    """
+
+    def __init__(self, max_age_seconds: float = 0) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._docs: Dict[int, TribeDoc] = {}
+        self._ordered_ids: List[int] = []
+        self._text_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._location_postings: Dict[str, Set[int]] = defaultdict(set)
+        self._term_cache: Dict[Tuple[str, str], frozenset] = {}
+        self.version = 0
+
+    # -- maintenance -------------------------------------------------------
+    def ensure_loaded(self, db: Session) -> None:
+        expired = self.max_age_seconds > 0 and time.monotonic() - self._loaded_at > self.max_age_seconds
+        if not self._loaded or expired:
+            self.rebuild(db)
+
+    def rebuild(self, db: Session) -> None:
+        rows = db.query(
+            models.Tribe.id, models.Tribe.name, models.Tribe.description, models.Tribe.location
+        ).all()
+        with self._lock:
+            self._docs.clear()
+            self._ordered_ids.clear()
+            self._text_postings.clear()
+            self._location_postings.clear()
+            for row in rows:
+                self._add(_doc_from_row(row._asdict()))
+            self._ordered_ids = sorted(self._docs)
+            self._loaded = True
+            self._loaded_at = time.monotonic()
+            self._bump()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._bump()
+
+    def apply_changes(self, changed: Optional[Dict[Any, Optional[Dict[str, Any]]]]) -> None:
+        if changed is None:
+            self.invalidate()
+            return
+        with self._lock:
+            if not self._loaded:
+                return
+            for tribe_id, row in changed.items():
+                self._remove(tribe_id)
+                if row is not None:
+                    self._add(_doc_from_row(row))
+                    bisect.insort(self._ordered_ids, tribe_id)
+            self._bump()
+
+    def _bump(self) -> None:
+        self.version += 1
+        self._term_cache.clear()
+
+    def _add(self, doc: TribeDoc) -> None:
+        self._docs[doc.id] = doc
+        for tok in set(tokenize(doc.name_norm) + tokenize(doc.description_norm)):
+            self._text_postings[tok].add(doc.id)
+        for tok in set(tokenize(doc.location_norm)):
+            self._location_postings[tok].add(doc.id)
+
+    def _remove(self, tribe_id: int) -> None:
+        doc = self._docs.pop(tribe_id, None)
+        if doc is None:
+            return
+        pos = bisect.bisect_left(self._ordered_ids, tribe_id)
+        if pos < len(self._ordered_ids) and self._ordered_ids[pos] == tribe_id:
+            del self._ordered_ids[pos]
+        for postings, toks in (
+            (self._text_postings, tokenize(doc.name_norm) + tokenize(doc.description_norm)),
+            (self._location_postings, tokenize(doc.location_norm)),
+        ):
+            for tok in set(toks):
+                ids = postings.get(tok)
+                if ids is not None:
+                    ids.discard(tribe_id)
+                    if not ids:
+                        del postings[tok]
+
+    # -- querying ----------------------------------------------------------
+    def get(self, tribe_id: int) -> Optional[TribeDoc]:
+        with self._lock:
+            return self._docs.get(tribe_id)
+
+    def matching(self, term: str, field: str) -> frozenset:
+        """Ids of tribes whose field contains `term` as a substring ("text" or "location")."""
+        with self._lock:
+            return self._matching(term, field)
+
+    def _matching(self, term: str, field: str) -> frozenset:
+        key = (field, term)
+        cached = self._term_cache.get(key)
+        if cached is not None:
+            return cached
+        postings = self._text_postings if field == "text" else self._location_postings
+        query_tokens = tokenize(term)
+        if query_tokens:
+            # Every token of a substring match is itself a substring of some indexed token.
+            candidates: Optional[Set[int]] = None
+            for qtok in set(query_tokens):
+                hits: Set[int] = set()
+                for tok, ids in postings.items():
+                    if qtok in tok:
+                        hits |= ids
+                candidates = hits if candidates is None else candidates & hits
+                if not candidates:
+                    break
+        else:
+            candidates = set(self._docs)
+        result = frozenset(i for i in candidates or () if self._contains(self._docs[i], term, field))
+        if len(self._term_cache) >= _TERM_CACHE_SIZE:
+            self._term_cache.clear()
+        self._term_cache[key] = result
+        return result
+
+    @staticmethod
+    def _contains(doc: TribeDoc, term: str, field: str) -> bool:
+        if field == "text":
+            return term in doc.name_norm or term in doc.description_norm
+        return term in doc.location_norm
+
+    def scores(
+        self,
+        interests: Iterable[str],
+        skills: Iterable[str],
+        locations: Iterable[str],
+        near: Optional[Tuple[float, float]] = None,
+    ) -> Dict[int, float]:
+        with self._lock:
+            scores: Dict[int, float] = defaultdict(float)
+            for term in {normalize(i) for i in interests}:
+                for tribe_id in self._matching(term, "text"):
+                    scores[tribe_id] += INTEREST_WEIGHT
+            for term in {normalize(s) for s in skills}:
+                for tribe_id in self._matching(term, "text"):
+                    scores[tribe_id] += SKILL_WEIGHT
+            for term in {normalize(l) for l in locations}:
+                if not term:
+                    continue
+                for tribe_id in self._matching(term, "location"):
+                    scores[tribe_id] += LOCATION_WEIGHT
+            if near is not None:
+                for tribe_id, boost in distance_boosts(*near).items():
+                    if tribe_id in self._docs:
+                        scores[tribe_id] += boost
+            return scores
+
+    def top_k(
+        self,
+        interests: Iterable[str],
+        skills: Iterable[str],
+        locations: Iterable[str],
+        k: int,
+        near: Optional[Tuple[float, float]] = None,
+    ) -> List[Tuple[TribeDoc, float]]:
+        """Best `k` tribes by heuristic score, ties broken by id like the original table scan.
+
+        `near` is an optional (lat, lng) that adds the distance term.
+        """
+        with self._lock:
+            scores = self.scores(interests, skills, locations, near)
+            best = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], item[0]))
+            result = [(self._docs[tribe_id], score) for tribe_id, score in best]
+            if len(result) < k:
+                # Unmatched tribes still fill the list with a zero score, in id order.
+                for tribe_id in self._ordered_ids:
+                    if len(result) >= k:
+                        break
+                    if tribe_id not in scores:
+                        result.append((self._docs[tribe_id], 0.0))
+            return result
+
+    def snapshot(
+        self, terms: Iterable[Tuple[str, str]], known_version: Optional[int] = None
+    ) -> Tuple[int, Optional[List[TribeDoc]], Dict[Tuple[str, str], frozenset]]:
+        """Atomically read matches for (field, term) pairs plus the id-ordered docs.
+
+        Docs are only returned when the index changed since `known_version`.
+        """
+        with self._lock:
+            docs = None if known_version == self.version else [self._docs[i] for i in self._ordered_ids]
+            return self.version, docs, {(field, term): self._matching(term, field) for field, term in terms}
+
+
+def distance_boosts(lat: float, lng: float) -> Dict[int, float]:
+    """Distance term of the onboarding score for every tribe within DISTANCE_RADIUS_KM."""
+    return {
+        tribe_id: DISTANCE_WEIGHT * (1.0 - km / DISTANCE_RADIUS_KM)
+        for tribe_id, km in tribe_geo.within(lat, lng, DISTANCE_RADIUS_KM)
+    }
+
+
+tribe_index = TribeIndex(max_age_seconds=get_settings().tribe_index_max_age_seconds)
+changes.subscribe(models.Tribe, tribe_index.apply_changes)
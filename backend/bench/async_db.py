@@ -0,0 +1,134 @@
+"""Requests/second of the sync (threadpool) and async (AsyncSession) database paths.
+
+Mounts two otherwise identical handlers that load a cause by id, one on `get_db`, one on
+`get_async_db`, and drives them with many concurrent requests through httpx's ASGI
+transport. `--db-latency-ms` makes every request also run a SQLite function that sleeps,
+standing in for a network round trip to a real database server; this is where the
+threadpool's fixed size (40 by default) caps the sync path. aiosqlite itself runs each
+connection on a thread, so on SQLite the async path mostly pays for the extra hop; point
+`--database-url` at PostgreSQL (psycopg 3) to measure the case it is meant for.
+
+    cd backend && python -m bench.async_db --concurrency 200 --requests 2000 --db-latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+def _install_sleep(engine) -> None:
+    from sqlalchemy import event
+
+    def bench_sleep(ms):
+        time.sleep(ms / 1000)
+        return 1
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_connection, _record):
+        dbapi_connection.create_function("bench_sleep", 1, bench_sleep)
+
+
+async def run(args) -> int:
+    import httpx
+    from fastapi import APIRouter, Depends, HTTPException
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from app import models
+    from app.db import Base, SessionLocal, async_engine, engine, get_async_db, get_db
+    from app.main import app
+
+    if engine.dialect.name == "sqlite":
+        _install_sleep(engine)
+        _install_sleep(async_engine.sync_engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    causes = [models.Cause(name=f"bench cause {i}", mission="bench") for i in range(100)]
+    db.add_all(causes)
+    db.commit()
+    ids = [cause.id for cause in causes]
+    db.close()
+
+    if engine.dialect.name == "sqlite":
+        sleep = text("SELECT bench_sleep(:ms)").bindparams(ms=args.db_latency_ms)
+    else:
+        sleep = text("SELECT pg_sleep(:s)").bindparams(s=args.db_latency_ms / 1000)
+    router = APIRouter(prefix="/bench")
+
+    @router.get("/sync/causes/{cause_id}")
+    def sync_cause(cause_id: int, db: Session = Depends(get_db)):
+        if args.db_latency_ms:
+            db.execute(sleep)
+        cause = db.get(models.Cause, cause_id)
+        if cause is None:
+            raise HTTPException(status_code=404)
+        return {"id": cause.id, "name": cause.name}
+
+    @router.get("/async/causes/{cause_id}")
+    async def async_cause(cause_id: int, db: AsyncSession = Depends(get_async_db)):
+        if args.db_latency_ms:
+            await db.execute(sleep)
+        cause = await db.get(models.Cause, cause_id)
+        if cause is None:
+            raise HTTPException(status_code=404)
+        return {"id": cause.id, "name": cause.name}
+
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app)
+    failed_any = False
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for path in ("sync", "async"):
+            semaphore = asyncio.Semaphore(args.concurrency)
+            latencies = []
+
+            async def one(i):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(f"/bench/{path}/causes/{ids[i % len(ids)]}")
+                    latencies.append(time.perf_counter() - started)
+                    return response.status_code
+
+            await asyncio.gather(*(one(i) for i in range(min(50, args.requests))))  # warm the pools
+            latencies.clear()
+            started = time.perf_counter()
+            statuses = await asyncio.gather(*(one(i) for i in range(args.requests)))
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            failed = sum(status != 200 for status in statuses)
+            failed_any = failed_any or bool(failed)
+            print(json.dumps({
+                "path": path,
+                "concurrency": args.concurrency,
+                "db_latency_ms": args.db_latency_ms,
+                "requests": args.requests,
+                "requests_per_second": round(args.requests / elapsed, 1),
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+                "failed": failed,
+            }), flush=True)
+    await async_engine.dispose()  # aiosqlite keeps a thread per open connection
+    engine.dispose()
+    return 1 if failed_any else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite file; the 100 seeded causes are not cleaned up")
+    parser.add_argument("--pool-size", type=int, default=100, help="connections per engine, so the pool is not the cap")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/async_bench.db"
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = "0"
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
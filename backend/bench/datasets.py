@@ -0,0 +1,153 @@
+"""Synthetic tribes, causes and donations at benchmark scale.
+
+Like `app.seed`, but generated: deterministic for a given size and seed, and written with
+chunked core `insert()` executemany calls so a million rows load in minutes, not hours.
+
+    cd backend && python -m bench.datasets --size 100k --database-url sqlite:////tmp/bench_100k.db
+"""
+import argparse
+import datetime as dt
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterator
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+CHUNK = 10_000
+
+TERMS = [
+    "climate", "water", "education", "health", "technology", "art", "music", "food", "housing", "ocean",
+    "forest", "energy", "solar", "literacy", "coding", "design", "law", "finance", "marketing", "youth",
+    "elderly", "refugees", "animals", "wildlife", "recycling", "mental health", "sports", "gardening",
+    "mentoring", "nutrition", "sanitation", "disaster relief", "women", "veterans", "open source", "data",
+]
+CATEGORIES = ["Water & Sanitation", "Education", "Health", "Climate", "Animals", "Community", "Technology", None]
+URGENCIES = ["Low", "Medium", "High", "Critical"]
+CITIES = [
+    ("San Francisco", 37.7749, -122.4194), ("Nairobi", -1.2921, 36.8219), ("London", 51.5072, -0.1276),
+    ("Sao Paulo", -23.5505, -46.6333), ("Mumbai", 19.0760, 72.8777), ("Berlin", 52.52, 13.405),
+    ("Lagos", 6.5244, 3.3792), ("Sydney", -33.8688, 151.2093), ("Global", None, None), ("Remote", None, None),
+]
+
+
+def _place(rng: random.Random) -> Dict:
+    city, lat, lng = rng.choice(CITIES)
+    if lat is None:
+        return {"location": city, "location_lat": None, "location_lng": None}
+    return {"location": city, "location_lat": lat + rng.uniform(-0.5, 0.5), "location_lng": lng + rng.uniform(-0.5, 0.5)}
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.sample(TERMS, n))
+
+
+def tribes(n: int, rng: random.Random) -> Iterator[Dict]:
+    for i in range(n):
+        yield {"name": f"{_words(rng, 2).title()} Tribe {i}", "description": _words(rng, 6), **_place(rng)}
+
+
+def causes(n: int, rng: random.Random) -> Iterator[Dict]:
+    for i in range(n):
+        goal = rng.choice((5_000, 20_000, 50_000, 100_000, 250_000))
+        yield {
+            "name": f"{_words(rng, 2).title()} Cause {i}",
+            "mission": _words(rng, 8),
+            "funding_goal": goal,
+            # funds_raised/supporters_count are filled from the generated donations
+            "funds_raised": 0,
+            "supporters_count": 0,
+            "category": rng.choice(CATEGORIES),
+            "urgency": rng.choice(URGENCIES),
+            **_place(rng),
+        }
+
+
+def donations(n: int, cause_count: int, rng: random.Random, days: int = 365) -> Iterator[Dict]:
+    now = dt.datetime.utcnow()
+    for _ in range(n):
+        yield {
+            "amount": round(rng.lognormvariate(3.5, 1.0), 2),
+            # a few popular causes get most donations, like real traffic
+            "cause_id": min(cause_count, int(rng.paretovariate(1.2))),
+            "donor_id": None,
+            "created_at": now - dt.timedelta(seconds=rng.uniform(0, days * 86400)),
+        }
+
+
+def _insert(engine, table, rows: Iterator[Dict]) -> int:
+    from sqlalchemy import insert
+
+    written, chunk = 0, []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK:
+            with engine.begin() as conn:
+                conn.execute(insert(table), chunk)
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        with engine.begin() as conn:
+            conn.execute(insert(table), chunk)
+        written += len(chunk)
+    return written
+
+
+def seed(engine, size: str, seed: int = 42, log=print) -> Dict[str, int]:
+    """Fill empty tribes/causes/donations tables with `size` rows each; existing data is kept as is."""
+    from sqlalchemy import bindparam, func, select, update
+
+    from app import models
+    from app.migrations import upgrade_schema
+
+    upgrade_schema(engine)
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(models.Tribe)).scalar_one()
+    if existing:
+        log(f"dataset: reusing {existing} tribes already in the database")
+        with engine.connect() as conn:
+            return {
+                model.__tablename__: conn.execute(select(func.count()).select_from(model)).scalar_one()
+                for model in (models.Tribe, models.Cause, models.Donation)
+            }
+
+    n = SIZES[size]
+    rng = random.Random(seed)
+    counts = {}
+    for model, rows in (
+        (models.Tribe, tribes(n, rng)),
+        (models.Cause, causes(n, rng)),
+        (models.Donation, donations(n, n, rng)),
+    ):
+        started = time.perf_counter()
+        counts[model.__tablename__] = _insert(engine, model.__table__, rows)
+        log(f"dataset: {counts[model.__tablename__]} {model.__tablename__} in {time.perf_counter() - started:.1f}s")
+
+    # keep the denormalized cause counters consistent with the donation rows
+    d = models.Donation
+    causes_table = models.Cause.__table__
+    with engine.begin() as conn:
+        totals = conn.execute(select(d.cause_id, func.sum(d.amount), func.count(d.id)).group_by(d.cause_id)).all()
+        conn.execute(
+            update(causes_table).where(causes_table.c.id == bindparam("cid")),
+            [{"cid": cause_id, "funds_raised": amount, "supporters_count": count} for cause_id, amount, count in totals],
+        )
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=list(SIZES), default="1k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", required=True)
+    args = parser.parse_args()
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from app.db import engine
+
+    seed(engine, args.size, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Mixed read/write throughput of the SQLite engine under different pragma and pool settings.
+
+Each configuration gets a fresh SQLite file with seeded causes; worker threads then run a
+read-heavy mix (catalog page reads plus funds_raised updates) through `make_engine` and
+the script prints operations/second, p50/p99 latency and failed operations per configuration.
+
+    cd backend && python -m bench.db_concurrency --threads 16 --ops 500
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+CONFIGS = {
+    # SQLite's own defaults: rollback journal, fsync on every commit, no mmap, 2000 KiB page cache
+    "defaults": dict(sqlite_journal_mode="", sqlite_synchronous="", sqlite_mmap_size=0, sqlite_cache_size=-2000),
+    "wal": dict(sqlite_journal_mode="wal", sqlite_synchronous="normal", sqlite_mmap_size=0, sqlite_cache_size=-2000),
+    "wal+mmap": dict(sqlite_journal_mode="wal", sqlite_synchronous="normal"),
+    "wal+mmap small pool": dict(sqlite_journal_mode="wal", sqlite_synchronous="normal", db_pool_size=2, db_max_overflow=0),
+}
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run_config(name, overrides, args, workdir):
+    from sqlalchemy import text
+
+    from app.core.config import Settings
+    from app import models  # noqa: F401  registers the tables
+    from app.db import Base, make_engine
+
+    path = os.path.join(workdir, f"{name.replace(' ', '_').replace('+', '_')}.db")
+    engine = make_engine(f"sqlite:///{path}", Settings(**overrides))
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO causes (name, mission, funding_goal, funds_raised, supporters_count) VALUES (:n, :m, 1000, 0, 0)"),
+            [{"n": f"cause {i}", "m": "bench " * 20} for i in range(args.rows)],
+        )
+
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local, failed = [], 0
+        for _ in range(args.ops):
+            started = time.perf_counter()
+            try:
+                if rng.random() < args.write_ratio:
+                    with engine.begin() as conn:
+                        conn.execute(
+                            text("UPDATE causes SET funds_raised = funds_raised + 1 WHERE id = :id"),
+                            {"id": rng.randint(1, args.rows)},
+                        )
+                else:
+                    with engine.connect() as conn:
+                        conn.execute(
+                            text("SELECT * FROM causes WHERE id > :id ORDER BY id LIMIT 50"),
+                            {"id": rng.randint(0, args.rows)},
+                        ).all()
+            except Exception:
+                failed += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            failures.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return {
+        "config": name,
+        "ops": len(latencies),
+        "ops_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "failed": sum(failures),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=500, help="operations per thread")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--configs", nargs="*", default=list(CONFIGS), choices=list(CONFIGS))
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{workdir}/app.db")
+    for name in args.configs:
+        print(json.dumps(run_config(name, CONFIGS[name], args, workdir)), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Nearest-N and radius query latency of the in-process geo index.
+
+Loads synthetic points (a third clustered around a few cities, the rest uniform over the
+globe) into a GeoIndex and prints p50/p99 latency per query type, checking every answer
+against a brute-force haversine scan.
+
+    cd backend && python -m bench.geo_nearest --points 100000 --queries 500
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+_CITIES = [(40.71, -74.0), (51.5, -0.12), (-1.29, 36.82), (35.68, 139.69), (-23.55, -46.63)]
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3),
+    }
+
+
+def run(args) -> int:
+    import numpy as np
+
+    from app import models
+    from app.services.geo import GeoIndex, haversine_km
+
+    rng = random.Random(args.seed)
+    index = GeoIndex(models.Tribe)
+    coords = np.empty((args.points, 2))
+    started = time.perf_counter()
+    for pk in range(args.points):
+        if pk % 3 == 0:
+            lat, lng = rng.choice(_CITIES)
+            lat, lng = max(-90.0, min(90.0, rng.gauss(lat, 2))), ((rng.gauss(lng, 2) + 180) % 360) - 180
+        else:
+            lat, lng = rng.uniform(-90, 90), rng.uniform(-180, 180)
+        coords[pk] = lat, lng
+    index.load((pk, float(lat), float(lng)) for pk, (lat, lng) in enumerate(coords))
+    load_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    timings = {"nearest": [], "within": []}
+    for _ in range(args.queries):
+        lat, lng = rng.choice(_CITIES) if rng.random() < 0.5 else (rng.uniform(-80, 80), rng.uniform(-180, 180))
+        truth = haversine_km(lat, lng, coords[:, 0], coords[:, 1])
+
+        t = time.perf_counter()
+        hits = index.nearest(lat, lng, args.k)
+        timings["nearest"].append(time.perf_counter() - t)
+        mismatches += not np.allclose([km for _, km in hits], np.sort(truth)[: args.k])
+
+        t = time.perf_counter()
+        hits = index.within(lat, lng, args.radius_km)
+        timings["within"].append(time.perf_counter() - t)
+        mismatches += len(hits) != int((truth <= args.radius_km).sum())
+
+    print(json.dumps({
+        "points": args.points,
+        "load_seconds": round(load_seconds, 3),
+        "nearest": {"k": args.k, **_percentiles(timings["nearest"])},
+        "within": {"radius_km": args.radius_km, **_percentiles(timings["within"])},
+        "mismatches": mismatches,
+    }))
+    return 1 if mismatches else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--radius-km", type=float, default=100.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/geo_bench.db")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
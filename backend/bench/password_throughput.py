@@ -0,0 +1,67 @@
+"""Login throughput with the bcrypt pool sized from 1 worker up to every core.
+
+Drives POST /api/auth/login in-process through httpx's ASGI transport against a throwaway
+SQLite file and prints logins/second per pool size and executor kind.
+
+    cd backend && python -m bench.password_throughput --rounds 12 --logins 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+
+async def run(args) -> int:
+    import httpx
+    from app.db import Base, engine
+    from app.main import app
+    from app.services.passwords import PasswordHasher, configure_password_hasher
+
+    Base.metadata.create_all(bind=engine)
+    transport = httpx.ASGITransport(app=app)
+    credentials = {"email": "bench@example.com", "password": "correct horse battery staple"}
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.post("/api/auth/register", json=credentials)).raise_for_status()
+        cores = os.cpu_count() or 1
+        sizes = sorted({1, 2, max(1, cores // 2), cores} if not args.workers else set(args.workers))
+        for executor in args.executors:
+            for workers in sizes:
+                configure_password_hasher(PasswordHasher(workers=workers, max_pending=args.logins, executor=executor))
+                await client.post("/api/auth/login", json=credentials)  # warm up the pool
+                started = time.perf_counter()
+                responses = await asyncio.gather(
+                    *(client.post("/api/auth/login", json=credentials) for _ in range(args.logins))
+                )
+                elapsed = time.perf_counter() - started
+                failed = sum(r.status_code != 200 for r in responses)
+                results.append({
+                    "executor": executor,
+                    "workers": workers,
+                    "logins": args.logins,
+                    "seconds": round(elapsed, 3),
+                    "logins_per_second": round(args.logins / elapsed, 1),
+                    "failed": failed,
+                })
+                print(json.dumps(results[-1]), flush=True)
+    return 1 if any(r["failed"] for r in results) else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost")
+    parser.add_argument("--logins", type=int, default=100, help="concurrent logins per configuration")
+    parser.add_argument("--workers", type=int, nargs="*", help="pool sizes (default: 1, 2, cores/2, cores)")
+    parser.add_argument("--executors", nargs="*", default=["thread", "process"], choices=["thread", "process"])
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/password_bench.db"
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Pro-bono matching at scale: index build, shortlist and greedy allocation, then a full run.
+
+Generates offers with free-text skills and causes with skill needs (clustered around a few
+cities, like `bench.datasets`), times the in-memory engine phase by phase, then writes the
+same data to a SQLite database and times `run_matching` end to end (load, allocate, replace
+matches).
+
+    cd backend && python -m bench.probono_match --offers 100000 --causes 5000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench.datasets import CITIES
+
+SKILLS = [
+    "python", "data analysis", "web design", "ux design", "marketing", "social media", "grant writing",
+    "accounting", "bookkeeping", "legal advice", "photography", "video editing", "translation",
+    "project management", "fundraising", "teaching", "copywriting", "public relations", "machine learning",
+    "carpentry", "nursing", "event planning", "mobile development", "database administration",
+]
+SEPARATORS = [", ", "; ", " and ", " / "]
+
+
+def _place(rng: random.Random) -> dict:
+    city, lat, lng = rng.choice(CITIES)
+    if lat is None:
+        return {"location": city, "location_lat": None, "location_lng": None}
+    return {"location": city, "location_lat": lat + rng.uniform(-0.3, 0.3), "location_lng": lng + rng.uniform(-0.3, 0.3)}
+
+
+def generate(offers: int, causes: int, seed: int):
+    rng = random.Random(seed)
+    cause_rows = [{"id": i, "name": f"Cause {i}", "mission": "", **_place(rng)} for i in range(1, causes + 1)]
+    need_rows, need_id = [], 0
+    for cause in cause_rows:
+        for skill in rng.sample(SKILLS, rng.randint(1, 3)):
+            need_id += 1
+            need_rows.append({"id": need_id, "cause_id": cause["id"], "skill": skill, "label": skill.title(),
+                              "hours": rng.choice((5, 10, 20, 40, 80))})
+    offer_rows = []
+    for i in range(1, offers + 1):
+        picks = rng.sample(SKILLS, rng.randint(1, 4))
+        skills = picks[0] + "".join(rng.choice(SEPARATORS) + s.title() for s in picks[1:])
+        place = _place(rng) if rng.random() < 0.5 else {"location": None, "location_lat": None, "location_lng": None}
+        offer_rows.append({"id": i, "cause_id": rng.randint(1, causes), "name": f"Volunteer {i}", "email": f"v{i}@example.org",
+                           "skills": skills, "hours": rng.randint(1, 40), **place})
+    return cause_rows, need_rows, offer_rows
+
+
+def _write(engine, cause_rows, need_rows, offer_rows) -> None:
+    from sqlalchemy import insert
+
+    from app import models
+    from app.migrations import upgrade_schema
+
+    upgrade_schema(engine)
+    for model, rows in ((models.Cause, cause_rows), (models.CauseSkillNeed, need_rows), (models.ProBonoOffer, offer_rows)):
+        for start in range(0, len(rows), 10_000):
+            with engine.begin() as conn:
+                conn.execute(insert(model.__table__), rows[start:start + 10_000])
+
+
+def run(args) -> int:
+    from app.db import SessionLocal, engine
+    from app.services import probono
+
+    started = time.perf_counter()
+    cause_rows, need_rows, offer_rows = generate(args.offers, args.causes, args.seed)
+    generate_seconds = time.perf_counter() - started
+
+    places = {c["id"]: (c["location"], c["location_lat"], c["location_lng"]) for c in cause_rows}
+    offers = [probono.Offer(o["id"], o["cause_id"], o["skills"], o["hours"], o["location"], o["location_lat"], o["location_lng"])
+              if o["location"] else probono.Offer(o["id"], o["cause_id"], o["skills"], o["hours"], *places[o["cause_id"]])
+              for o in offer_rows]
+    needs = [probono.Need(n["id"], n["cause_id"], n["skill"], n["hours"], *places[n["cause_id"]]) for n in need_rows]
+
+    t = time.perf_counter()
+    index = probono.SkillIndex(offers)
+    index_seconds = time.perf_counter() - t
+    t = time.perf_counter()
+    shortlisted = sum(len(index.shortlist(need, args.candidates)) for need in needs)
+    shortlist_seconds = time.perf_counter() - t
+    t = time.perf_counter()
+    allocations = probono.allocate(offers, needs, args.candidates)
+    allocate_seconds = time.perf_counter() - t
+
+    hours_needed = sum(n["hours"] for n in need_rows)
+    hours_matched = sum(a.hours for a in allocations)
+    over = {}
+    for a in allocations:
+        over[a.offer_id] = over.get(a.offer_id, 0) + a.hours
+    overbooked = sum(1 for o in offer_rows if over.get(o["id"], 0) > o["hours"])
+
+    t = time.perf_counter()
+    _write(engine, cause_rows, need_rows, offer_rows)
+    write_seconds = time.perf_counter() - t
+    db = SessionLocal()
+    try:
+        t = time.perf_counter()
+        report = probono.run_matching(db)
+        run_seconds = time.perf_counter() - t
+    finally:
+        db.close()
+    engine.dispose()
+
+    print(json.dumps({
+        "offers": len(offers),
+        "needs": len(needs),
+        "candidates_per_need": args.candidates,
+        "generate_seconds": round(generate_seconds, 3),
+        "engine": {
+            "index_seconds": round(index_seconds, 3),
+            "shortlist_seconds": round(shortlist_seconds, 3),
+            "shortlisted_pairs": shortlisted,
+            "allocate_seconds": round(allocate_seconds, 3),
+            "matches": len(allocations),
+            "hours_needed": hours_needed,
+            "hours_matched": hours_matched,
+            "fill_rate": round(hours_matched / hours_needed, 4) if hours_needed else None,
+            "overbooked_offers": overbooked,
+        },
+        "database": {"insert_seconds": round(write_seconds, 3), "run_matching_seconds": round(run_seconds, 3), **report.to_dict()},
+    }))
+    return 1 if overbooked or report.hours_matched != hours_matched else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--offers", type=int, default=100_000)
+    parser.add_argument("--causes", type=int, default=5_000)
+    parser.add_argument("--candidates", type=int, default=50, help="offers shortlisted per need")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/probono_bench.db")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
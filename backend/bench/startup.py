@@ -0,0 +1,125 @@
+"""Boot time: `import app.main`, then startup hooks and the first /api/health, in fresh processes.
+
+Each sample is a new interpreter against a SQLite file: "cold" samples start from an empty
+database (the schema gets created), "warm" ones reuse a database whose schema is current, like a
+restarted worker. The child also reports which optional SDKs the boot pulled in; stripe, openai
+and passlib should only load when first used (or on the warm-up thread, when configured).
+
+Exits 1 when the median warm boot exceeds --budget-ms or an SDK loads eagerly, so CI can hold the line:
+
+    cd backend && python -m bench.startup --samples 7 --budget-ms 2500
+    cd backend && python -m bench.startup --features catalog,auth
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# stays unloaded through boot: the SDKs are imported on first use, passlib on the first password operation
+LAZY_MODULES = ("stripe", "openai", "passlib")
+
+_CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def boot():
+    from app.db import async_engine, async_replica_engine
+    await app.main.app.router.startup()
+    booted = time.perf_counter()
+    loaded = sorted(m for m in LAZY_MODULES if m in sys.modules)
+    import httpx  # after the snapshot: only the probe needs it
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get("/api/health")
+    answered = time.perf_counter()
+    await app.main.app.router.shutdown()
+    await async_engine.dispose()
+    await async_replica_engine.dispose()
+    return booted, answered, response.status_code, loaded
+
+import asyncio
+booted, answered, status, loaded = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (booted - imported) * 1000,
+    "first_response_ms": (answered - started) * 1000,
+    "status": status,
+    "eager_modules": loaded,
+    "routes": len(app.main.app.routes),
+}))
+"""
+
+
+def sample(database: str, features: str) -> dict:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{database}",
+        FEATURES=features,
+        # keep the periodic jobs from running inside the measurement
+        JOB_WORKERS="0",
+        # and the SDK warm-up thread out of the eager-import check
+        STRIPE_API_KEY="",
+        OPENAI_API_KEY="",
+    )
+    code = f"LAZY_MODULES = {LAZY_MODULES!r}\n{_CHILD}"
+    started = time.perf_counter()
+    done = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=os.getcwd())
+    wall_ms = (time.perf_counter() - started) * 1000
+    if done.returncode != 0:
+        raise RuntimeError(f"boot failed:\n{done.stderr}")
+    result = json.loads(done.stdout.strip().splitlines()[-1])
+    result["process_ms"] = wall_ms
+    return result
+
+
+def summarize(samples: list) -> dict:
+    out = {}
+    for field in ("import_ms", "startup_ms", "first_response_ms", "process_ms"):
+        values = [s[field] for s in samples]
+        out[field] = {"median": round(statistics.median(values), 1), "max": round(max(values), 1)}
+    out["eager_modules"] = sorted({m for s in samples for m in s["eager_modules"]})
+    out["routes"] = samples[0]["routes"]
+    return out
+
+
+def run(args) -> int:
+    workdir = tempfile.mkdtemp()
+    cold = [sample(os.path.join(workdir, f"cold{i}.db"), args.features) for i in range(args.samples)]
+    warm_db = os.path.join(workdir, "warm.db")
+    sample(warm_db, args.features)  # creates the schema and records its fingerprint
+    warm = [sample(warm_db, args.features) for _ in range(args.samples)]
+
+    report = {"features": args.features, "samples": args.samples, "cold": summarize(cold), "warm": summarize(warm),
+              "budget_ms": args.budget_ms}
+    failures = []
+    if any(s["status"] != 200 for s in cold + warm):
+        failures.append("/api/health did not answer 200")
+    eager = sorted(set(report["cold"]["eager_modules"]) | set(report["warm"]["eager_modules"]))
+    if eager:
+        failures.append(f"loaded during boot: {', '.join(eager)}")
+    median = report["warm"]["first_response_ms"]["median"]
+    if args.budget_ms and median > args.budget_ms:
+        failures.append(f"warm boot median {median} ms is over the {args.budget_ms} ms budget")
+    report["failures"] = failures
+    print(json.dumps(report, indent=2))
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5, help="processes per cold/warm series")
+    parser.add_argument("--features", default="all", help="FEATURES for the booted app")
+    parser.add_argument("--budget-ms", type=float, default=2500, help="warm boot-to-first-response budget; 0 disables")
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
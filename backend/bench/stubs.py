@@ -0,0 +1,82 @@
+"""In-process stand-ins for OpenAI and Stripe, with a configurable response delay.
+
+The OpenAI stub is an httpx transport handed to `LLMClient`, so requests still go through
+the real SDK, retries and concurrency limit; the Stripe stub replaces the checkout call.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import httpx
+
+
+def _chat_content(body: Dict[str, Any]) -> str:
+    system = body["messages"][0]["content"]
+    if "match a user to tribes" in system:
+        tribes = json.loads(body["messages"][-1]["content"]).get("tribes", [])
+        return json.dumps([
+            {"id": t["id"], "score": round(10 - i * 0.5, 1), "explanation": "Shares your interests."}
+            for i, t in enumerate(tribes)
+        ])
+    return json.dumps({"reply": "Great to meet you! Which causes matter most to you?",
+                       "profile_delta": {"interests": ["climate"], "skills": ["design"]}})
+
+
+def _embedding(text: str, dims: int) -> List[float]:
+    digest = hashlib.sha256(text.encode()).digest()
+    return [(digest[i % len(digest)] - 128) / 128.0 for i in range(dims)]
+
+
+def openai_transport(latency_ms: float = 0.0) -> httpx.MockTransport:
+    async def handle(request: httpx.Request) -> httpx.Response:
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        body = json.loads(request.content or b"{}")
+        if request.url.path.endswith("/embeddings"):
+            texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            dims = body.get("dimensions") or 256
+            return httpx.Response(200, json={
+                "object": "list",
+                "model": body["model"],
+                "data": [{"object": "embedding", "index": i, "embedding": _embedding(t, dims)} for i, t in enumerate(texts)],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            })
+        content = _chat_content(body)
+        if body.get("stream"):
+            chunks = [
+                {"id": "bench", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                 "choices": [{"index": 0, "delta": {"content": content[i:i + 16]}, "finish_reason": None}]}
+                for i in range(0, len(content), 16)
+            ]
+            sse = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=sse.encode())
+        return httpx.Response(200, json={
+            "id": "bench", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        })
+
+    return httpx.MockTransport(handle)
+
+
+def install_openai_stub(latency_ms: float = 0.0) -> None:
+    from app.services.llm import LLMClient, configure_llm_client
+
+    configure_llm_client(LLMClient(api_key="bench", base_url="http://openai.stub/v1", transport=openai_transport(latency_ms)))
+
+
+def install_stripe_stub(latency_ms: float = 0.0) -> None:
+    """Checkout sessions come back after `latency_ms` (the SDK call is blocking, so is this)."""
+    import stripe
+
+    counter = iter(range(1, 1 << 62))
+
+    def create(**params):
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        session_id = f"cs_bench_{next(counter)}"
+        return SimpleNamespace(id=session_id, url=f"https://checkout.stripe.test/{session_id}")
+
+    stripe.checkout.Session.create = create
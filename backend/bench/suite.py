@@ -0,0 +1,240 @@
+"""End-to-end latency and throughput of the main API endpoints on a synthetic dataset.
+
+Seeds (or reuses) a `bench.datasets` database, starts the app in-process behind httpx's ASGI
+transport with OpenAI and Stripe replaced by `bench.stubs`, then drives each scenario with
+a fixed concurrency. Prints p50/p99/throughput per endpoint and writes the full results as
+JSON; `--compare` diffs them against an earlier run and flags regressions.
+
+    cd backend && python -m bench.suite --size 100k --requests 500 --concurrency 32
+    cd backend && python -m bench.suite --size 100k --compare bench/results/<earlier>.json --fail-on-regression
+"""
+import argparse
+import asyncio
+import datetime as dt
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Tuple
+
+from bench.datasets import CITIES, SIZES, TERMS
+from bench.webhook_load import WEBHOOK_SECRET, checkout_event, sign
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+Request = Tuple[str, str, dict]
+
+
+def _profile(rng: random.Random) -> dict:
+    city = rng.choice(CITIES)
+    profile = {"interests": rng.sample(TERMS, 3), "skills": rng.sample(TERMS, 2), "location": [city[0]]}
+    if city[1] is not None:
+        profile.update(location_lat=city[1], location_lng=city[2])
+    return profile
+
+
+def _webhook(rng: random.Random, ctx: dict) -> Request:
+    ctx["events"] += 1
+    payload = checkout_event(f"evt_bench_{ctx['run']}_{ctx['events']}", rng.randint(1, ctx["causes"]), rng.randint(500, 20000))
+    return "POST", "/api/stripe/webhook", {"content": payload, "headers": {"stripe-signature": sign(payload)}}
+
+
+def _chat(rng: random.Random, ctx: dict) -> Request:
+    message = {"role": "user", "content": f"I care about {rng.choice(TERMS)} and live in {rng.choice(CITIES)[0]}"}
+    return "POST", "/api/onboarding/ai-chat", {"json": {"session_id": f"bench-{rng.getrandbits(48)}", "messages": [message]}}
+
+
+SCENARIOS: Dict[str, Callable[[random.Random, dict], Request]] = {
+    "public_tribes": lambda rng, ctx: ("GET", f"/api/public/tribes?cursor={rng.randrange(ctx['tribes'])}&limit=50", {}),
+    "public_causes": lambda rng, ctx: ("GET", f"/api/public/causes?cursor={rng.randrange(ctx['causes'])}&urgency=High", {}),
+    "public_cause": lambda rng, ctx: ("GET", f"/api/public/causes/{rng.randint(1, ctx['causes'])}", {}),
+    "public_search": lambda rng, ctx: ("GET", f"/api/public/search?q={rng.choice(TERMS)}+{rng.choice(TERMS)}", {}),
+    "public_nearby": lambda rng, ctx: ("GET", "/api/public/nearby?lat=%.3f&lng=%.3f&kind=cause" % rng.choice(CITIES[:8])[1:], {}),
+    "public_stats": lambda rng, ctx: ("GET", "/api/public/stats", {}),
+    "suggest_tribes": lambda rng, ctx: ("POST", "/api/onboarding/suggest-tribes", {"json": _profile(rng)}),
+    "ai_chat": _chat,
+    "stripe_webhook": _webhook,
+    "checkout": lambda rng, ctx: (
+        "POST", "/api/donations/create-checkout-session", {"json": {"cause_id": rng.randint(1, ctx["causes"]), "amount": 25}}
+    ),
+}
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def run_scenario(client, name: str, ctx: dict, requests: int, concurrency: int, warmup: int, seed: int) -> dict:
+    rng = random.Random(f"{seed}:{name}")
+    make = SCENARIOS[name]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async def one(record: bool):
+        method, url, kwargs = make(rng, ctx)
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = time.perf_counter() - started
+        if record:
+            latencies.append(elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(one(False) for _ in range(warmup)))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(True) for _ in range(requests)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "throughput_rps": round(requests / wall, 1),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Print per-scenario changes; returns the scenarios whose p99 or throughput regressed."""
+    regressions = []
+    print(f"\n{'scenario':<16} {'p50 ms':>18} {'p99 ms':>18} {'rps':>18}")
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            print(f"{name:<16} (new)")
+            continue
+
+        def cell(key):
+            change = (now[key] - before[key]) / before[key] if before[key] else 0.0
+            return f"{before[key]:>7} -> {now[key]:<7}{change:+.0%}"[:18].rjust(18), change
+
+        p50, _ = cell("p50_ms")
+        p99, p99_change = cell("p99_ms")
+        rps, rps_change = cell("throughput_rps")
+        regressed = p99_change > threshold or rps_change < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<16} {p50} {p99} {rps}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    import httpx
+
+    from app.db import async_engine, async_replica_engine, engine
+    from app.main import app
+    from app.services.jobs import job_queue
+    from bench import stubs
+    from bench.datasets import seed
+
+    log = lambda msg: print(msg, file=sys.stderr, flush=True)  # noqa: E731
+    started = time.perf_counter()
+    counts = seed(engine, args.size, args.seed, log=log)
+    seed_seconds = time.perf_counter() - started
+
+    stubs.install_openai_stub(args.openai_latency_ms)
+    stubs.install_stripe_stub(args.stripe_latency_ms)
+    # ASGITransport does not send lifespan events; run the startup hooks (schema, job workers, syncs) directly
+    await app.router.startup()
+    if not await job_queue.drain(timeout=args.drain_timeout):
+        log("warning: startup jobs still running; first scenarios may be slower")
+
+    ctx = {"tribes": counts["tribes"], "causes": counts["causes"], "events": 0, "run": int(time.time())}
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for name in args.scenarios:
+            results[name] = await run_scenario(client, name, ctx, args.requests, args.concurrency, args.warmup, args.seed)
+            r = results[name]
+            log(f"{name:<16} p50 {r['p50_ms']:>8} ms  p99 {r['p99_ms']:>8} ms  {r['throughput_rps']:>8} req/s  errors {r['errors']}")
+            # let queued side effects (webhook donations, chat transcripts) finish before the next scenario
+            await job_queue.drain(timeout=args.drain_timeout)
+    await app.router.shutdown()
+    # aiosqlite keeps a thread per pooled connection, which would keep the process alive
+    await async_engine.dispose()
+    await async_replica_engine.dispose()
+    return {
+        "meta": {
+            "created_at": dt.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": engine.url.get_backend_name(),
+            "size": args.size,
+            "rows": counts,
+            "seed_seconds": round(seed_seconds, 1),
+            "ai": not args.no_ai,
+            "openai_latency_ms": args.openai_latency_ms,
+            "stripe_latency_ms": args.stripe_latency_ms,
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=list(SIZES), default="1k")
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=300, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--openai-latency-ms", type=float, default=300.0, help="simulated OpenAI response time")
+    parser.add_argument("--stripe-latency-ms", type=float, default=150.0, help="simulated Stripe API response time")
+    parser.add_argument("--no-ai", action="store_true", help="run without OPENAI_API_KEY (heuristic paths only)")
+    parser.add_argument("--drain-timeout", type=float, default=600.0)
+    parser.add_argument("--database-url", help="reuse a seeded database; defaults to a fresh temporary SQLite file")
+    parser.add_argument("--output", help=f"results file, defaults to {RESULTS_DIR}/<timestamp>-<size>.json")
+    parser.add_argument("--compare", help="earlier results file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative p99/throughput change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_{args.size}.db"
+    os.environ["STRIPE_API_KEY"] = "sk_test_bench"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+    if args.no_ai:
+        os.environ.pop("OPENAI_API_KEY", None)
+    else:
+        os.environ["OPENAI_API_KEY"] = "bench"
+    # embedding every synthetic tribe through the stub is a benchmark of the stub; hash locally unless asked
+    os.environ.setdefault("EMBEDDING_BACKEND", "hashing")
+    # one client hammering the AI endpoints is exactly what the rate limits stop; measure the endpoints instead
+    os.environ.setdefault("RATE_LIMIT_SUGGEST", "0")
+    os.environ.setdefault("RATE_LIMIT_AI_CHAT", "0")
+
+    results = asyncio.run(run(args))
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{dt.datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{args.size}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"regressed: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
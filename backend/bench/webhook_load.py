@@ -0,0 +1,142 @@
+"""Replay signed Stripe checkout events against the webhook and check the totals.
+
+Runs the app in-process through httpx's ASGI transport on a throwaway SQLite file, so
+no Stripe account or network is involved. The webhook only queues events; the run waits
+for the job workers to apply them before checking. Duplicate deliveries are mixed in to prove
+idempotency; the run fails if any donation is lost or double counted.
+
+    cd backend && python -m bench.webhook_load --events 2000 --duplicates 200 --concurrency 64
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+WEBHOOK_SECRET = "whsec_loadtest"
+
+
+def sign(payload: str, secret: str = WEBHOOK_SECRET) -> str:
+    timestamp = int(time.time())
+    mac = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={mac}"
+
+
+def checkout_event(event_id: str, cause_id: int, amount_cents: int) -> str:
+    return json.dumps({
+        "id": event_id,
+        "object": "event",
+        "type": "checkout.session.completed",
+        "data": {"object": {"object": "checkout.session", "amount_total": amount_cents, "metadata": {"cause_id": str(cause_id)}}},
+    })
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args) -> int:
+    import httpx
+    from app.db import Base, engine, SessionLocal
+    from app import models
+    from app.main import app
+    from app.services.jobs import job_queue
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    causes = [models.Cause(name=f"Load cause {i}", funding_goal=1e9) for i in range(args.causes)]
+    db.add_all(causes)
+    db.commit()
+    cause_ids = [c.id for c in causes]
+    db.close()
+
+    # ASGITransport does not run lifespan events, so start the job workers by hand
+    await job_queue.start(args.workers)
+
+    rng = random.Random(42)
+    events = [(f"evt_load_{i}", rng.choice(cause_ids), rng.randint(100, 50000)) for i in range(args.events)]
+    deliveries = events + rng.sample(events, min(args.duplicates, len(events)))
+    rng.shuffle(deliveries)
+
+    latencies = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def deliver(event):
+            payload = checkout_event(*event)
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/stripe/webhook", content=payload, headers={"stripe-signature": sign(payload)}
+                )
+                latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(deliver(e) for e in deliveries))
+        acked = time.perf_counter() - started
+        drained = await job_queue.drain(timeout=600)
+        elapsed = time.perf_counter() - started
+    await job_queue.stop()
+
+    expected_funds = {cid: 0.0 for cid in cause_ids}
+    expected_supporters = {cid: 0 for cid in cause_ids}
+    for _, cause_id, cents in events:
+        expected_funds[cause_id] += cents / 100.0
+        expected_supporters[cause_id] += 1
+
+    db = SessionLocal()
+    errors = [] if drained else ["job queue did not drain"]
+    for cause in db.query(models.Cause).filter(models.Cause.id.in_(cause_ids)):
+        if abs(cause.funds_raised - expected_funds[cause.id]) > 0.005:
+            errors.append(f"cause {cause.id}: funds {cause.funds_raised} != {expected_funds[cause.id]}")
+        if cause.supporters_count != expected_supporters[cause.id]:
+            errors.append(f"cause {cause.id}: supporters {cause.supporters_count} != {expected_supporters[cause.id]}")
+    donations = db.query(models.Donation).count()
+    if donations != len(events):
+        errors.append(f"donations {donations} != {len(events)}")
+    db.close()
+
+    print(json.dumps({
+        "deliveries": len(deliveries),
+        "unique_events": len(events),
+        "concurrency": args.concurrency,
+        "ack_seconds": round(acked, 3),
+        "ack_throughput_rps": round(len(deliveries) / acked, 1),
+        "applied_seconds": round(elapsed, 3),
+        "applied_throughput_rps": round(len(deliveries) / elapsed, 1),
+        "jobs": job_queue.stats(),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "consistent": not errors,
+    }, indent=2))
+    for error in errors[:20]:
+        print(error, file=sys.stderr)
+    return 1 if errors else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--duplicates", type=int, default=100)
+    parser.add_argument("--causes", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4, help="job queue workers")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/webhook_load.db"
+    os.environ["STRIPE_WEBHOOK_SECRET"] = WEBHOOK_SECRET
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
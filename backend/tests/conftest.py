@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+# settings are read at import time: point the app at a throwaway database before anything imports it
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["JOB_WORKERS"] = "0"
+os.environ["OPENAI_API_KEY"] = ""
+os.environ["STRIPE_API_KEY"] = ""
+os.environ["EMBEDDING_BACKEND"] = "hashing"
+os.environ["RATE_LIMIT_BACKEND"] = "none"
+# tests call changes.poll() themselves
+os.environ["CHANGE_POLL_INTERVAL_SECONDS"] = "0"
+
+import itertools  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+_emails = itertools.count()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def member(client):
+    """Bearer headers of a freshly self-registered user."""
+    email = f"member{next(_emails)}@example.org"
+    r = client.post("/api/auth/register", json={"email": email, "password": "correct horse"})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+def admin(client):
+    from app.admin import set_role
+    from app.db import SessionLocal
+    from app.dependencies import user_cache
+
+    email = f"admin{next(_emails)}@example.org"
+    r = client.post("/api/auth/register", json={"email": email, "password": "correct horse"})
+    assert r.status_code == 200, r.text
+    db = SessionLocal()
+    try:
+        assert set_role(db, email, "admin")
+    finally:
+        db.close()
+    user_cache.clear()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
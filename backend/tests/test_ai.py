@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import ai
+from app.services.llm import configure_llm_client
+
+
+class ScriptedLLM:
+    """Answers every chat completion with the same reply and counts the calls."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    async def chat_completion(self, messages, **kwargs):
+        self.calls += 1
+        return self.reply
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    monkeypatch.setattr(get_settings(), "openai_api_key", "test")
+
+    def make(ranking):
+        llm = ScriptedLLM(json.dumps(ranking))
+        configure_llm_client(llm)
+        return llm
+
+    yield make
+    configure_llm_client(None)
+
+
+def _tribes(tag):
+    return [
+        {"id": 1, "name": f"{tag} A", "description": "", "location": None, "score": 3.0},
+        {"id": 2, "name": f"{tag} B", "description": "", "location": None, "score": 2.0},
+        {"id": 3, "name": f"{tag} C", "description": "", "location": None, "score": 1.0},
+    ]
+
+
+def _rerank(tribes):
+    return asyncio.run(ai.rerank_tribes_with_ai(tribes, ["ocean"], [], []))
+
+
+def test_unparseable_scores_keep_heuristic_order(scripted):
+    tribes = _tribes("unparseable")
+    llm = scripted([
+        {"id": 1, "score": "high", "explanation": "?"},
+        {"id": 2, "score": None},
+        {"id": 3, "score": "8/10"},
+    ])
+    assert [t["id"] for t in _rerank(tribes)] == [1, 2, 3]
+    # the cached ranking is just as usable, from both read paths
+    assert [t["id"] for t in _rerank(tribes)] == [1, 2, 3]
+    assert [t["id"] for t in ai.rerank_or_schedule(tribes, ["ocean"], [], [])] == [1, 2, 3]
+    assert llm.calls == 1
+
+
+def test_numeric_strings_are_normalized_before_caching(scripted):
+    tribes = _tribes("numeric")
+    scripted([{"id": 3, "score": "9.5", "explanation": "best"}, {"id": 1, "score": "nope"}])
+    ranked = _rerank(tribes)
+    assert [t["id"] for t in ranked] == [3, 1, 2]
+    assert ranked[0]["score"] == 9.5 and ranked[0]["explanation"] == "best"
+
+    key = ai.rerank_cache_key(ai._prompt_tribes(tribes), ["ocean"], [], [])
+    assert ai.get_rerank_cache().get(key) == [{"id": 3, "score": 9.5, "explanation": "best"}]
+
+
+def test_apply_ranking_falls_back_on_bad_cached_scores():
+    ranked = ai._apply_ranking(_tribes("cached"), [{"id": 2, "score": "high"}, {"id": 3, "score": 7}])
+    assert [(t["id"], t["score"]) for t in ranked] == [(3, 7.0), (1, 3.0), (2, 2.0)]
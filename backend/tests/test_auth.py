@@ -0,0 +1,12 @@
+def test_register_ignores_requested_role(client):
+    r = client.post("/api/auth/register", json={"email": "sneaky@example.org", "password": "pw", "role": "admin"})
+    assert r.status_code == 200
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {r.json()['access_token']}"})
+    assert me.json()["role"] == "member"
+
+
+def test_bulk_routes_need_admin(client, member, admin):
+    body = b"name,mission\nBulk Cause,Testing\n"
+    assert client.post("/api/bulk/causes/import", content=body, headers={**member, "Content-Type": "text/csv"}).status_code == 403
+    assert client.get("/api/bulk/causes/export", headers=member).status_code == 403
+    assert client.get("/api/bulk/causes/export", headers=admin).status_code == 200
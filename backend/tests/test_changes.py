@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+from app.services import changes
+
+
+def _suggested(client, interest):
+    r = client.post("/api/onboarding/suggest-tribes", json={"interests": [interest], "skills": [], "location": []})
+    assert r.status_code == 200, r.text
+    return [t["name"] for t in r.json() if t["score"] > 0]
+
+
+def test_cli_import_reaches_running_api(client, tmp_path):
+    assert "Ocean Cleanup Crew" not in _suggested(client, "ocean")  # loads the tribe index
+    names = [t["name"] for t in client.get("/api/public/tribes").json()]  # fills the catalog cache
+    changes.poll()
+
+    rows = tmp_path / "tribes.csv"
+    rows.write_text("name,description,location\nOcean Cleanup Crew,Beach and ocean cleanups,Lisbon\n")
+    done = subprocess.run([sys.executable, "-m", "app.services.bulk", "import", "tribes", str(rows)], capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+
+    assert changes.models.Tribe in changes.poll()
+    assert "Ocean Cleanup Crew" in _suggested(client, "ocean")
+    assert [t["name"] for t in client.get("/api/public/tribes").json()] == names + ["Ocean Cleanup Crew"]
+
+
+def test_own_writes_are_not_reloaded(client, admin):
+    changes.poll()
+    r = client.post("/api/bulk/tribes/import", content=b"name,description\nLocal Tribe,Written here\n",
+                    headers={**admin, "Content-Type": "text/csv"})
+    assert r.status_code == 200
+    assert changes.poll() == []
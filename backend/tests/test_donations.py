@@ -0,0 +1,90 @@
+import itertools
+import json
+import subprocess
+import sys
+
+from sqlalchemy import select
+
+from app import models
+from app.db import SessionLocal
+from app.services import changes
+from app.services.donations import record_stripe_event
+from app.services.geo import cause_geo
+from app.services.search import search_service
+
+_events = itertools.count()
+
+
+def _cause(name):
+    db = SessionLocal()
+    try:
+        cause = models.Cause(name=name, mission="", category="Donations Test", funding_goal=100)
+        db.add(cause)
+        db.commit()
+        return cause.id
+    finally:
+        db.close()
+
+
+def _checkout(cause_id, **metadata):
+    return {
+        "id": f"evt_test_{next(_events)}",
+        "type": "checkout.session.completed",
+        "data": {"object": {"amount_total": 2500, "metadata": {"cause_id": str(cause_id), **metadata}}},
+    }
+
+
+def _versions():
+    db = SessionLocal()
+    try:
+        return dict(db.execute(select(models.ChangeVersion.name, models.ChangeVersion.version)).all())
+    finally:
+        db.close()
+
+
+def _counters(cause_id):
+    db = SessionLocal()
+    try:
+        cause = db.get(models.Cause, cause_id)
+        return cause.funds_raised, cause.supporters_count
+    finally:
+        db.close()
+
+
+def test_donation_in_another_worker_does_not_reload_indexes(client):
+    cause_id = _cause("Counter Only Cause")
+    assert client.get("/api/public/search", params={"q": "counter", "kind": "cause"}).status_code == 200
+    assert client.get("/api/public/nearby", params={"lat": 0, "lng": 0, "kind": "cause"}).status_code == 200
+    changes.poll()
+    before = _versions()
+
+    code = (
+        "import json, sys\n"
+        "from app.db import SessionLocal\n"
+        "from app.services.donations import record_stripe_event\n"
+        "assert record_stripe_event(SessionLocal(), json.loads(sys.argv[1]))\n"
+    )
+    done = subprocess.run([sys.executable, "-c", code, json.dumps(_checkout(cause_id))], capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+
+    assert _counters(cause_id) == (25.0, 1)
+    assert _versions() == before
+    assert changes.poll() == []
+    assert cause_geo._loaded and "cause" in search_service._loaded
+
+
+def test_malformed_metadata_is_recorded_without_effects(client):
+    cause_id = _cause("Malformed Metadata Cause")
+    bad_cause = _checkout(cause_id)
+    bad_cause["data"]["object"]["metadata"]["cause_id"] = "abc"
+    bad_donor = _checkout(cause_id, user_id="not-a-number")
+    db = SessionLocal()
+    try:
+        assert record_stripe_event(db, bad_cause)
+        assert record_stripe_event(db, bad_donor)
+        # processed, so the job is done instead of retrying until it is dead-lettered
+        assert not record_stripe_event(db, bad_cause)
+        assert not record_stripe_event(db, bad_donor)
+    finally:
+        db.close()
+    assert _counters(cause_id) == (0, 0)
@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+
+from app import models
+from app.db import SessionLocal
+from app.services.embeddings import HashingEmbedder, TribeEmbeddings, VectorIndex
+
+
+def _embed(embedder, texts):
+    return asyncio.run(embedder.embed(texts))
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    a, b = _embed(HashingEmbedder(128), ["ocean cleanup volunteers", "ocean cleanup volunteers"])
+    assert np.array_equal(a, b)
+    assert np.isclose(np.linalg.norm(a), 1.0)
+    assert not _embed(HashingEmbedder(128), [""]).any()
+
+
+def test_shared_tokens_mean_higher_cosine():
+    query, near, far = _embed(HashingEmbedder(256), ["ocean cleanup", "weekend ocean cleanup crew", "python mentoring"])
+    assert query @ near > query @ far
+
+
+def test_vector_index_orders_by_cosine_then_id():
+    index = VectorIndex(2)
+    index.replace([(3, np.array([1, 0], np.float32)), (1, np.array([1, 0], np.float32)), (2, np.array([0, 1], np.float32))])
+    assert [pk for pk, _ in index.search(np.array([1, 0], np.float32), 2)] == [1, 3]
+    index.remove(1)
+    index.upsert(4, np.array([0.6, 0.8], np.float32))
+    assert [pk for pk, _ in index.search(np.array([1, 0], np.float32), 10)] == [3, 4, 2]
+
+
+def test_shortlist_finds_the_matching_tribe_and_sync_is_incremental(client):
+    db = SessionLocal()
+    try:
+        tribes = [
+            models.Tribe(name="Zither Circle", description="folk zither ensemble", location="Vienna"),
+            models.Tribe(name="Marimba Makers", description="building marimbas from reclaimed wood", location="Accra"),
+        ]
+        db.add_all(tribes)
+        db.commit()
+        zither, marimba = (t.id for t in tribes)
+    finally:
+        db.close()
+
+    store = TribeEmbeddings(HashingEmbedder(256))
+    assert asyncio.run(store.sync()) >= 2
+    assert asyncio.run(store.sync()) == 0  # nothing changed since
+
+    db = SessionLocal()
+    try:
+        store.ensure_loaded(db)
+        shortlist = asyncio.run(store.shortlist(["marimba", "reclaimed wood"], [], ["Accra"], k=3))
+        assert shortlist[0][0] == marimba
+        assert zither not in [pk for pk, _ in shortlist[:1]]
+
+        db.get(models.Tribe, zither).description = "zither and dulcimer ensemble"
+        db.commit()
+    finally:
+        db.close()
+    assert asyncio.run(store.sync()) == 1
@@ -0,0 +1,37 @@
+import pytest
+
+from app import models
+from app.db import SessionLocal
+from app.services import job_handlers
+
+
+def _pending(kind):
+    db = SessionLocal()
+    try:
+        return [job.dedupe_key for job in db.query(models.Job).filter_by(kind=kind, status="queued")]
+    finally:
+        db.close()
+
+
+def _clear(kind):
+    db = SessionLocal()
+    try:
+        db.query(models.Job).filter_by(kind=kind).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("kind, handler, target", [
+    ("stats.rebuild", job_handlers.handle_stats_rebuild, "rebuild_rollups"),
+    ("probono.match", job_handlers.handle_probono_match, "run_matching"),
+])
+def test_failed_periodic_run_still_schedules_the_next(client, monkeypatch, kind, handler, target):
+    def fail(db):
+        raise RuntimeError("database unavailable")
+
+    _clear(kind)
+    monkeypatch.setattr(job_handlers, target, fail)
+    with pytest.raises(RuntimeError):
+        handler({})
+    assert [key for key in _pending(kind) if not key.endswith(":now")], "next periodic run was not queued"
@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.core.config import get_settings
+from app.services.llm import LLMClient, configure_llm_client, get_llm_client
+
+
+def _completion(content):
+    return httpx.Response(200, json={
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+class FakeTransport(httpx.AsyncBaseTransport):
+    """Plays back one response (or exception) per request and records what was sent."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    monkeypatch.setattr(get_settings(), "openai_api_key", "test")
+    clients = []
+
+    def make(*outcomes, **kwargs):
+        transport = FakeTransport(*outcomes)
+        client = LLMClient(api_key="test", transport=transport, **kwargs)
+        configure_llm_client(client)
+        clients.append(client)
+        return client, transport
+
+    yield make
+    configure_llm_client(None)
+    for client in clients:
+        asyncio.run(client.aclose())
+
+
+def _chat(**kwargs):
+    return asyncio.run(get_llm_client().chat_completion([{"role": "user", "content": "hi"}], **kwargs))
+
+
+def test_configured_client_is_used(llm):
+    client, transport = llm(_completion("hello"))
+    assert get_llm_client() is client
+    assert _chat() == "hello"
+    assert len(transport.requests) == 1
+
+
+def test_server_errors_are_retried(llm):
+    _, transport = llm(httpx.Response(500, json={"error": {"message": "boom"}}), _completion("second time"), max_attempts=3)
+    assert _chat() == "second time"
+    assert len(transport.requests) == 2
+
+
+def test_client_errors_are_not_retried(llm):
+    _, transport = llm(httpx.Response(400, json={"error": {"message": "bad"}}), _completion("unused"), max_attempts=3)
+    with pytest.raises(openai.BadRequestError):
+        _chat()
+    assert len(transport.requests) == 1
+
+
+def test_timeouts_are_retried_then_raised(llm):
+    _, transport = llm(httpx.ReadTimeout("slow"), httpx.ReadTimeout("slow"), max_attempts=2, timeout=5.0)
+    with pytest.raises(openai.APITimeoutError):
+        _chat(timeout=0.25)
+    assert len(transport.requests) == 2
+    # the per-call timeout reaches the HTTP request
+    assert transport.requests[0].extensions["timeout"]["read"] == 0.25
@@ -0,0 +1,27 @@
+def _cause_id(client):
+    from app import models
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        cause = models.Cause(name="Probono Cause", mission="Testing", funding_goal=1000)
+        db.add(cause)
+        db.commit()
+        return cause.id
+    finally:
+        db.close()
+
+
+def test_needs_and_matching_need_admin(client, member, admin):
+    cause_id = _cause_id(client)
+    needs = [{"skill": "grant writing", "hours": 10}]
+
+    assert client.put(f"/api/probono/causes/{cause_id}/needs", json=needs, headers=member).status_code == 403
+    assert client.get(f"/api/probono/causes/{cause_id}/matches", headers=member).status_code == 403
+    assert client.post("/api/probono/match", headers=member).status_code == 403
+    assert client.get(f"/api/probono/causes/{cause_id}/needs").json() == []
+
+    r = client.put(f"/api/probono/causes/{cause_id}/needs", json=needs, headers=admin)
+    assert r.status_code == 200
+    assert [n["skill"] for n in r.json()] == ["grant writing"]
+    assert client.get(f"/api/probono/causes/{cause_id}/matches", headers=admin).status_code == 200
@@ -0,0 +1,23 @@
+from app.db import get_async_read_db
+from app.main import app
+
+
+async def _lagging_replica():
+    raise AssertionError("cached catalog responses must be built from the primary")
+    yield
+
+
+def test_cached_catalog_reads_the_primary(client):
+    app.dependency_overrides[get_async_read_db] = _lagging_replica
+    try:
+        for path in ("/api/public/tribes?limit=7", "/api/public/causes?limit=7", "/api/public/stats?top=7"):
+            assert client.get(path).status_code == 200, path
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_catalog_revalidates_with_etag(client):
+    first = client.get("/api/public/causes")
+    assert first.status_code == 200
+    again = client.get("/api/public/causes", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,49 @@
+from starlette.requests import Request
+
+from app.core.config import get_settings
+from app.services import ratelimit
+from app.services.ratelimit import MemoryBuckets, RateLimiter, client_ip
+
+
+def _request(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("172.18.0.5", 40000),
+    })
+
+
+def test_client_ip_ignores_forwarded_headers_unless_trusted(monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_trust_forwarded", False)
+    assert client_ip(_request({"X-Real-IP": "203.0.113.7"})) == "172.18.0.5"
+
+
+def test_client_ip_behind_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_trust_forwarded", True)
+    assert client_ip(_request({"X-Real-IP": "203.0.113.7", "X-Forwarded-For": "1.2.3.4, 203.0.113.7"})) == "203.0.113.7"
+    # a client-supplied first hop is not the caller
+    assert client_ip(_request({"X-Forwarded-For": "1.2.3.4, 203.0.113.7"})) == "203.0.113.7"
+    assert client_ip(_request({})) == "172.18.0.5"
+
+
+def test_limiter_is_per_key():
+    limiter = RateLimiter("test", capacity=2, per_seconds=60, buckets=MemoryBuckets())
+    assert limiter.check(["ip:a"]).allowed
+    assert limiter.check(["ip:a"]).allowed
+    denied = limiter.check(["ip:a"])
+    assert not denied.allowed and denied.retry_after > 0 and denied.limited_by == "ip:a"
+    assert limiter.check(["ip:b"]).allowed
+
+
+def test_ai_chat_ignores_claimed_user_id(client, monkeypatch):
+    limiter = RateLimiter("ai_chat", capacity=2, per_seconds=60, buckets=MemoryBuckets())
+    monkeypatch.setattr(ratelimit, "get_limiter", lambda name: limiter if name == "ai_chat" else None)
+    monkeypatch.setattr(get_settings(), "allow_unauthenticated_user_id", True)
+
+    def chat(n):
+        # a fresh claimed user id (and session) per request must not buy a fresh bucket
+        return client.post("/api/onboarding/ai-chat", json={
+            "session_id": f"rotating-{n}", "user_id": 9000 + n, "messages": [{"role": "user", "content": "hi"}],
+        }).status_code
+
+    assert [chat(n) for n in range(3)] == [200, 200, 429]
@@ -0,0 +1,30 @@
+from sqlalchemy import delete, func, select
+
+from app import models
+from app.db import SessionLocal
+from app.services import rollups
+
+
+def test_rows_created_by_a_donation_match_a_rebuild(client):
+    db = SessionLocal()
+    try:
+        first = models.Cause(name="Reef Survey", mission="", category="Oceans Test", funding_goal=1000)
+        db.add_all([first, models.Cause(name="Kelp Forest", mission="", category="Oceans Test", funding_goal=500)])
+        db.commit()
+        db.execute(delete(models.StatsRollup))
+        first.funds_raised = (first.funds_raised or 0) + 25
+        first.supporters_count = (first.supporters_count or 0) + 1
+        rollups.record_donation(db, first.id, 25)
+        db.commit()
+
+        incremental = {(r.scope, r.key): (r.causes, r.funding_goal) for r in db.scalars(select(models.StatsRollup))}
+        assert incremental[("category", "Oceans Test")] == (2, 1500)
+        causes, goal = db.execute(select(func.count(models.Cause.id), func.sum(models.Cause.funding_goal))).one()
+        assert incremental[("total", "")] == (causes, goal)
+
+        rollups.rebuild(db)
+        rebuilt = {(r.scope, r.key): (r.causes, r.funding_goal) for r in db.scalars(select(models.StatsRollup))}
+        for key in (("category", "Oceans Test"), ("total", "")):
+            assert incremental[key] == rebuilt[key]
+    finally:
+        db.close()
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from app.services.search import LocalSearchBackend
+
+TRIBES = [
+    {"id": 1, "name": "Ocean Guardians", "description": "beach cleanups", "location": "Lisbon"},
+    {"id": 2, "name": "Code Club", "description": "teaching kids to code by the ocean", "location": "Porto"},
+    {"id": 3, "name": "Tree Planters", "description": "urban forests and parks", "location": "Lisbon"},
+]
+CAUSES = [
+    {"id": 1, "name": "Ocean Plastic Recovery", "mission": "remove plastic", "category": "Environment", "location": None},
+]
+
+
+def _index():
+    backend = LocalSearchBackend()
+    backend.replace("tribe", TRIBES)
+    backend.replace("cause", CAUSES)
+    return backend
+
+
+def _ranked(backend, query, kinds=("tribe", "cause")):
+    return [(hit.kind, hit.id) for hit in backend.search(query, kinds, limit=10)]
+
+
+def _bm25(backend, query, docs, k1=1.2, b=0.75):
+    """Reference BM25 from the analyzed documents, independent of the postings."""
+    analyzed = {key: backend._analyze(key[0], doc) for key, doc in docs.items()}
+    avg = sum(sum(t.values()) for t in analyzed.values()) / len(analyzed)
+    scores = {}
+    for key, terms in analyzed.items():
+        score = 0.0
+        for tok in set(query.lower().split()):
+            df = sum(1 for t in analyzed.values() if tok in t)
+            if tok not in terms:
+                continue
+            idf = math.log(1 + (len(analyzed) - df + 0.5) / (df + 0.5))
+            tf = terms[tok]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * sum(terms.values()) / avg))
+        if score:
+            scores[key] = score
+    return scores
+
+
+def test_scores_match_reference_bm25():
+    backend = _index()
+    docs = {**{("tribe", d["id"]): d for d in TRIBES}, **{("cause", d["id"]): d for d in CAUSES}}
+    expected = _bm25(backend, "ocean lisbon", docs)
+    hits = backend.search("ocean lisbon", ["tribe", "cause"], limit=10)
+    assert {(h.kind, h.id): h.score for h in hits} == pytest.approx(expected)
+
+
+def test_name_boost_and_kind_filter():
+    backend = _index()
+    # "ocean" in a boosted name beats "ocean" in a description
+    assert _ranked(backend, "ocean", ["tribe"])[:2] == [("tribe", 1), ("tribe", 2)]
+    assert _ranked(backend, "ocean", ["cause"]) == [("cause", 1)]
+    assert _ranked(backend, "nothing matches this") == []
+
+
+def test_incremental_updates_match_a_fresh_build():
+    backend = _index()
+    backend.upsert("tribe", [{"id": 3, "name": "Ocean Rowers", "description": "rowing", "location": "Faro"}])
+    backend.upsert("tribe", [{"id": 4, "name": "Park Runners", "description": "running in urban parks", "location": None}])
+    backend.delete("tribe", [2])
+
+    final = [TRIBES[0], {"id": 3, "name": "Ocean Rowers", "description": "rowing", "location": "Faro"},
+             {"id": 4, "name": "Park Runners", "description": "running in urban parks", "location": None}]
+    fresh = LocalSearchBackend()
+    fresh.replace("tribe", final)
+    fresh.replace("cause", CAUSES)
+
+    assert len(backend) == len(fresh) == 4
+    for query in ("ocean", "urban parks", "code", "lisbon faro"):
+        assert backend.search(query, ["tribe", "cause"], 10) == fresh.search(query, ["tribe", "cause"], 10), query
+    assert ("tribe", 2) not in _ranked(backend, "code")
+
+
+def test_replace_only_touches_its_kind():
+    backend = _index()
+    backend.replace("tribe", [])
+    assert _ranked(backend, "ocean") == [("cause", 1)]
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from app.services.streaming import JSONStringFieldStreamer
+
+DOCUMENTS = [
+    {"reply": "plain text", "profile_delta": {"interests": ["climate"]}},
+    {"reply": 'quotes " and \\ backslashes\nnew line\ttab / slash', "profile_delta": {}},
+    {"reply": "accents: café, naïve, 日本語", "profile_delta": {}},
+    {"reply": "emoji 😀 and 🌍 in a row: 🙌🏽", "profile_delta": {}},
+]
+
+
+def _stream(doc: str, size: int):
+    streamer = JSONStringFieldStreamer("reply")
+    pieces = [streamer.feed(doc[i:i + size]) for i in range(0, len(doc), size)]
+    return streamer, pieces
+
+
+@pytest.mark.parametrize("value", DOCUMENTS)
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_any_split_decodes_like_json_loads(value, ensure_ascii):
+    doc = json.dumps(value, ensure_ascii=ensure_ascii)
+    for size in range(1, 14):
+        streamer, pieces = _stream(doc, size)
+        assert "".join(pieces) == value["reply"], size
+        assert streamer.done and streamer.text == doc
+
+
+def test_surrogate_pair_is_one_character_even_when_split():
+    doc = '{"reply": "a\\ud83d\\ude00b"}'
+    for cut in range(len(doc)):
+        streamer = JSONStringFieldStreamer("reply")
+        pieces = [streamer.feed(doc[:cut]), streamer.feed(doc[cut:])]
+        # never a lone half on the wire: every piece must encode as UTF-8
+        for piece in pieces:
+            piece.encode("utf-8")
+        assert "".join(pieces) == "a\U0001F600b"
+
+
+def test_lone_surrogate_matches_json_loads():
+    doc = '{"reply": "x\\ud83d\\n"}'
+    streamer, pieces = _stream(doc, 3)
+    assert "".join(pieces) == json.loads(doc)["reply"]
+
+
+def test_text_before_the_field_is_not_emitted():
+    streamer = JSONStringFieldStreamer("reply")
+    assert streamer.feed('{"profile_delta": {"reply": 1}, "rep') == ""
+    assert streamer.feed('ly": "hi') == "hi"
+    assert streamer.feed('!"}') == "!"
+    assert streamer.feed(" trailing") == ""
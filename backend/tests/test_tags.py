@@ -0,0 +1,8 @@
+def test_tagged_profiles_need_admin(client, member, admin):
+    assert client.get("/api/tags/interest/climate/profiles").status_code == 401
+    assert client.get("/api/tags/interest/climate/profiles", headers=member).status_code == 403
+    assert client.get("/api/tags/interest/climate/profiles", headers=admin).status_code == 200
+
+
+def test_popular_tags_are_public(client):
+    assert client.get("/api/tags/interest/popular").status_code == 200
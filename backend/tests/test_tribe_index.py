@@ -0,0 +1,25 @@
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.services.tribe_index import tribe_index
+
+
+def _names(interest):
+    return [doc.name for doc, score in tribe_index.top_k([interest], [], [], k=10) if score > 0]
+
+
+def test_max_age_picks_up_writes_that_bypass_the_app(client, monkeypatch):
+    db = SessionLocal()
+    try:
+        tribe_index.ensure_loaded(db)
+        db.execute(text("INSERT INTO tribes (name, description) VALUES ('Beekeepers United', 'urban beekeeping')"))
+        db.commit()
+        tribe_index.ensure_loaded(db)
+        assert "Beekeepers United" not in _names("beekeeping")
+
+        monkeypatch.setattr(tribe_index, "max_age_seconds", 60)
+        monkeypatch.setattr(tribe_index, "_loaded_at", tribe_index._loaded_at - 61)
+        tribe_index.ensure_loaded(db)
+        assert "Beekeepers United" in _names("beekeeping")
+    finally:
+        db.close()